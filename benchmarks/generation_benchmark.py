@@ -0,0 +1,175 @@
+'''
+Measure the time and the memory of each generation stage and of the info_exchange workload on synthetic grids
+
+Usage:
+    python benchmarks/generation_benchmark.py [--sizes 50 200 1000] [--densities 0.1 0.5] [--tree-types DAG TREE]
+                                              [--radii 1.5 2.5] [--messages 10] [--ticks 50] [--no-memory]
+                                              [--output results.json] [--compare baseline.json]
+
+Every combination of the sizes, densities, tree types and radii is a case (a size of 1000 is 10^6 cells).
+The results are stored as JSON with --output, and --compare prints the time of each stage against a stored result,
+so two versions can be compared by running the same command on both.
+'''
+
+import argparse
+import json
+import platform
+import random
+import sys
+from itertools import product
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.realpath(__file__))))
+
+from memory_benchmark import reference_graph
+from topogen.model.node import generate_nodes_from_graph
+from topogen.model.link import generate_links
+from topogen.utils.function import graph_matrix_to_dict, replace_graph_elements, find_paths_from_donor_to_all_nodes, \
+                                   info_exchange
+from topogen.utils.profiler import StageProfiler
+
+
+def add_messages(nodes, path_to_dst, messages, time, rand):
+    '''
+    Send the messages from the donor to random destinations along their first stored path
+
+    Args:
+        nodes (dict{str: Node}): the nodes
+        path_to_dst (dict{str: list[list[Node]]}): the paths from the donor to each node
+        messages (int): the amount of messages
+        time (int): the time of the messages
+        rand (random.Random): the random generator
+
+    Returns:
+        None
+    '''
+
+    destinations = [name for name, paths in path_to_dst.items() if name != 'd' and paths]
+
+    for k in range(messages if destinations else 0):
+        dst = rand.choice(destinations)
+        route = path_to_dst[dst][0][1:]
+        nodes['d'].send_info.append({'time': time, 'src_node': 'd', 'dst_node': dst, 'path': route, 'hops': len(route),
+                                     'info': k})
+
+def run_case(size, density, tree_type, max_dist_to_connect_nodes, size_of_grid_len=10, max_paths=4, messages=10,
+             ticks=50, trace_memory=True, seed=0):
+    '''
+    Run the stages of one case
+
+    Args:
+        size (int): the amount of rows and cols of the grid
+        density (float): the probability of a cell to be a node
+        tree_type (str): the type of the tree (DAG or TREE)
+        max_dist_to_connect_nodes (float): the maximum distance to connect nodes
+        size_of_grid_len (int): the size per grid (meter)
+        max_paths (int): the paths kept per destination (None is all the paths)
+        messages (int): the messages sent by the donor at each tick of the info_exchange workload
+        ticks (int): the ticks of the info_exchange workload (0 to skip it)
+        trace_memory (bool): record the peak allocations of each stage
+        seed (int): the seed of the grid and of the messages
+
+    Returns:
+        result (dict): the parameters of the case and the summary of each stage (see StageProfiler.summary)
+    '''
+
+    graph = graph_matrix_to_dict(reference_graph(size, density, seed))
+    profiler = StageProfiler(trace_memory)
+    coordinate_to_node = {}
+
+    with profiler.stage('generate_nodes_from_graph') as record:
+        nodes = generate_nodes_from_graph(graph, max_dist_to_connect_nodes, tree_type, coordinate_to_node)
+        record['counts'] = {'nodes': len(nodes)}
+
+    with profiler.stage('generate_links') as record:
+        links = generate_links(nodes, size_of_grid_len)
+        record['counts'] = {'links': len(links)}
+
+    with profiler.stage('replace_graph_elements') as record:
+        topo_graph = replace_graph_elements(graph, nodes, coordinate_to_node)
+        record['counts'] = {'cells': sum(len(row) for row in topo_graph.values())}
+
+    with profiler.stage('find_paths_from_donor_to_all_nodes') as record:
+        path_to_dst = find_paths_from_donor_to_all_nodes(nodes, max_paths)
+        record['counts'] = {'paths': sum(len(paths) for paths in path_to_dst.values())}
+
+    if ticks:
+        rand = random.Random(seed)
+
+        with profiler.stage('info_exchange') as record:
+            for time in range(ticks):
+                add_messages(nodes, path_to_dst, messages, time, rand)
+                info_exchange(nodes, time)
+
+            record['counts'] = {'messages': messages * ticks}
+
+    return {
+        'case': f'{size}x{size}-{density}-{tree_type}-{max_dist_to_connect_nodes}',
+        'size': size,
+        'density': density,
+        'tree_type': tree_type,
+        'max_dist_to_connect_nodes': max_dist_to_connect_nodes,
+        'stages': profiler.summary(),
+    }
+
+def compare(results, baseline):
+    '''
+    Print the time of each stage against the baseline
+
+    Args:
+        results (list[dict]): the results of the cases
+        baseline (list[dict]): the stored results of the cases
+
+    Returns:
+        None
+    '''
+
+    baseline = {result['case']: result['stages'] for result in baseline}
+
+    for result in results:
+        for stage, summary in result['stages'].items():
+            before = baseline.get(result['case'], {}).get(stage)
+
+            if before is not None and before['seconds'] > 0:
+                print(f"{result['case']:>28} {stage:>36}: {before['seconds']:.4f}s -> {summary['seconds']:.4f}s "
+                      f"({summary['seconds'] / before['seconds']:.2f}x)")
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the time and the memory of each generation stage')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[50, 200], help='the amount of rows and cols of the grids')
+    parser.add_argument('--densities', type=float, nargs='+', default=[0.1, 0.5], help='the probability of a cell to be a node')
+    parser.add_argument('--tree-types', nargs='+', default=['DAG', 'TREE'], help='the types of the tree')
+    parser.add_argument('--radii', type=float, nargs='+', default=[1.5, 2.5], help='the maximum distances to connect nodes')
+    parser.add_argument('--max-paths', type=int, default=4, help='the paths kept per destination (0 is all the paths)')
+    parser.add_argument('--messages', type=int, default=10, help='the messages sent by the donor at each tick')
+    parser.add_argument('--ticks', type=int, default=50, help='the ticks of the info_exchange workload (0 to skip it)')
+    parser.add_argument('--seed', type=int, default=0, help='the seed of the grids and of the messages')
+    parser.add_argument('--no-memory', action='store_true', help='do not trace the memory (the times are closer to the real ones)')
+    parser.add_argument('--output', help='store the results in this JSON file')
+    parser.add_argument('--compare', help='compare the times with the results stored in this JSON file')
+    args = parser.parse_args()
+
+    results = []
+
+    for size, density, tree_type, radius in product(args.sizes, args.densities, args.tree_types, args.radii):
+        result = run_case(size, density, tree_type, radius, max_paths=args.max_paths or None, messages=args.messages,
+                          ticks=args.ticks, trace_memory=not args.no_memory, seed=args.seed)
+        results.append(result)
+
+        for stage, summary in result['stages'].items():
+            memory = '' if summary['peak_bytes'] is None else f", peak {summary['peak_bytes'] / 2 ** 20:.1f} MiB"
+            print(f"{result['case']:>28} {stage:>36}: {summary['seconds']:.4f}s{memory} {summary['counts']}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            compare(results, json.load(file)['results'])
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({'python': platform.python_version(), 'machine': platform.machine(), 'seed': args.seed,
+                       'trace_memory': not args.no_memory, 'results': results}, file, indent=2)
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,129 @@
+'''
+Compare the time of info_exchange, and of a kept InfoScheduler, with the info_exchange loop before the scheduler
+
+Usage:
+    python benchmarks/info_exchange_benchmark.py [--size 30] [--ticks 300] [--messages 20] [--max-ratio N]
+
+The path_to_dst of the topo is built before the timing, each tick the donor sends the messages to random nodes.
+The process exits with 1 when the results differ from the loop, or when --max-ratio is given and info_exchange
+takes more than max-ratio times the time of the loop, so it can guard against regressions.
+'''
+
+import argparse
+import random
+import sys
+from os import path
+from time import perf_counter
+
+sys.path.insert(0, path.dirname(path.dirname(path.realpath(__file__))))
+
+from memory_benchmark import reference_graph
+from topogen.model.topo import generate_topology_from_graph
+from topogen.utils.function import info_exchange
+from topogen.utils.info_scheduler import InfoScheduler
+
+
+def baseline_info_exchange(nodes, time):
+    '''
+    The info_exchange loop before the InfoScheduler, every tick scans the queues of all the nodes
+
+    Args:
+        nodes (dict{str: Node}): the nodes
+        time (int): time to exchange the information
+
+    Returns:
+        None
+    '''
+
+    for node in nodes.values():
+        if node.received_info.get(time - 10):
+            del node.received_info[time - 10]
+
+        satisfied_info = [i for i in node.send_info if i['time'] == time]
+        satisfied_info += [i for i in node.forward_info if i['time'] == time - i['hops'] + len(i['path'])]
+
+        node.send_info = list(filter(lambda i: i['time'] != time, node.send_info))
+        node.forward_info = list(filter(lambda i: i['time'] != time - i['hops'] + len(i['path']), node.forward_info))
+
+        for info in satisfied_info:
+            dst_node = info['path'].pop(0)
+
+            if info['path'] == []:
+                dst_node.received_info.setdefault(info['time'], []).append(info)
+            else:
+                dst_node.forward_info.append(info)
+
+def run_workload(size, ticks, messages, mode, seed=0):
+    '''
+    Run the message workload on a new topo
+
+    Args:
+        size (int): the amount of rows and cols of the grid
+        ticks (int): the ticks
+        messages (int): the messages sent by the donor at each tick
+        mode (str): baseline (the loop before the scheduler), info_exchange or scheduler (one kept InfoScheduler)
+        seed (int): the seed of the grid and of the messages
+
+    Returns:
+        seconds (float): the time of the ticks
+        received (dict{str: dict{int: list[int]}}): the received information of each node by its time
+    '''
+
+    topo = generate_topology_from_graph(reference_graph(size, seed=seed), 'DAG', 1.5, 10)
+    nodes = topo.nodes
+    names = [name for name, paths in topo.path_to_dst.items() if name != 'd' and paths]
+    scheduler = InfoScheduler(nodes) if mode == 'scheduler' else None
+    rand = random.Random(seed)
+    seconds = 0.0
+
+    for time in range(ticks):
+        infos = []
+
+        for k in range(messages):
+            route = list(topo.path_to_dst[rand.choice(names)][0][1:])
+            infos.append({'time': time, 'src_node': 'd', 'dst_node': route[-1].name, 'path': route,
+                          'hops': len(route), 'info': k})
+
+        start = perf_counter()
+
+        if scheduler is not None:
+            for info in infos:
+                scheduler.send(nodes['d'], info)
+
+            scheduler.step(time)
+        else:
+            nodes['d'].send_info += infos
+            (baseline_info_exchange if mode == 'baseline' else info_exchange)(nodes, time)
+
+        seconds += perf_counter() - start
+
+    received = {name: {key: [info['info'] for info in infos] for key, infos in node.received_info.items()}
+                for name, node in nodes.items()}
+
+    return seconds, received
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare info_exchange with the loop before the scheduler')
+    parser.add_argument('--size', type=int, default=30, help='the amount of rows and cols of the grid')
+    parser.add_argument('--ticks', type=int, default=300, help='the ticks of the workload')
+    parser.add_argument('--messages', type=int, default=20, help='the messages sent by the donor at each tick')
+    parser.add_argument('--max-ratio', type=float, help='fail when info_exchange takes more times the time of the loop')
+    args = parser.parse_args()
+
+    baseline_seconds, baseline_received = run_workload(args.size, args.ticks, args.messages, 'baseline')
+    failed = False
+
+    print(f"{'baseline':>14}: {baseline_seconds:.4f}s")
+
+    for mode in ['info_exchange', 'scheduler']:
+        seconds, received = run_workload(args.size, args.ticks, args.messages, mode)
+        same = received == baseline_received
+        failed |= not same or (mode == 'info_exchange' and args.max_ratio is not None and
+                               seconds > args.max_ratio * baseline_seconds)
+
+        print(f"{mode:>14}: {seconds:.4f}s ({seconds / baseline_seconds:.2f}x){'' if same else ', different results'}")
+
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,115 @@
+'''
+Report the memory used per node and per link for a reference grid
+
+Usage:
+    python benchmarks/memory_benchmark.py [--size 200] [--max-bytes-per-node N] [--max-bytes-per-link N]
+
+The process exits with 1 when a limit is given and exceeded, so it can guard against memory regressions.
+'''
+
+import argparse
+import random
+import sys
+import tracemalloc
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.realpath(__file__))))
+
+from topogen.model.node import generate_nodes_from_graph
+from topogen.model.link import generate_links
+from topogen.model.compact import generate_compact_topology_from_graph
+from topogen.utils.function import graph_matrix_to_dict
+
+
+def reference_graph(size, density=0.3, seed=0):
+    '''
+    Generate the reference grid, the donor is in the middle of the first row
+
+    Args:
+        size (int): the amount of rows and cols
+        density (float): the probability of a cell to be a node
+        seed (int): the seed of the random generator
+
+    Returns:
+        graph (list[list[int]]): the graph
+    '''
+
+    rand = random.Random(seed)
+    graph = [[int(rand.random() < density) for _ in range(size)] for _ in range(size)]
+    graph[0] = [0] * size
+    graph[0][size // 2] = 1
+
+    for i in range(1, size):
+        graph[i][size // 2] = 1
+
+    return graph
+
+def measure(function, *args):
+    '''
+    Measure the memory still allocated by the result of the function
+
+    Args:
+        function (function): the function
+        args: the arguments of the function
+
+    Returns:
+        result: the result of the function
+        size (int): the allocated bytes
+    '''
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = function(*args)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return result, after - before
+
+def run(size, max_dist_to_connect_nodes=2.5, size_of_grid_len=10):
+    '''
+    Run the memory benchmark
+
+    Args:
+        size (int): the size of the reference grid
+        max_dist_to_connect_nodes (float): the maximum distance to connect nodes
+        size_of_grid_len (int): the size per grid (meter)
+
+    Returns:
+        report (dict): the bytes per node and per link
+    '''
+
+    graph = reference_graph(size)
+
+    nodes, nodes_bytes = measure(generate_nodes_from_graph, graph_matrix_to_dict(graph), max_dist_to_connect_nodes, 'DAG')
+    links, links_bytes = measure(generate_links, nodes, size_of_grid_len)
+    compact_topo, compact_bytes = measure(generate_compact_topology_from_graph, graph, 'DAG',
+                                          max_dist_to_connect_nodes, size_of_grid_len)
+
+    return {
+        'grid': f'{size}x{size}',
+        'nodes': len(nodes),
+        'links': len(links),
+        'bytes_per_node': nodes_bytes / len(nodes),
+        'bytes_per_link': links_bytes / len(links),
+        'compact_bytes_per_node': compact_bytes / len(nodes),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Report the memory used per node and per link')
+    parser.add_argument('--size', type=int, default=200, help='the amount of rows and cols of the reference grid')
+    parser.add_argument('--max-bytes-per-node', type=float, help='fail when a node takes more bytes')
+    parser.add_argument('--max-bytes-per-link', type=float, help='fail when a link takes more bytes')
+    args = parser.parse_args()
+
+    report = run(args.size)
+
+    for key, value in report.items():
+        print(f'{key:>24}: {value:.1f}' if isinstance(value, float) else f'{key:>24}: {value}')
+
+    failed = args.max_bytes_per_node is not None and report['bytes_per_node'] > args.max_bytes_per_node
+    failed |= args.max_bytes_per_link is not None and report['bytes_per_link'] > args.max_bytes_per_link
+
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -9,6 +9,7 @@ setup(
     url = "https://github.com/lucasjinhong/topogen.git",
     packages=find_packages(),
     package_data={'topogen': ['config/*.yaml']},
+    install_requires=['numpy', 'PyYAML'],
     classifiers=[
         'Programming Language :: Python :: 3',
         'License :: OSI Approved :: MIT License',
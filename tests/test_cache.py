@@ -0,0 +1,130 @@
+import pytest
+
+from topogen.model.cache import *
+from topogen.model.topo import generate_topology_from_graph
+from topogen.utils.sparse import SparseGraph
+
+# the globals read by the formulas of test_topology_cache_key
+CACHE_SCALE = 100
+CACHE_OBJECT = object()
+
+def test_topology_cache_key(monkeypatch):
+    '''
+    Test the topology_cache_key function
+    '''
+
+    graph = [[0, 1, 0, 0], [1, 0, 1, 0], [0, 1, 0, 0], [1, 1, 0, 1]]
+    key = topology_cache_key(graph, 'DAG', 1.5, 10)
+
+    assert key == topology_cache_key([list(row) for row in graph], 'DAG', 1.5, 10)
+    assert key != topology_cache_key(graph, 'TREE', 1.5, 10)
+    assert key != topology_cache_key(graph, 'DAG', 2, 10)
+    assert key != topology_cache_key(graph, 'DAG', 1.5, 20)
+    assert key != topology_cache_key(graph, 'DAG', 1.5, 10, max_paths_per_dst=1)
+    assert key != topology_cache_key([[0, 1, 0, 0, 1, 0, 1, 0], [0, 1, 0, 0], [1, 1, 0, 1]], 'DAG', 1.5, 10)
+    assert topology_cache_key(graph, 'DAG', 1.5, 10, lambda dist: dist * 100) != \
+           topology_cache_key(graph, 'DAG', 1.5, 10, lambda dist: dist * 200)
+
+    # the globals read by the formula are in the key, a formula that cannot be proven stable has no key
+    formula = lambda dist: dist * CACHE_SCALE
+    key = topology_cache_key(graph, 'DAG', 1.5, 10, formula)
+    monkeypatch.setitem(formula.__globals__, 'CACHE_SCALE', 200)
+
+    assert key != topology_cache_key(graph, 'DAG', 1.5, 10, formula)
+    assert topology_cache_key(graph, 'DAG', 1.5, 10, lambda dist: CACHE_OBJECT) is None
+
+    cache = TopologyCache()
+    generate_topology_from_graph(graph, 'DAG', 1.5, 10, lambda dist: id(CACHE_OBJECT) and dist, cache=cache)
+
+    assert (cache.hits, cache.misses, len(cache.memory)) == (0, 0, 0)
+
+    # a random formula is never cached either
+    random_formula = lambda dist: dist * 100
+    random_formula.deterministic = False
+
+    assert topology_cache_key(graph, 'DAG', 1.5, 10, rate_cache=False) is None
+    assert topology_cache_key(graph, 'DAG', 1.5, 10, random_formula) is None
+
+    generate_topology_from_graph(graph, 'DAG', 1.5, 10, rate_cache=False, cache=cache)
+    generate_topology_from_graph(graph, 'DAG', 1.5, 10, random_formula, cache=cache)
+
+    assert (cache.hits, cache.misses, len(cache.memory)) == (0, 0, 0)
+
+def test_topology_cache():
+    '''
+    Test the TopologyCache class returns independent copies
+    '''
+
+    graph = [[0, 1, 0, 0], [1, 0, 1, 0], [0, 1, 0, 0], [1, 1, 0, 1]]
+    cache = TopologyCache(max_entries=1)
+
+    topo = generate_topology_from_graph(graph, 'DAG', 1.5, 10, cache=cache)
+    topo.links[('d', '1')].state = True
+    topo.nodes['1'].send_info.append({'time': 1})
+
+    cached_topo = generate_topology_from_graph(graph, 'DAG', 1.5, 10, cache=cache)
+
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cached_topo is not topo
+    assert cached_topo.links[('d', '1')].state is False
+    assert cached_topo.nodes['1'].send_info == []
+    assert cached_topo.topo_graph == topo.topo_graph
+    assert cached_topo.nodes['3'].parents == [cached_topo.nodes['1'], cached_topo.nodes['2']]
+    assert cached_topo.links[('d', '1')].src_node is cached_topo.nodes['d']
+    assert cached_topo.nodes['d'].node_to_dst[cached_topo.nodes['4']] == [cached_topo.nodes['1'], cached_topo.nodes['2']]
+    assert [[n.name for n in path] for path in cached_topo.path_to_dst['5']] == [['d', '1', '3', '5'], ['d', '2', '3', '5']]
+
+    # the least recently used topo is removed from the memory
+    generate_topology_from_graph(graph, 'DAG', 1, 10, cache=cache)
+    generate_topology_from_graph(graph, 'DAG', 1.5, 10, cache=cache)
+
+    assert (cache.hits, cache.misses) == (1, 3)
+
+def test_topology_cache_on_disk(tmp_path):
+    '''
+    Test the on-disk tier of the TopologyCache class
+    '''
+
+    graph = [[0, 1, 0, 0], [1, 0, 1, 0], [0, 1, 0, 0], [1, 1, 0, 1]]
+    topo = TopologyCache(cache_dir=str(tmp_path)).get_or_generate(graph, 'DAG', 1.5, 10)
+
+    cache = TopologyCache(cache_dir=str(tmp_path))
+    cached_topo = cache.get_or_generate(graph, 'DAG', 1.5, 10)
+
+    assert cache.hits == 1
+    assert cached_topo.topo_graph == topo.topo_graph
+    assert cached_topo.links[('2', '3')].data_rate_bps == topo.links[('2', '3')].data_rate_bps
+    assert [[n.name for n in path] for path in cached_topo.path_to_dst['4']] == [['d', '1', '3', '4'], ['d', '2', '3', '4']]
+
+    # the files are evicted when the tier is too large
+    size = os.path.getsize(os.path.join(str(tmp_path), os.listdir(str(tmp_path))[0]))
+    cache = TopologyCache(cache_dir=str(tmp_path), max_disk_bytes=size)
+    cache.get_or_generate(graph, 'DAG', 1, 10)
+
+    assert len(os.listdir(str(tmp_path))) == 1
+
+    cache.clear()
+
+    assert os.listdir(str(tmp_path)) == []
+
+    # a hit of the on-disk tier keeps the generation options and can be updated
+    options = {'build_node_to_dst': False, 'interference_radius': 2, 'max_paths_per_dst': 1}
+    topo = TopologyCache(cache_dir=str(tmp_path)).get_or_generate(graph, 'DAG', 1.5, 10, **options)
+    cached_topo = TopologyCache(cache_dir=str(tmp_path)).get_or_generate(graph, 'DAG', 1.5, 10, **options)
+
+    assert cached_topo.settings == topo.settings
+    assert cached_topo.nodes['d'].node_to_dst == {}
+    assert {node.name for node in cached_topo.nodes['1'].conflict_nodes} == \
+           {node.name for node in topo.nodes['1'].conflict_nodes}
+
+    cached_topo.add_node((2, 3))
+
+    assert cached_topo.get_node_by_coordinate((2, 3)).parents == [cached_topo.nodes['2']]
+
+    # a hit of the on-disk tier keeps the topo graph of a sparse graph sparse
+    cells = [(0, 1), (1, 0), (1, 2), (2, 1), (3, 0), (3, 1), (3, 3)]
+    topo = TopologyCache(cache_dir=str(tmp_path)).get_or_generate(cells, 'DAG', 1.5, 10)
+    cached_topo = TopologyCache(cache_dir=str(tmp_path)).get_or_generate(cells, 'DAG', 1.5, 10)
+
+    assert isinstance(cached_topo.topo_graph, SparseGraph)
+    assert cached_topo.topo_graph == topo.topo_graph
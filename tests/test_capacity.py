@@ -0,0 +1,62 @@
+import pytest
+import random
+
+from topogen.model.capacity import *
+from topogen.model.capacity import _dinic
+from topogen.model.topo import generate_topology_from_graph
+from topogen.model.compact import generate_compact_topology_from_graph
+
+
+def test_capacity_analyzer():
+    '''
+    Test the CapacityAnalyzer class
+    '''
+
+    graph = [[0, 1, 0, 0], [1, 0, 1, 0], [0, 1, 0, 0], [1, 1, 0, 1]]
+    topo = generate_topology_from_graph(graph, 'DAG', 1.5, 10)
+    analyzer = CapacityAnalyzer(topo)
+    diagonal_rate = topo.links[('d', '1')].data_rate_bps
+    vertical_rate = topo.links[('3', '5')].data_rate_bps
+
+    with pytest.raises(ValueError):
+        analyzer.max_flow('6')
+
+    assert analyzer.max_flow('3') == pytest.approx(2 * diagonal_rate)
+    assert analyzer.max_flow_to_each_node() == pytest.approx({'d': float('inf'), '1': diagonal_rate, '2': diagonal_rate,
+                                                              '3': 2 * diagonal_rate, '4': diagonal_rate,
+                                                              '5': min(vertical_rate, 2 * diagonal_rate)})
+    assert CapacityAnalyzer(generate_compact_topology_from_graph(graph, 'DAG', 1.5, 10)).max_flow_to_each_node() == \
+           pytest.approx(analyzer.max_flow_to_each_node())
+
+    result = analyzer.max_flow_to_all_nodes()
+
+    assert result['total'] == pytest.approx(2 * diagonal_rate)
+    assert sum(result['delivered'].values()) == pytest.approx(result['total'])
+    assert result['link_flow'][('d', '1')] == pytest.approx(diagonal_rate)
+
+    result = analyzer.max_flow_to_all_nodes({'4': 10, '5': 20, '1': 5})
+
+    assert result['total'] == pytest.approx(35)
+    assert result['delivered'] == pytest.approx({'4': 10, '5': 20, '1': 5})
+    assert result['link_flow'][('1', '3')] + result['link_flow'][('2', '3')] == pytest.approx(30)
+
+    with pytest.raises(ValueError):
+        analyzer.max_flow_to_all_nodes({'d': float('inf')})
+    with pytest.raises(ValueError):
+        analyzer.max_flow_to_all_nodes({'1': -1})
+
+def test_capacity_analyzer_matches_dinic():
+    '''
+    Test the CapacityAnalyzer reuse of the parent flows against running the flow algorithm for each node
+    '''
+
+    random.seed(0)
+
+    for _ in range(20):
+        graph = [[0, 0, 1, 0, 0]] + [[int(random.random() < 0.5) for _ in range(5)] for _ in range(5)]
+        topo = generate_topology_from_graph(graph, 'DAG', 2.3, 10, data_rate_formula=lambda dist: random.randint(1, 9))
+        analyzer = CapacityAnalyzer(topo)
+        flows = analyzer.max_flow_to_each_node()
+
+        for node_id, name in enumerate(analyzer.node_names[1:], 1):
+            assert flows[name] == _dinic(analyzer.adjacency, analyzer.heads, list(analyzer.capacity), 0, node_id)
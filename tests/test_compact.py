@@ -0,0 +1,142 @@
+import pytest
+import numpy as np
+
+from topogen.model.compact import *
+from topogen.model.topo import generate_topology_from_graph
+
+
+def test_generate_compact_topology_from_graph():
+    '''
+    Test the generate_compact_topology_from_graph function
+    '''
+
+    # Test Boundary Cases
+    test_cases = [
+        ([], 'DAG', 1.5, 10),
+        ([[0, 1, 0, 0], [1, 0, 1, 0], [0, 1, 0, 0], [1, 1, 0, 1]], 'test', 1.5, 10),
+        ([[0, 1, 0, 1], [1, 0, 1, 0], [0, 1, 0, 0], [1, 1, 0, 1]], 'TREE', 1.5, 10)
+    ]
+
+    for graph, tree_type, max_dist_to_connect_nodes, size_of_grid_len in test_cases:
+        with pytest.raises(ValueError):
+            generate_compact_topology_from_graph(graph, tree_type, max_dist_to_connect_nodes, size_of_grid_len)
+
+    graph = [[0, 1, 0, 0], [1, 0, 1, 0], [0, 1, 0, 0], [1, 1, 0, 1]]
+    topo = generate_topology_from_graph(graph, 'DAG', 1.5, 10)
+    compact_topo = generate_compact_topology_from_graph(graph, 'DAG', 1.5, 10)
+    nodes = compact_topo.nodes
+    links = compact_topo.links
+
+    assert compact_topo.node_amount() == 6
+    assert compact_topo.link_amount() == 6
+    assert list(nodes) == list(topo.nodes)
+    assert list(links) == list(topo.links)
+    assert compact_topo.topo_graph == topo.topo_graph
+
+    for name, node in topo.nodes.items():
+        assert nodes[name].name == name
+        assert nodes[name].type == node.type
+        assert nodes[name].coordinate == node.coordinate
+        assert [parent.name for parent in nodes[name].parents] == [parent.name for parent in node.parents]
+        assert [child.name for child in nodes[name].children] == [child.name for child in node.children]
+        assert [link.name for link in nodes[name].links] == [link.name for link in node.links]
+        assert {n.name for n in nodes[name].conflict_nodes} == {n.name for n in node.conflict_nodes}
+        assert {dst.name: [n.name for n in hops] for dst, hops in nodes[name].node_to_dst.items()} == \
+               {dst.name: [n.name for n in hops] for dst, hops in node.node_to_dst.items()}
+
+    for name, link in topo.links.items():
+        assert links[name].src_node == nodes[name[0]]
+        assert links[name].dst_node == nodes[name[1]]
+        assert links[name].data_rate_bps == pytest.approx(link.data_rate_bps)
+
+    for name, paths in topo.path_to_dst.items():
+        assert [[n.name for n in path] for path in compact_topo.path_to_dst[name]] == [[n.name for n in path] for path in paths]
+
+    radius_topo = generate_topology_from_graph(graph, 'DAG', 1.5, 10, interference_radius=2)
+    indptr, indices = compact_topo.get_conflict_graph(2)
+
+    assert indptr.tolist() == [0] + np.cumsum([len(radius_topo.conflict_graph[compact_topo.get_name(i)])
+                                                for i in range(6)]).tolist()
+    assert {compact_topo.get_name(i): {compact_topo.get_name(j) for j in compact_topo.get_conflicts(i, 2).tolist()}
+            for i in range(6)} == radius_topo.conflict_graph
+
+    tree_topo = generate_topology_from_graph(graph, 'TREE', 1.5, 10)
+    compact_tree_topo = generate_compact_topology_from_graph(graph, 'TREE', 1.5, 10)
+
+    assert list(compact_tree_topo.links) == list(tree_topo.links)
+    assert all(len(compact_tree_topo.get_parents(i)) == 1 for i in range(1, compact_tree_topo.node_amount()))
+
+    with pytest.raises(KeyError):
+        nodes['6']
+
+    with pytest.raises(KeyError):
+        links[('d', '3')]
+
+def test_compact_topo_views():
+    '''
+    Test the node and link views write to the compact topo
+    '''
+
+    graph = [[0, 1, 0, 0], [1, 0, 1, 0], [0, 1, 0, 0], [1, 1, 0, 1]]
+    compact_topo = generate_compact_topology_from_graph(graph, 'DAG', 1.5, 10, lambda dist: dist * 100)
+    link = compact_topo.links[('2', '3')]
+
+    link.state = True
+    link.extra_data_rate = 5
+    link.data_rate_bps = 10
+
+    assert compact_topo.links[('2', '3')].state is True
+    assert compact_topo.links[('2', '3')].extra_data_rate == 5
+    assert compact_topo.links[('2', '3')].data_rate_bps == 10
+    assert compact_topo.links[('d', '1')].data_rate_bps == pytest.approx(2 ** 0.5 * 10 * 100)
+
+    # the default formula gives read-only broadcast rates, the compact topo keeps a writable copy
+    for rate_cache in [True, False]:
+        compact_topo = generate_compact_topology_from_graph(graph, 'DAG', 1.5, 10, rate_cache=rate_cache)
+        compact_topo.links[('2', '3')].data_rate_bps = 10
+        compact_topo.data_rate_bps[0] = 20
+
+        assert compact_topo.links[('2', '3')].data_rate_bps == 10
+        assert compact_topo.data_rate_bps[0] == 20
+
+    compact_topo = generate_compact_topology_from_graph(graph, 'DAG', 1.5, 10, lambda dist: dist * 100)
+
+    node = compact_topo.nodes['1']
+    node.send_info.append({'time': 1})
+
+    assert compact_topo.nodes['1'].send_info == [{'time': 1}]
+    assert compact_topo.nodes['2'].send_info == []
+    assert set(compact_topo.node_queues) == {1, 2}
+
+    # the parents entries point to the links of the parents
+    for node_id in range(compact_topo.node_amount()):
+        start, end = compact_topo.parent_indptr[node_id], compact_topo.parent_indptr[node_id + 1]
+
+        for parent, link_id in zip(compact_topo.parent_indices[start:end], compact_topo.parent_link_ids[start:end]):
+            assert compact_topo.link_src[link_id] == parent
+            assert compact_topo.child_indices[link_id] == node_id
+
+def test_compact_topo_from_and_to_topo():
+    '''
+    Test the conversion between the topo and the compact topo
+    '''
+
+    graph = [[0, 1, 0, 0], [1, 0, 1, 0], [0, 1, 0, 0], [1, 1, 0, 1]]
+    topo = generate_topology_from_graph(graph, 'DAG', 1.5, 10)
+    topo.links[('1', '3')].state = True
+
+    compact_topo = CompactTopo.from_topo(topo)
+
+    assert compact_topo.node_names is None
+    assert compact_topo.links[('1', '3')].state is True
+    assert compact_topo.links[('d', '2')].data_rate_bps == topo.links[('d', '2')].data_rate_bps
+
+    new_topo = compact_topo.to_topo()
+
+    assert new_topo.topo_graph == topo.topo_graph
+    assert list(new_topo.links) == list(topo.links)
+    assert new_topo.links[('1', '3')].state is True
+    assert new_topo.links[('d', '2')].data_rate_bps == topo.links[('d', '2')].data_rate_bps
+    assert new_topo.get_node_by_coordinate((3, 0)).name == '4'
+    assert [[n.name for n in path] for path in new_topo.path_to_dst['5']] == [['d', '1', '3', '5'], ['d', '2', '3', '5']]
+    assert set(new_topo.nodes['3'].conflict_nodes) == {new_topo.nodes[name] for name in ['1', '2', '4', '5']}
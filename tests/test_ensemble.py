@@ -0,0 +1,46 @@
+import pytest
+import pickle
+
+from topogen.model.ensemble import *
+from topogen.model.compact import generate_compact_topology_from_graph
+
+
+def test_generate_topologies():
+    '''
+    Test the generate_topologies function
+    '''
+
+    graphs = [
+        [[0, 1, 0, 0], [1, 0, 1, 0], [0, 1, 0, 0], [1, 1, 0, 1]],
+        [[0, 1, 0], [0, 1, 0], [1, 0, 1]],
+        [[1, 0], [1, 1]],
+    ]
+
+    topos = list(generate_topologies(iter(graphs), 'DAG', 1.5, 10, processes=2, max_in_flight=1))
+
+    assert [index for index, _ in topos] == [0, 1, 2]
+
+    for (_, topo), graph in zip(topos, graphs):
+        expected = generate_compact_topology_from_graph(graph, 'DAG', 1.5, 10)
+
+        assert topo.topo_graph == expected.topo_graph
+        assert topo.data_rate_bps.tolist() == expected.data_rate_bps.tolist()
+
+    topos = dict(generate_topologies(graphs, 'DAG', 1.5, 10, processes=2, ordered=False))
+
+    assert sorted(topos) == [0, 1, 2]
+    assert topos[2].node_amount() == 3
+    assert pickle.loads(pickle.dumps(topos[0])).topo_graph == topos[0].topo_graph
+
+    records = []
+    topos = dict(generate_topologies(graphs, 'DAG', 1.5, 10, processes=1,
+                                     on_stage=lambda index, record: records.append((index, record['stage']))))
+
+    assert records == [(index, stage) for index in range(3) for stage in ['nodes', 'arrays', 'links']]
+    assert topos[0].profiler.records[2]['counts'] == {'links': len(topos[0].data_rate_bps)}
+
+    with pytest.raises(ValueError):
+        list(generate_topologies(graphs, 'TEST', 1.5, 10, processes=1))
+
+    with pytest.raises(ValueError):
+        list(generate_topologies(graphs, 'DAG', 1.5, 10, processes=-1))
@@ -4,74 +4,6 @@ from topogen.utils.function import *
 from topogen.model.node import generate_nodes_from_graph
 
 
-# def test_calculate_affected_coordinate():
-#     '''
-#     Test the calculate_affected_coordinate function
-#     '''
-
-#     # Initialize
-#     coordinate = (1, 1)
-
-#     # Test the affected coordinate
-#     affected_coordinate = calculate_affected_coordinate(coordinate, 1, 4)
-#     assert affected_coordinate == {coordinate, (2, 0), (2, 1), (2, 2)}
-
-#     # Test the affected coordinate
-#     affected_coordinate = calculate_affected_coordinate(coordinate, 2, 4)
-#     assert affected_coordinate == {coordinate, (2, 0), (2, 1), (2, 2), (3, 0), (3, 1), (3, 2), (2, 3), (3, 3)}
-
-#     coordinate = (2, 2)
-
-#     # Test the reverse affected coordinate
-#     affected_coordinate = calculate_affected_coordinate(coordinate, 1, 4, True)
-#     assert affected_coordinate == {coordinate, (1, 2), (1, 1), (1, 3)}
-
-#     size = 4
-#     test_cases = [
-#         (coordinate, 0, size, "affect_radius must be greater than 1 and less than {}".format(size // 2)),
-#         (coordinate, 5, size, "affect_radius must be greater than 1 and less than {}".format(size // 2)),
-#     ]
-
-#     for coordinate, affect_radius, size, comment in test_cases:
-#         with pytest.raises(ValueError, match=comment):
-#             calculate_affected_coordinate(coordinate, affect_radius, size)
-
-# def test_generate_graph():
-#     '''
-#     Test the generate_graph function
-#     '''
-
-#     # Initialize
-#     topo_graph = generate_graph(4, 1, 3, 1)
-
-#     # Test the graph
-#     assert len(topo_graph) == 4
-#     assert len(topo_graph[0]) == 4
-#     assert topo_graph[0].count('-1') >= 1 and topo_graph[0].count('-1') <= 3
-
-#     for row in range(len(topo_graph)):
-#         for col in range(row):
-#             if topo_graph[row][col] == '-1':
-#                 parents_coordinate_list = [coordinate for coordinate in calculate_affected_coordinate((row, col), 1, 4, True) if topo_graph[coordinate[0]][coordinate[1]] == '-1']
-#                 assert len(parents_coordinate_list) > 0
-
-#     for row in topo_graph:
-#         assert row.count('0') == 4 - row.count('-1')
-
-#     size = 4
-#     test_cases = [
-#         (4, 3, 1, 1, "min_node_amount must be less than max_node_amount"),
-#         (4, -1, 3, 1, "min_node_amount must be greater than 0 and max_node_amount must be greater than 1"),
-#         (4, 0, 0, 1, "min_node_amount must be greater than 0 and max_node_amount must be greater than 1"),
-#         (4, 5, 6, 1, "min_node_amount and max_node_amount must be less than size"),
-#         (4, 1, 5, 1, "min_node_amount and max_node_amount must be less than size"),
-#         (4, 1, 3, 0, "affect_radius must be greater than 1 and less than {}".format(size // 2)),
-#         (4, 1, 3, 5, "affect_radius must be greater than 1 and less than {}".format(size // 2)),
-#     ]
-#     for size, min_node_amount, max_node_amount, affect_radius, comment in test_cases:
-#         with pytest.raises(ValueError, match=comment):
-#             generate_graph(size, min_node_amount, max_node_amount, affect_radius)
-
 def test_find_paths_from_donor_to_all_nodes():
     '''
     Test the find_paths_from_donor_to_all_nodes function
@@ -89,6 +21,47 @@ def test_find_paths_from_donor_to_all_nodes():
     assert path_to_dst['4'] == [[nodes['d'], nodes['1'], nodes['3'], nodes['4']], [nodes['d'], nodes['2'], nodes['3'], nodes['4']]]
     assert path_to_dst['5'] == [[nodes['d'], nodes['1'], nodes['3'], nodes['5']], [nodes['d'], nodes['2'], nodes['3'], nodes['5']]]
 
+def test_find_paths_from_donor_to_all_nodes_with_max_paths():
+    '''
+    Test the find_paths_from_donor_to_all_nodes function with the k shortest paths
+    '''
+
+    graph = {0: [0, 1, 0], 1: [1, 0, 1], 2: [0, 1, 0], 3: [0, 1, 0]}
+    nodes = generate_nodes_from_graph(graph, 2, 'DAG')
+    path_to_dst = find_paths_from_donor_to_all_nodes(nodes, 2)
+
+    assert path_to_dst['2'] == [[nodes['d'], nodes['2']]]
+    assert path_to_dst['3'] == [[nodes['d'], nodes['3']], [nodes['d'], nodes['1'], nodes['3']]]
+    assert path_to_dst['4'] == [[nodes['d'], nodes['3'], nodes['4']], [nodes['d'], nodes['1'], nodes['3'], nodes['4']]]
+
+def test_count_paths_from_donor():
+    '''
+    Test the count_paths_from_donor function
+    '''
+
+    graph = {0: [0, 1, 0, 0], 1: [1, 0, 1, 0], 2: [0, 1, 0, 0], 3: [1, 1, 0, 1]}
+    nodes = generate_nodes_from_graph(graph, 1.5, 'DAG')
+    path_to_dst = find_paths_from_donor_to_all_nodes(nodes)
+
+    assert count_paths_from_donor(nodes) == {name: len(paths) for name, paths in path_to_dst.items()}
+    assert [node.name for node in get_topological_order(nodes)] == ['d', '1', '2', '3', '4', '5']
+
+def test_iter_paths_from_donor():
+    '''
+    Test the iter_paths_from_donor function
+    '''
+
+    graph = {0: [0, 1, 0], 1: [1, 0, 1], 2: [0, 1, 0], 3: [0, 1, 0]}
+    nodes = generate_nodes_from_graph(graph, 2, 'DAG')
+    path_to_dst = find_paths_from_donor_to_all_nodes(nodes)
+
+    for name in nodes:
+        assert list(iter_paths_from_donor(nodes, name)) == path_to_dst[name]
+
+        shortest_paths = list(iter_paths_from_donor(nodes, name, True))
+        assert sorted(map(len, path_to_dst[name])) == list(map(len, shortest_paths))
+        assert all(path in path_to_dst[name] for path in shortest_paths)
+
 def test_dist_between_coord():
     '''
     Test the dist_between_coord function
@@ -102,6 +75,31 @@ def test_dist_between_coord():
     coord2 = (1, 1)
     assert dist_between_coord(coord1, coord2) == 2 ** 0.5
 
+def test_get_connection_offsets():
+    '''
+    Test the get_connection_offsets function
+    '''
+
+    assert get_connection_offsets(0.5, 3, 3) == []
+    assert get_connection_offsets(1, 3, 3) == [(1, 0)]
+    assert get_connection_offsets(1.5, 3, 3) == [(1, -1), (1, 0), (1, 1)]
+    assert get_connection_offsets(2, 3, 3) == [(1, -1), (1, 0), (1, 1), (2, 0)]
+    assert get_connection_offsets(2, 0, 3) == []
+    assert get_connection_offsets(float('inf'), 1, 1) == [(1, -1), (1, 0), (1, 1)]
+
+def test_find_pairs_within_radius():
+    '''
+    Test the find_pairs_within_radius function
+    '''
+
+    coordinates = [(0, 0), (0, 1), (1, 1), (3, 3), (2, 0), (5, 5), (4, 4)]
+
+    for radius in [0.5, 1, 1.5, 2.2, 10]:
+        pairs = [(i, j) for i in range(len(coordinates)) for j in range(i + 1, len(coordinates))
+                 if dist_between_coord(coordinates[i], coordinates[j]) <= radius]
+
+        assert sorted(find_pairs_within_radius(coordinates, radius)) == pairs
+
 def test_replace_graph_elements():
     '''
     Test the replace_graph_elements function
@@ -115,6 +113,10 @@ def test_replace_graph_elements():
                          1: ['1', '0', '2', '0'],
                          2: ['0', '3', '0', '0'],
                          3: ['4', '5', '0', '0']}
+    assert graph == {0: [0, 1, 0, 0], 1: [1, 0, 1, 0], 2: [0, 1, 0, 0], 3: [1, 1, 0, 1]}
+
+    coordinate_to_node = {node.coordinate: node for node in nodes.values()}
+    assert replace_graph_elements(graph, nodes, coordinate_to_node) == new_graph
 
 def test_graph_matrix_to_dict():
     '''
@@ -125,6 +127,10 @@ def test_graph_matrix_to_dict():
     graph_dict = {0: [0, 1, 0, 0], 1: [1, 0, 1, 0], 2: [0, 1, 0, 0], 3: [1, 1, 0, 1]}
 
     assert graph_dict == graph_matrix_to_dict(graph_matrix)
+    assert graph_matrix_to_dict(tuple(tuple(row) for row in graph_matrix)) == \
+           {key: tuple(row) for key, row in graph_dict.items()}
+    assert graph_matrix_to_dict(((0, 1), (1, 1))) == {0: (0, 1), 1: (1, 1)}
+    assert graph_matrix_to_dict(graph_dict) is not graph_dict
 
 def test_get_yaml_data():
     '''
@@ -0,0 +1,36 @@
+import pytest
+
+from topogen.utils.generator import *
+from topogen.utils.function import graph_matrix_to_dict
+from topogen.model.node import discover_nodes_from_graph
+
+
+def test_generate_graph():
+    '''
+    Test the generate_graph function
+    '''
+
+    for size, density, max_dist_to_connect_nodes in [(30, 0.3, 1.5), ((20, 40), 0.1, 2.5), (25, 0.8, 1), (10, 0, 2)]:
+        graph = generate_graph(size, density, max_dist_to_connect_nodes, seed=1)
+        coordinates, _, _ = discover_nodes_from_graph(graph_matrix_to_dict(graph), max_dist_to_connect_nodes)
+
+        # every node can be reached from the donor
+        assert graph[0].count(1) == 1
+        assert len(coordinates) == sum(map(sum, graph))
+        assert all(any(row) for row in graph)
+
+    assert generate_graph(50, 0.3, 1.5, seed=7) == generate_graph(50, 0.3, 1.5, seed=7)
+    assert generate_graph(50, 0.3, 1.5, seed=7) != generate_graph(50, 0.3, 1.5, seed=8)
+    assert generate_graph((3, 5), 1, 1, donor_col=4) == [[0, 0, 0, 0, 1], [0, 0, 0, 0, 1], [0, 0, 0, 0, 1]]
+    assert generate_graph(5, 0, 1.5, donor_col=2, keep_rows=False) == [[0, 0, 1, 0, 0]] + [[0] * 5] * 4
+
+    test_cases = [
+        (0, 0.3, 1.5, None),
+        (10, 1.5, 1.5, None),
+        (10, 0.3, 0.5, None),
+        (10, 0.3, 1.5, 10),
+    ]
+
+    for size, density, max_dist_to_connect_nodes, donor_col in test_cases:
+        with pytest.raises(ValueError):
+            generate_graph(size, density, max_dist_to_connect_nodes, donor_col=donor_col)
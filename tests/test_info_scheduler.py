@@ -0,0 +1,209 @@
+import random
+
+import pytest
+import numpy as np
+
+from topogen.utils.info_scheduler import *
+from topogen.model.node import generate_nodes_from_graph
+from topogen.model.topo import generate_topology_from_graph
+from topogen.utils.function import info_exchange
+
+
+def test_info_scheduler():
+    '''
+    Test the InfoScheduler class
+    '''
+
+    graph = {0: [0, 1, 0, 0], 1: [1, 0, 1, 0], 2: [0, 1, 0, 0], 3: [1, 1, 0, 1]}
+    nodes = generate_nodes_from_graph(graph, 1.5, 'DAG')
+    scheduler = InfoScheduler(nodes, retention=2)
+
+    assert scheduler.next_tick() is None
+
+    scheduler.send(nodes['d'], {'time': 5, 'src_node': 'd', 'dst_node': '4', 'path': [nodes['1'], nodes['3'], nodes['4']], 'hops': 3, 'info': 1})
+    scheduler.send(nodes['d'], {'time': 3, 'src_node': 'd', 'dst_node': '2', 'path': [nodes['2']], 'hops': 1, 'info': 2})
+
+    assert scheduler.pending == 2
+    assert scheduler.next_tick() == 3
+    assert scheduler.step(3) == [{'time': 3, 'src_node': 'd', 'dst_node': '2', 'path': [], 'hops': 1, 'info': 2}]
+    assert nodes['2'].received_info == {3: [{'time': 3, 'src_node': 'd', 'dst_node': '2', 'path': [], 'hops': 1, 'info': 2}]}
+    assert len(nodes['d'].send_info) == 1
+
+    assert scheduler.next_tick() == 5
+    assert scheduler.step(5) == []
+    assert nodes['d'].send_info == []
+    assert nodes['1'].forward_info == [{'time': 5, 'src_node': 'd', 'dst_node': '4', 'path': [nodes['3'], nodes['4']], 'hops': 3, 'info': 1}]
+
+    # the received information is removed after the retention window
+    assert nodes['2'].received_info == {}
+
+    assert scheduler.next_tick() == 6
+    scheduler.step(6)
+    assert scheduler.next_tick() == 7
+    assert scheduler.step(7) == [{'time': 5, 'src_node': 'd', 'dst_node': '4', 'path': [], 'hops': 3, 'info': 1}]
+
+    # the key 5 is removed at the time 7 node by node, as in info_exchange, '3' comes before '4' so it is removed
+    assert nodes['4'].received_info == {}
+    assert scheduler.next_tick() is None
+    assert scheduler.pending == 0
+
+def test_info_scheduler_ingest():
+    '''
+    Test the InfoScheduler class schedules the information already in the nodes once
+    '''
+
+    graph = {0: [0, 1, 0, 0], 1: [1, 0, 1, 0], 2: [0, 1, 0, 0], 3: [1, 1, 0, 1]}
+    nodes = generate_nodes_from_graph(graph, 1.5, 'DAG')
+    nodes['1'].send_info = [{'time': 2, 'src_node': '1', 'dst_node': '3', 'path': [nodes['3']], 'hops': 1, 'info': 1}]
+    nodes['2'].forward_info = [{'time': 1, 'src_node': 'd', 'dst_node': '3', 'path': [nodes['3']], 'hops': 2, 'info': 2}]
+
+    scheduler = InfoScheduler(nodes)
+    scheduler.ingest()
+    scheduler.ingest()
+
+    assert scheduler.pending == 2
+    assert len(scheduler.step(2)) == 2
+    assert [info['info'] for info in nodes['3'].received_info[2]] == [1]
+    assert [info['info'] for info in nodes['3'].received_info[1]] == [2]
+
+def test_info_exchange_keeps_scheduler():
+    '''
+    Test the info_exchange function keeps the InfoScheduler on the nodes and picks up the replaced queues
+    '''
+
+    graph = {0: [0, 1, 0, 0], 1: [1, 0, 1, 0], 2: [0, 1, 0, 0], 3: [1, 1, 0, 1]}
+    nodes = generate_nodes_from_graph(graph, 1.5, 'DAG')
+    nodes['d'].send_info.append({'time': 1, 'src_node': 'd', 'dst_node': '3', 'path': [nodes['1'], nodes['3']], 'hops': 2, 'info': 1})
+
+    info_exchange(nodes, 0)
+    scheduler = nodes['d']._info_scheduler
+
+    assert all(node._info_scheduler is scheduler for node in nodes.values())
+    assert scheduler.pending == 1
+
+    # the replaced queue cancels the scheduled information of the previous one
+    nodes['d'].send_info = [{'time': 2, 'src_node': 'd', 'dst_node': '1', 'path': [nodes['1']], 'hops': 1, 'info': 2}]
+    info_exchange(nodes, 1)
+
+    assert nodes['d']._info_scheduler is scheduler
+    assert scheduler.pending == 1
+    assert nodes['1'].forward_info == []
+
+    info_exchange(nodes, 2)
+
+    assert [info['info'] for info in nodes['1'].received_info[2]] == [2]
+    assert scheduler.pending == 0
+
+    # a scheduler with another retention takes the nodes over, the previous one checks every node again
+    info_exchange(nodes, 3, retention=5)
+
+    assert nodes['d']._info_scheduler is not scheduler
+    assert not scheduler.attached
+
+def test_run_info_exchange():
+    '''
+    Test the run_info_exchange function gives the same result as calling info_exchange on every tick
+    '''
+
+    graph = [[0, 1, 0, 0], [1, 0, 1, 0], [0, 1, 0, 0], [1, 1, 0, 1]]
+    topos = [generate_topology_from_graph(graph, 'DAG', 1.5, 10) for _ in range(2)]
+
+    for topo in topos:
+        nodes = topo.nodes
+        nodes['d'].send_info = [
+            {'time': 2, 'src_node': 'd', 'dst_node': '4', 'path': [nodes['1'], nodes['3'], nodes['4']], 'hops': 3, 'info': 1},
+            {'time': 2, 'src_node': 'd', 'dst_node': '2', 'path': [nodes['2']], 'hops': 1, 'info': 2},
+            {'time': 40, 'src_node': 'd', 'dst_node': '2', 'path': [nodes['2']], 'hops': 1, 'info': 3}
+        ]
+        nodes['3'].send_info = [
+            {'time': 7, 'src_node': '3', 'dst_node': '5', 'path': [nodes['5']], 'hops': 1, 'info': 4}
+        ]
+
+    for time in range(0, 20):
+        info_exchange(topos[0].nodes, time)
+
+    stats = run_info_exchange(topos[1], 0, 20)
+
+    named = lambda infos: [dict(info, path=[n.name for n in info['path']]) for info in infos]
+
+    for name, node in topos[0].nodes.items():
+        assert topos[1].nodes[name].received_info == node.received_info
+        assert named(topos[1].nodes[name].send_info) == named(node.send_info)
+        assert named(topos[1].nodes[name].forward_info) == named(node.forward_info)
+
+    assert np.array_equal(stats['ticks'], np.arange(20))
+    assert stats['delivered'].tolist() == [0, 0, 1, 0, 1, 0, 0, 1] + [0] * 12
+    assert stats['forwarded'].tolist() == [0, 0, 1, 1] + [0] * 16
+    assert stats['queue_depth'].tolist() == [4, 4, 3, 3, 2, 2, 2, 1] + [1] * 12
+    assert stats['latency_histogram'].tolist() == [2, 0, 1]
+
+def baseline_info_exchange(nodes, time):
+    '''
+    The info_exchange loop before the InfoScheduler, the reference of test_info_exchange_matches_baseline
+    '''
+
+    for node in nodes.values():
+        if node.received_info.get(time - 10):
+            del node.received_info[time - 10]
+
+        satisfied_info = [i for i in node.send_info if i['time'] == time]
+        satisfied_info += [i for i in node.forward_info if i['time'] == time - i['hops'] + len(i['path'])]
+
+        node.send_info = list(filter(lambda i: i['time'] != time, node.send_info))
+        node.forward_info = list(filter(lambda i: i['time'] != time - i['hops'] + len(i['path']), node.forward_info))
+
+        for info in satisfied_info:
+            dst_node = info['path'].pop(0)
+
+            if info['path'] == []:
+                dst_node.received_info.setdefault(info['time'], []).append(info)
+            else:
+                dst_node.forward_info.append(info)
+
+def test_info_exchange_matches_baseline():
+    '''
+    Test the info_exchange function keeps the queues and the received information of the loop before the scheduler,
+    the late information (received after the time + 10) included
+    '''
+
+    graph = [[0, 0, 1, 0, 0], [0, 1, 1, 1, 0], [1, 1, 0, 1, 1], [0, 1, 1, 1, 0], [1, 0, 1, 0, 1]]
+    topos = [generate_topology_from_graph(graph, 'DAG', 1.5, 10) for _ in range(2)]
+    exchanges = [baseline_info_exchange, info_exchange]
+    names = [name for name, paths in topos[0].path_to_dst.items() if name != 'd' and paths]
+    rand = random.Random(0)
+
+    for time in range(120):
+        messages = []
+
+        for _ in range(rand.randrange(4)):
+            src = rand.choice(['d'] + names)
+            dst = rand.choice(names)
+            # the information sent late or in the future, forwarded late (more hops than the path),
+            # and the queues replaced by hand
+            messages.append((src, dst, time + rand.choice([-12, 0, 0, 0, 3, 12]), rand.choice([0, 0, 0, 12]),
+                             rand.random() < 0.1))
+
+        for topo, exchange in zip(topos, exchanges):
+            for k, (src, dst, info_time, delay, replace) in enumerate(messages):
+                path = [topo.nodes[name] for name in [n.name for n in topo.path_to_dst[dst][0]][1:]]
+                info = {'time': info_time, 'src_node': src, 'dst_node': dst, 'path': path, 'hops': len(path) + delay,
+                        'info': k}
+
+                if replace:
+                    topo.nodes[src].send_info = topo.nodes[src].send_info + [info]
+                else:
+                    topo.nodes[src].send_info.append(info)
+
+            exchange(topo.nodes, time)
+
+    named = lambda infos: [dict(info, path=[n.name for n in info['path']]) for info in infos]
+
+    for name, node in topos[0].nodes.items():
+        other = topos[1].nodes[name]
+
+        assert {key: named(infos) for key, infos in other.received_info.items()} == \
+               {key: named(infos) for key, infos in node.received_info.items()}
+        assert named(other.send_info) == named(node.send_info)
+        assert named(other.forward_info) == named(node.forward_info)
+
+    assert any(key < 120 - 10 for node in topos[0].nodes.values() for key in node.received_info)
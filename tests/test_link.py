@@ -1,10 +1,26 @@
 import pytest
+import numpy as np
 
+from topogen.model import link as link_module
 from topogen.model.link import *
 from topogen.model.node import generate_nodes_from_graph, Node
-from topogen.config.config import DATA_RATE_BPS_FORMULA
+from topogen.config.config import DATA_RATE_BPS_FORMULA, vectorized_formula
 from topogen.utils.function import dist_between_coord
 
+# the globals read by the formulas of test_get_offset_data_rates
+RATE_A = 1e6
+RATE_B = 5e6
+RATE_OBJECT = object()
+
+
+class RateScale:
+    def __init__(self, scale):
+        self.scale = scale
+
+    def __repr__(self):
+        return 'RateScale'
+
+RATE_REPR = RateScale(100)
 
 def test_create_link():
     '''
@@ -32,6 +48,7 @@ def test_create_link():
 
     assert link.name == 'link2'
     assert link.data_rate_bps == 100
+    assert not hasattr(link, '__dict__')
 
     # Test if the source node and the destination node are the same
     with pytest.raises(ValueError):
@@ -64,4 +81,120 @@ def test_generate_links():
     links = generate_links(nodes, size_of_grid_lens, dist_formula)
 
     assert links[('d', '1')].data_rate_bps == dist_formula(dist_between_coord(nodes['d'].coordinate, nodes['1'].coordinate) * size_of_grid_lens)
-    assert links[('d', '2')].data_rate_bps == dist_formula(dist_between_coord(nodes['d'].coordinate, nodes['2'].coordinate) * size_of_grid_lens)
\ No newline at end of file
+    assert links[('d', '2')].data_rate_bps == dist_formula(dist_between_coord(nodes['d'].coordinate, nodes['2'].coordinate) * size_of_grid_lens)
+
+def test_generate_links_vectorized():
+    '''
+    Test the generate_link function with the vectorized data rates
+    '''
+
+    topo_graph = {0: [0, 1, 0, 0], 1: [1, 0, 1, 0], 2: [0, 1, 0, 0], 3: [1, 1, 0, 1]}
+    nodes = generate_nodes_from_graph(topo_graph, 1.5, 'DAG')
+    size_of_grid_lens = 10
+    links = generate_links(nodes, size_of_grid_lens)
+
+    vectorized_nodes = generate_nodes_from_graph(topo_graph, 1.5, 'DAG')
+    vectorized_links = generate_links(vectorized_nodes, size_of_grid_lens, vectorized=True)
+
+    assert vectorized_links.keys() == links.keys()
+    assert [link.name for link in vectorized_nodes['d'].links] == [('d', '1'), ('d', '2')]
+
+    for name, link in links.items():
+        assert vectorized_links[name].data_rate_bps == pytest.approx(link.data_rate_bps)
+        assert type(vectorized_links[name].data_rate_bps) == float
+
+    # the scalar formula is called once per link
+    dist_formula = lambda dist: dist * 100
+    links = generate_links(generate_nodes_from_graph(topo_graph, 1.5, 'DAG'), size_of_grid_lens, dist_formula, True)
+
+    assert links[('d', '1')].data_rate_bps == pytest.approx(dist_formula(2 ** 0.5 * size_of_grid_lens))
+
+    # the vectorized formula is called once with the distinct distances
+    calls = []
+    array_formula = vectorized_formula(lambda dist: calls.append(dist) or dist * 100)
+    links = generate_links(generate_nodes_from_graph(topo_graph, 1.5, 'DAG'), size_of_grid_lens, array_formula, True)
+
+    assert len(calls) == 1
+    assert isinstance(calls[0], np.ndarray) and calls[0].tolist() == pytest.approx([10, 2 ** 0.5 * 10])
+    assert links[('d', '1')].data_rate_bps == pytest.approx(dist_formula(2 ** 0.5 * size_of_grid_lens))
+
+def test_get_offset_data_rates(monkeypatch):
+    '''
+    Test the get_offset_data_rates function
+    '''
+
+    # the calls are counted on the formula, a captured list would change the formula identity
+    def formula(dist):
+        formula.calls += 1
+        return dist * 100
+
+    formula.calls = 0
+
+    rate_tables.clear()
+    data_rates = get_offset_data_rates([1, 2, 1, 5], 10, formula)
+
+    assert data_rates.tolist() == pytest.approx([1000, 2 ** 0.5 * 1000, 1000, 5 ** 0.5 * 1000])
+    assert formula.calls == 3
+
+    # the table is kept for the next links with the same settings
+    assert get_offset_data_rates([2, 4], 10, formula).tolist() == pytest.approx([2 ** 0.5 * 1000, 2000])
+    assert formula.calls == 4
+    assert len(rate_tables) == 1
+
+    get_offset_data_rates([1], 20, formula)
+    assert formula.calls == 5 and len(rate_tables) == 2
+
+    # the opt-outs evaluate every link
+    get_offset_data_rates([1, 1], 10, formula, rate_cache=False)
+    assert formula.calls == 7
+
+    formula.deterministic = False
+    get_offset_data_rates([1, 1], 10, formula)
+    assert formula.calls == 9 and len(rate_tables) == 2
+
+    # the formulas reading different globals, or a global changed between two calls, have their own tables
+    formula_a = lambda dist: RATE_A / dist
+    formula_b = lambda dist: RATE_B / dist
+
+    assert get_offset_data_rates([1], 10, formula_a).tolist() == [100000.0]
+    assert get_offset_data_rates([1], 10, formula_b).tolist() == [500000.0]
+
+    monkeypatch.setitem(formula_a.__globals__, 'RATE_A', 2e6)
+
+    assert get_offset_data_rates([1], 10, formula_a).tolist() == [200000.0]
+    assert len(rate_tables) == 5
+
+    # a formula reading a value only known by its address is never cached
+    formula_object = lambda dist: id(RATE_OBJECT) and dist
+
+    assert get_offset_data_rates([1], 10, formula_object).tolist() == [10.0]
+    assert len(rate_tables) == 5
+
+    # an object with a custom repr may change without its repr changing, so it is never cached either
+    formula_repr = lambda dist: RATE_REPR.scale * dist
+
+    assert get_offset_data_rates([1], 10, formula_repr).tolist() == [1000.0]
+    assert len(rate_tables) == 5
+
+    # the table of a generation is looked up once, the least recently used table is removed over MAX_RATE_TABLES
+    table = get_rate_table(10, formula_b)
+
+    assert get_offset_data_rates([1, 4], 10, formula_b, table).tolist() == [500000.0, 250000.0]
+    assert table == {1: 500000.0, 4: 250000.0}
+    assert get_rate_table(10, formula_b, rate_cache=False) is None
+
+    monkeypatch.setattr(link_module, 'MAX_RATE_TABLES', 2)
+    get_rate_table(20, formula_b)
+
+    assert len(rate_tables) == 2 and list(rate_tables.values())[0] is table
+
+    clear_rate_tables()
+
+    assert rate_tables == {}
+
+    # the same data rates as the formula on each link
+    topo_graph = {0: [0, 1, 0, 0], 1: [1, 0, 1, 0], 2: [0, 1, 0, 0], 3: [1, 1, 0, 1]}
+    nodes = generate_nodes_from_graph(topo_graph, 2.5, 'DAG')
+
+    for link in generate_links(nodes, 10).values():
+        assert link.data_rate_bps == DATA_RATE_BPS_FORMULA(dist_between_coord(link.src_node.coordinate, link.dst_node.coordinate) * 10)
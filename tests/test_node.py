@@ -1,7 +1,8 @@
 import pytest
+import random
 
 from topogen.model.node import *
-from topogen.utils.function import replace_graph_elements
+from topogen.utils.function import replace_graph_elements, dist_between_coord
 
 
 def test_create_node():
@@ -14,6 +15,12 @@ def test_create_node():
     assert node.name == '1'
     assert node.type == 'node'
 
+    # the node is slotted
+    assert not hasattr(node, '__dict__')
+
+    with pytest.raises(AttributeError):
+        node.unknown_attribute = 1
+
     test_cases = [
         ('1', 'test', 'The node type must be either "donor" or "node"'),
         ('', 'node', 'The node name cannot be empty'),
@@ -53,6 +60,88 @@ def test_generate_node_from_graph():
 
     assert len(nodes) == 6
 
+def test_generate_node_from_graph_matches_full_scan():
+    '''
+    Test the generate_node_from_graph function gives the same nodes as scanning every cell below a node.
+    '''
+
+    def full_scan(graph, max_dist_to_connect_nodes):
+        donor = (0, graph[0].index(1))
+        names = {donor: 'd'}
+        children = {'d': []}
+        parents = {'d': []}
+        queue = [donor]
+
+        while queue:
+            coordinate = queue.pop(0)
+
+            for i in range(coordinate[0] + 1, len(graph)):
+                for j in range(len(graph[i])):
+                    if graph[i][j] == 1 and dist_between_coord(coordinate, (i, j)) <= max_dist_to_connect_nodes:
+                        if (i, j) not in names:
+                            names[(i, j)] = str(len(names))
+                            children[names[(i, j)]] = []
+                            parents[names[(i, j)]] = []
+                            queue.append((i, j))
+
+                        children[names[coordinate]].append(names[(i, j)])
+                        parents[names[(i, j)]].append(names[coordinate])
+
+        return names, children, parents
+
+    rand = random.Random(0)
+
+    for max_dist_to_connect_nodes in [0.5, 1, 1.5, 2.3, 100]:
+        graph = {i: [int(rand.random() < 0.4) for _ in range(12)] for i in range(12)}
+        graph[0] = [0] * 12
+        graph[0][5] = 1
+
+        names, children, parents = full_scan(graph, max_dist_to_connect_nodes)
+        nodes = generate_nodes_from_graph(graph, max_dist_to_connect_nodes, 'DAG')
+
+        assert len(nodes) == len(names)
+
+        for coordinate, name in names.items():
+            assert nodes[name].coordinate == coordinate
+            assert [child.name for child in nodes[name].children] == children[name]
+            assert [parent.name for parent in nodes[name].parents] == parents[name]
+
+def test_select_tree_parents():
+    '''
+    Test the select_tree_parents function
+    '''
+
+    # (2, 1) can connect to the donor directly or to (1, 0) at the shorter distance
+    graph = {0: [0, 0, 1, 0, 0], 1: [1, 0, 0, 0, 0], 2: [0, 1, 0, 0, 0]}
+    coordinates, parents, children = discover_nodes_from_graph(graph, 2.3)
+
+    assert parents == [[], [0], [0, 1]]
+
+    for parent_policy, parent_id in [('hop', 0), ('nearest', 1), ('rate', 1)]:
+        tree_parents = [list(parent_ids) for parent_ids in parents]
+        tree_children = [list(children_ids) for children_ids in children]
+        select_tree_parents(coordinates, tree_parents, tree_children, parent_policy, 10)
+
+        assert tree_parents == [[], [0], [parent_id]]
+        assert tree_children == [[1, 2], [], []] if parent_id == 0 else [[1], [2], []]
+
+    with pytest.raises(ValueError):
+        select_tree_parents(coordinates, parents, children, 'test')
+    with pytest.raises(ValueError):
+        select_tree_parents(coordinates, parents, children, 'rate')
+
+    nodes = generate_nodes_from_graph({0: [0, 1, 0, 0], 1: [1, 0, 1, 0], 2: [0, 1, 0, 0], 3: [1, 1, 0, 1]}, 1.5, 'TREE')
+
+    assert all(len(node.parents) == 1 for node in nodes.values() if node.name != 'd')
+    assert [parent.name for parent in nodes['3'].parents] == ['1']
+    assert [child.name for child in nodes['2'].children] == []
+
+    # (2, 3) is discovered after (3, 1) through a longer path, (3, 1) still takes a parent in the row 1
+    nodes = generate_nodes_from_graph({0: [0, 1, 0, 0], 1: [1, 0, 1, 0], 2: [0, 0, 0, 1], 3: [0, 1, 0, 0]}, 2.5, 'TREE')
+    coordinate_to_name = {node.coordinate: node.name for node in nodes.values()}
+
+    assert [parent.coordinate for parent in nodes[coordinate_to_name[(3, 1)]].parents] == [(1, 0)]
+
 def test_setup_conflict_nodes():
     '''
     Test the setup_conflict_nodes function.
@@ -68,6 +157,16 @@ def test_setup_conflict_nodes():
     assert set(nodes['3'].conflict_nodes) == set([nodes['1'], nodes['2'], nodes['4'], nodes['5']])
     assert set(nodes['4'].conflict_nodes) == set([nodes['3']])
 
+    # (3, 0) and (3, 1) are within the interference radius of each other and of (2, 1)
+    nodes = generate_nodes_from_graph(topo_graph, 1.5, 'DAG')
+    setup_conflict_nodes(nodes, 1)
+
+    assert nodes['4'].conflict_nodes == set([nodes['3'], nodes['5']])
+    assert nodes['5'].conflict_nodes == set([nodes['3'], nodes['4']])
+    assert nodes['1'].conflict_nodes == set([nodes['d'], nodes['2'], nodes['3']])
+    assert find_interfering_nodes((3, 0), {node.coordinate: node for node in nodes.values()}, 1.5) == \
+           set([nodes['3'], nodes['5']])
+
 def test_find_node_to_dst_by_graph():
     '''
     Test the find_node_to_dst_by_graph function.
@@ -0,0 +1,44 @@
+import pytest
+import pickle
+import tracemalloc
+
+from topogen.utils.profiler import *
+
+
+def test_stage_profiler():
+    '''
+    Test the StageProfiler class
+    '''
+
+    profiler = StageProfiler(callback=lambda record: None)
+
+    with profiler.stage('outer') as outer:
+        with profiler.stage('inner') as inner:
+            data = [0] * 100000
+            inner['counts'] = {'items': len(data)}
+
+        del data
+
+    assert [record['stage'] for record in profiler.records] == ['inner', 'outer']
+    assert inner['counts'] == {'items': 100000}
+    assert inner['peak_bytes'] >= 800000
+    assert outer['peak_bytes'] >= inner['peak_bytes']
+    assert outer['seconds'] >= inner['seconds']
+    assert not tracemalloc.is_tracing()
+
+    # the callback is not pickled
+    assert pickle.loads(pickle.dumps(profiler)).callback is None
+
+    profiler = StageProfiler(trace_memory=False)
+
+    with pytest.raises(ZeroDivisionError):
+        with profiler.stage('error'):
+            1 / 0
+
+    assert profiler.records[0]['peak_bytes'] is None
+    assert profiler.summary()['error']['calls'] == 1
+
+    with profile_stage(None, 'skipped') as record:
+        record['counts'] = {'items': 1}
+
+    assert len(profiler.records) == 1
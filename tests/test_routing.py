@@ -0,0 +1,105 @@
+import pytest
+import random
+
+from topogen.model.routing import *
+from topogen.model.node import generate_nodes_from_graph, find_node_to_dst_by_graph
+from topogen.model.topo import generate_topology_from_graph
+from topogen.utils.function import replace_graph_elements
+
+
+def test_routing_table():
+    '''
+    Test the RoutingTable class on a DAG
+    '''
+
+    graph = {0: [0, 1, 0, 0], 1: [1, 0, 1, 0], 2: [0, 1, 0, 0], 3: [1, 1, 0, 1]}
+    nodes = generate_nodes_from_graph(graph, 1.5, 'DAG')
+    find_node_to_dst_by_graph(nodes, replace_graph_elements(graph, nodes))
+    routing = RoutingTable(nodes)
+
+    assert routing.is_tree is False
+    assert routing.reach == {}
+
+    assert routing.next_hops(nodes['d'], nodes['5']) == [nodes['1'], nodes['2']]
+    assert routing.next_hops(nodes['3'], nodes['4']) == [nodes['4']]
+    assert routing.next_hops(nodes['3'], nodes['1']) == []
+    assert routing.reaches(nodes['1'], nodes['4']) is True
+    assert routing.reaches(nodes['4'], nodes['1']) is False
+
+    # only the queried node and its descendants are computed
+    assert set(routing.reach) == {nodes['1'], nodes['2'], nodes['3'], nodes['4'], nodes['5']}
+
+    for node in nodes.values():
+        assert routing.get_node_to_dst(node) == node.node_to_dst
+
+def test_routing_table_tree():
+    '''
+    Test the RoutingTable class on a tree
+    '''
+
+    graph = {0: [0, 1, 0], 1: [0, 1, 0], 2: [0, 1, 0], 3: [1, 0, 1]}
+    nodes = generate_nodes_from_graph(graph, 1.5, 'DAG')
+    find_node_to_dst_by_graph(nodes, replace_graph_elements(graph, nodes))
+    routing = RoutingTable(nodes)
+
+    assert routing.is_tree is True
+    assert routing.next_hops(nodes['d'], nodes['4']) == [nodes['1']]
+    assert routing.next_hops(nodes['2'], nodes['4']) == [nodes['4']]
+    assert routing.next_hops(nodes['3'], nodes['4']) == []
+    assert routing.reach == {}
+
+    for node in nodes.values():
+        assert routing.get_node_to_dst(node) == node.node_to_dst
+
+def test_generate_topology_without_node_to_dst():
+    '''
+    Test the routing table of the topo when node_to_dst is not built
+    '''
+
+    graph = [[0, 1, 0, 0], [1, 0, 1, 0], [0, 1, 0, 0], [1, 1, 0, 1]]
+    topo = generate_topology_from_graph(graph, 'DAG', 1.5, 10, build_node_to_dst=False)
+    nodes = topo.nodes
+
+    assert nodes['d'].node_to_dst == {}
+    assert topo.routing.next_hops(nodes['d'], nodes['4']) == [nodes['1'], nodes['2']]
+
+def test_route_tree():
+    '''
+    Test the RouteTree class against the costs of all the enumerated paths
+    '''
+
+    random.seed(0)
+
+    for _ in range(20):
+        graph = [[0, 0, 1, 0, 0]] + [[int(random.random() < 0.6) for _ in range(5)] for _ in range(5)]
+        topo = generate_topology_from_graph(graph, 'DAG', 2.3, 10, data_rate_formula=lambda dist: random.randint(1, 9))
+
+        def get_costs(path):
+            rates = [topo.links[(src.name, dst.name)].data_rate_bps for src, dst in zip(path, path[1:])]
+            return {'hop': len(rates), 'latency': sum(8 / rate for rate in rates), 'bottleneck': min(rates, default=float('inf'))}
+
+        for metric in ROUTE_METRICS:
+            route_tree = topo.routing.get_route_tree(metric, 8)
+            best = max if metric == 'bottleneck' else min
+
+            for name, paths in topo.path_to_dst.items():
+                path = route_tree.get_path(name)
+
+                assert path in paths
+                assert route_tree.get_cost(name) == pytest.approx(best(get_costs(path)[metric] for path in paths))
+                assert get_costs(path)[metric] == pytest.approx(route_tree.get_cost(name))
+
+    graph = [[0, 1, 0, 0], [1, 0, 1, 0], [0, 1, 0, 0], [1, 1, 0, 1]]
+    topo = generate_topology_from_graph(graph, 'DAG', 1.5, 10)
+    route_tree = topo.routing.get_route_tree()
+
+    assert route_tree.predecessors.tolist() == [-1, 0, 0, 1, 3, 3]
+    assert [node.name for node in route_tree.get_path('5')] == ['d', '1', '3', '5']
+    assert topo.routing.get_route_tree() is route_tree
+
+    topo.remove_node('1')
+
+    assert [node.name for node in topo.routing.get_route_tree().get_path('5')] == ['d', '2', '3', '5']
+
+    with pytest.raises(ValueError):
+        RouteTree(topo.nodes, 'test')
@@ -0,0 +1,73 @@
+import pytest
+import numpy as np
+
+from topogen.model.scheduling import *
+from topogen.model.topo import generate_topology_from_graph
+from topogen.model.compact import generate_compact_topology_from_graph
+
+
+def test_build_link_conflict_graph():
+    '''
+    Test the build_link_conflict_graph function
+    '''
+
+    graph = [[1, 0], [1, 0], [1, 0], [1, 0], [1, 0], [1, 0], [1, 0]]
+    topo = generate_topology_from_graph(graph, 'DAG', 1, 10)
+    scheduler = LinkScheduler(topo)
+
+    # a chain: the links two hops apart still conflict at the receiver, three hops apart they do not
+    assert scheduler.link_names == [('d', '1'), ('1', '2'), ('2', '3'), ('3', '4'), ('4', '5'), ('5', '6')]
+    assert scheduler.get_conflict_links(0).tolist() == [1, 2]
+    assert scheduler.get_conflict_links(3).tolist() == [1, 2, 4, 5]
+
+    compact_scheduler = LinkScheduler(generate_compact_topology_from_graph(graph, 'DAG', 1, 10))
+
+    assert compact_scheduler.indptr.tolist() == scheduler.indptr.tolist()
+    assert compact_scheduler.indices.tolist() == scheduler.indices.tolist()
+
+    # the interference radius adds the conflicts between the links of the nodes within the radius
+    indptr, indices = generate_compact_topology_from_graph(graph, 'DAG', 1, 10).get_conflict_graph(2)
+    indptr, indices = build_link_conflict_graph(scheduler.link_src, scheduler.link_dst, indptr, indices)
+
+    assert indices[indptr[0]:indptr[1]].tolist() == [1, 2, 3]
+
+def test_link_scheduler():
+    '''
+    Test the LinkScheduler class
+    '''
+
+    graph = [[1, 0], [1, 0], [1, 0], [1, 0], [1, 0], [1, 0], [1, 0]]
+    topo = generate_topology_from_graph(graph, 'DAG', 1, 10)
+    scheduler = LinkScheduler(topo, 0.5)
+
+    with pytest.raises(ValueError):
+        LinkScheduler(topo, 0)
+    with pytest.raises(ValueError):
+        scheduler.run(1, 'test')
+
+    active = scheduler.schedule_slot(scheduler.data_rate_bps)
+
+    assert active.tolist() == [0, 3]
+    assert scheduler.schedule_slot([0, 1, 3, 0, 2, 0]).tolist() == [2]
+    assert scheduler.schedule_slot([0, 1, 0, 0, 2, 0]).tolist() == [1, 4]
+
+    for link_ids in [active, scheduler.schedule_slot(np.arange(6))]:
+        for link_id in link_ids.tolist():
+            assert not set(scheduler.get_conflict_links(link_id).tolist()) & set(link_ids.tolist())
+
+    stats = scheduler.run(2)
+
+    assert stats['active_links'].tolist() == [2, 2]
+    assert stats['throughput'] == pytest.approx([scheduler.data_rate_bps[[0, 3]].sum()] * 2)
+
+    rate = scheduler.data_rate_bps[0] * 0.5
+    stats = scheduler.run(3, 'backlog', backlog=[0, 0, 0, 0, 0, 2 * rate], arrivals=np.array([rate, 0, 0, 0, 0, 0]))
+
+    assert [schedule.tolist() for schedule in stats['schedules']] == [[0, 5], [0, 5], [0]]
+    assert stats['throughput'] == pytest.approx([4 * rate, 4 * rate, 2 * rate])
+    assert stats['backlog'] == pytest.approx([rate, 0, 0])
+
+    scheduler.apply([0, 3], [1, 2])
+
+    assert [link.state for link in topo.links.values()] == [True, False, False, True, False, False]
+    assert topo.links[('3', '4')].extra_data_rate == pytest.approx(topo.links[('3', '4')].data_rate_bps - 2)
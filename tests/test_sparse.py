@@ -0,0 +1,78 @@
+import pytest
+import numpy as np
+
+from topogen.utils.sparse import *
+from topogen.model.topo import generate_topology_from_graph
+
+
+def test_sparse_row():
+    '''
+    Test the SparseRow class
+    '''
+
+    row = SparseRow(5, {1: 1, 3: 1})
+
+    assert len(row) == 5
+    assert list(row) == [0, 1, 0, 1, 0]
+    assert row == [0, 1, 0, 1, 0]
+    assert (row[1], row[2], row[-2]) == (1, 0, 1)
+    assert (row.index(1), row.index(0), row.count(1), row.count(0)) == (1, 0, 2, 3)
+    assert row.items() == [(1, 1), (3, 1)]
+
+    row_copy = row.copy()
+    row_copy[1] = 0
+    row_copy[4] = 1
+
+    assert row_copy.cells == {3: 1, 4: 1}
+    assert row.cells == {1: 1, 3: 1}
+
+    with pytest.raises(IndexError):
+        row[5]
+
+    with pytest.raises(ValueError):
+        row.index(2)
+
+def test_sparse_graph():
+    '''
+    Test the SparseGraph class
+    '''
+
+    matrix = [[0, 1, 0, 0], [1, 0, 1, 0], [0, 0, 0, 0], [1, 1, 0, 1]]
+    cells = [(i, j) for i, row in enumerate(matrix) for j, element in enumerate(row) if element]
+
+    graph = SparseGraph(iter(cells))
+
+    assert graph.shape == (4, 4)
+    assert graph.to_dict() == dict(enumerate(matrix))
+    assert graph == SparseGraph.from_array(np.array(matrix, dtype=bool))
+    assert graph != SparseGraph(cells, shape=(5, 4))
+    assert list(graph.cells()) == [(i, j, 1) for i, j in cells]
+    assert (0 in graph, 4 in graph, [] in graph) == (True, False, False)
+
+    # the shallow copy shares the rows, the deep copy does not
+    graph_copy = graph.copy()
+    deep_copy = graph.copy(deep=True)
+    graph[1][1] = 1
+
+    assert graph_copy[1][1] == 1
+    assert deep_copy[1][1] == 0
+
+    with pytest.raises(KeyError):
+        graph[4]
+
+    with pytest.raises(ValueError):
+        SparseGraph(cells, shape=(3, 4))
+
+    with pytest.raises(ValueError):
+        SparseGraph([(0, -1)])
+
+    with pytest.raises(ValueError):
+        SparseGraph.from_array(np.zeros(4))
+
+    # the cells that are not 1 are kept, the same as the rows of a matrix
+    matrix = [[0, 1, 0], [2, 1, 1], [0, 1, 0]]
+
+    assert list(SparseGraph.from_array(np.array(matrix)).cells()) == \
+           [(0, 1, 1), (1, 0, 2), (1, 1, 1), (1, 2, 1), (2, 1, 1)]
+    assert len(generate_topology_from_graph(np.array(matrix), 'DAG', 1.5, 10).nodes) == \
+           len(generate_topology_from_graph(matrix, 'DAG', 1.5, 10).nodes)
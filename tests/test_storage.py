@@ -0,0 +1,64 @@
+import pytest
+import numpy as np
+
+from topogen.model.storage import *
+from topogen.model.topo import generate_topology_from_graph
+from topogen.model.compact import generate_compact_topology_from_graph
+
+
+def test_save_and_load_topology(tmp_path):
+    '''
+    Test the save_topology and load_topology functions
+    '''
+
+    graph = [[0, 1, 0, 0], [1, 0, 1, 0], [0, 1, 0, 0], [1, 1, 0, 1]]
+    topo = generate_topology_from_graph(graph, 'DAG', 1.5, 10)
+    topo.links[('2', '3')].state = True
+    file_path = str(tmp_path / 'topo.bin')
+
+    save_topology(topo, file_path, include_paths=True)
+
+    for mmap in [True, False]:
+        compact_topo = load_topology(file_path, mmap)
+
+        assert isinstance(compact_topo.data_rate_bps.base, np.memmap) == mmap
+        assert compact_topo.topo_graph == topo.topo_graph
+        assert list(compact_topo.links) == list(topo.links)
+        assert compact_topo.links[('2', '3')].state is True
+        assert compact_topo.links[('d', '1')].data_rate_bps == topo.links[('d', '1')].data_rate_bps
+
+        new_topo = compact_topo.to_topo()
+
+        for name, paths in topo.path_to_dst.items():
+            assert [[n.name for n in path] for path in new_topo.path_to_dst[name]] == [[n.name for n in path] for path in paths]
+            assert [[n.name for n in path] for path in compact_topo.path_to_dst[name]] == [[n.name for n in path] for path in paths]
+
+    # the changes of a memory mapped topo are not written back to the file
+    compact_topo = load_topology(file_path)
+    compact_topo.links[('d', '1')].state = True
+
+    assert load_topology(file_path).links[('d', '1')].state is False
+
+def test_save_and_load_topology_with_names(tmp_path):
+    '''
+    Test the save_topology and load_topology functions with the custom node names and without paths
+    '''
+
+    graph = [[0, 1, 0, 0], [1, 0, 1, 0], [0, 1, 0, 0], [1, 1, 0, 1]]
+    compact_topo = generate_compact_topology_from_graph(graph, 'DAG', 1.5, 10)
+    compact_topo.node_names = ['donor', 'a', 'b', 'c', 'e', 'f']
+    file_path = str(tmp_path / 'topo.bin')
+
+    save_topology(compact_topo, file_path)
+    loaded_topo = load_topology(file_path)
+
+    assert loaded_topo.path_table is None
+    assert list(loaded_topo.node_names) == compact_topo.node_names
+    assert loaded_topo.nodes['c'].coordinate == (2, 1)
+    assert [parent.name for parent in loaded_topo.nodes['c'].parents] == ['a', 'b']
+
+    with open(file_path, 'wb') as file:
+        file.write(b'not a topo')
+
+    with pytest.raises(ValueError, match='The file is not a saved topo'):
+        load_topology(file_path)
@@ -0,0 +1,73 @@
+import pytest
+import numpy as np
+
+from topogen.model.stream import *
+from topogen.model.topo import generate_topology_from_graph
+from topogen.utils.generator import generate_graph
+from topogen.utils.sparse import SparseGraph
+
+
+def test_iter_topology_rows():
+    '''
+    Test the iter_topology_rows function
+    '''
+
+    graph = [[0, 1, 0, 0], [1, 0, 1, 0], [0, 1, 0, 0], [1, 1, 0, 1]]
+    records = list(iter_topology_rows(iter(graph), 'DAG', 1.5, 10))
+
+    # the nodes are named in the row-major order and each node is followed by its links
+    assert [record['name'] for kind, record in records] == ['d', ('d', '1'), ('d', '2'), '1', ('1', '3'), '2',
+                                                             ('2', '3'), '3', ('3', '4'), ('3', '5'), '4', '5']
+    assert records[3] == ('node', {'name': '1', 'type': 'node', 'coordinate': (1, 0), 'parents': ['d'], 'children': ['3']})
+
+    # the same nodes and links as generate_topology_from_graph, compared by coordinate
+    for tree_type, max_dist_to_connect_nodes, parent_policy in [('DAG', 1.5, 'hop'), ('DAG', 2.5, 'hop'),
+                                                                ('TREE', 2.5, 'hop'), ('TREE', 2, 'rate')]:
+        graph = generate_graph(30, 0.4, max_dist_to_connect_nodes, seed=3)
+        topo = generate_topology_from_graph(graph, tree_type, max_dist_to_connect_nodes, 10, parent_policy=parent_policy)
+
+        coordinates = {}
+        nodes = {}
+        links = {}
+
+        for kind, record in iter_topology_rows(map(np.array, graph), tree_type, max_dist_to_connect_nodes, 10,
+                                               parent_policy=parent_policy):
+            if kind == 'node':
+                coordinates[record['name']] = record['coordinate']
+                nodes[record['coordinate']] = record
+            else:
+                links[record['name']] = record['data_rate_bps']
+
+        assert sorted(nodes) == sorted(node.coordinate for node in topo.nodes.values())
+
+        for node in topo.nodes.values():
+            assert [coordinates[name] for name in nodes[node.coordinate]['parents']] == \
+                   sorted(parent.coordinate for parent in node.parents)
+            assert [coordinates[name] for name in nodes[node.coordinate]['children']] == \
+                   [child.coordinate for child in node.children]
+
+        assert {(coordinates[src], coordinates[dst]): data_rate for (src, dst), data_rate in links.items()} == \
+               pytest.approx({(link.src_node.coordinate, link.dst_node.coordinate): link.data_rate_bps
+                              for link in topo.links.values()})
+
+    with pytest.raises(ValueError):
+        list(iter_topology_rows(iter([]), 'DAG', 1.5, 10))
+
+    with pytest.raises(ValueError):
+        list(iter_topology_rows(iter([[1, 1]]), 'DAG', 1.5, 10))
+
+    with pytest.raises(ValueError):
+        list(iter_topology_rows(iter([[1]]), 'TEST', 1.5, 10))
+
+def test_stream_topology():
+    '''
+    Test the stream_topology function
+    '''
+
+    graph = SparseGraph([(0, 1), (1, 0), (1, 2), (2, 1), (3, 0), (3, 1), (3, 3), (5, 0)], shape=(6, 4))
+    records = []
+
+    counts = stream_topology(graph.values(), 'TREE', 1.5, 10, lambda kind, record: records.append((kind, record)))
+
+    assert counts == {'nodes': 6, 'links': 5}
+    assert [record['name'] for kind, record in records if kind == 'node'] == ['d', '1', '2', '3', '4', '5']
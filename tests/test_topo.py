@@ -28,6 +28,7 @@ def test_generate_topology_from_graph():
     
     assert len(nodes) == 6
     assert len(links) == 6
+    assert not hasattr(topo, '__dict__')
 
     assert nodes['5'].node_to_dst == {}
     assert nodes['4'].node_to_dst == {}
@@ -41,6 +42,10 @@ def test_generate_topology_from_graph():
                                1: ['1', '0', '2', '0'], 
                                2: ['0', '3', '0', '0'], 
                                3: ['4', '5', '0', '0']}
+
+    assert topo.get_node_by_coordinate((2, 1)) == nodes['3']
+    assert topo.get_node_by_coordinate((3, 3)) is None
+    assert len(topo.coordinate_to_node) == len(nodes)
     
     dist_formula = lambda dist: dist * 100
     size_of_grid_lens = 10
@@ -122,4 +127,271 @@ def test_generate_topology_from_graph():
 #     compare_info += "Node: 3 (Path Amount: 1)\n"
 #     compare_info += "Node: 4 (Path Amount: 1)\n"
 
-#     assert info == compare_info
\ No newline at end of file
+#     assert info == compare_info
+
+def test_topo_copy():
+    '''
+    Test the Topo.copy function
+    '''
+
+    graph = [[0, 1, 0, 0], [1, 0, 1, 0], [0, 1, 0, 0], [1, 1, 0, 1]]
+    topo = generate_topology_from_graph(graph, 'DAG', 1.5, 10)
+    topo_copy = topo.copy()
+
+    assert topo_copy.topo_graph == topo.topo_graph
+    assert list(topo_copy.links) == list(topo.links)
+    assert all(topo_copy.nodes[name] is not node for name, node in topo.nodes.items())
+    assert [link.name for link in topo_copy.nodes['d'].links] == [('d', '1'), ('d', '2')]
+    assert set(topo_copy.nodes['3'].conflict_nodes) == {topo_copy.nodes[name] for name in ['1', '2', '4', '5']}
+    assert topo_copy.get_node_by_coordinate((2, 1)) is topo_copy.nodes['3']
+
+    topo_copy.links[('d', '1')].state = True
+    topo_copy.nodes['d'].children.pop()
+
+    assert topo.links[('d', '1')].state is False
+    assert len(topo.nodes['d'].children) == 2
+
+    # the information in the queues is copied as well
+    topo.nodes['1'].send_info.append({'time': 1})
+    topo_copy = topo.copy()
+    topo_copy.nodes['1'].send_info[0]['time'] = 2
+
+    assert topo.nodes['1'].send_info == [{'time': 1}]
+
+def test_topo_update():
+    '''
+    Test the Topo.add_node, Topo.remove_node and Topo.toggle_cell functions
+    '''
+
+    def get_state(topo):
+        nodes = {node.coordinate: (sorted(parent.coordinate for parent in node.parents),
+                                   [child.coordinate for child in node.children],
+                                   sorted(conflict.coordinate for conflict in node.conflict_nodes),
+                                   {dst.coordinate: [hop.coordinate for hop in hops] for dst, hops in node.node_to_dst.items()})
+                 for node in topo.nodes.values()}
+        links = {(link.src_node.coordinate, link.dst_node.coordinate): link.data_rate_bps for link in topo.links.values()}
+        paths = {topo.nodes[name].coordinate: sorted([node.coordinate for node in path] for path in paths)
+                 for name, paths in topo.path_to_dst.items()}
+
+        return nodes, links, paths
+
+    graph = [[0, 1, 0, 0, 0], [1, 0, 0, 0, 0], [0, 0, 0, 1, 0], [0, 0, 0, 1, 1]]
+    topo = generate_topology_from_graph(graph, 'DAG', 1.5, 10)
+
+    # (2, 3), (3, 3) and (3, 4) are unreachable until (1, 2) is added
+    assert len(topo.nodes) == 2
+    new_node = topo.add_node((1, 2))
+
+    assert new_node.name == '2'
+    assert topo.get_node_by_coordinate((3, 4)).name == '5'
+
+    graph[1][2] = 1
+    assert get_state(topo) == get_state(generate_topology_from_graph(graph, 'DAG', 1.5, 10))
+
+    removed = topo.remove_node(topo.get_node_by_coordinate((1, 0)).name)
+    graph[1][0] = 0
+
+    assert [node.coordinate for node in removed] == [(1, 0)]
+    assert get_state(topo) == get_state(generate_topology_from_graph(graph, 'DAG', 1.5, 10))
+
+    # removing (1, 2) disconnects the nodes below it
+    assert topo.toggle_cell((1, 2)) is None
+    graph[1][2] = 0
+
+    assert sorted(topo.coordinate_to_node) == [(0, 1)]
+    assert get_state(topo) == get_state(generate_topology_from_graph(graph, 'DAG', 1.5, 10))
+
+    # the cells are kept, so adding (1, 2) back connects them again
+    topo.toggle_cell((1, 2))
+    graph[1][2] = 1
+
+    assert get_state(topo) == get_state(generate_topology_from_graph(graph, 'DAG', 1.5, 10))
+    assert topo.routing.next_hops(topo.nodes['d'], topo.get_node_by_coordinate((3, 4))) == [topo.get_node_by_coordinate((1, 2))]
+
+    with pytest.raises(ValueError):
+        topo.remove_node('d')
+    with pytest.raises(ValueError):
+        topo.add_node((4, 0))
+
+    # the given graph is not changed by the updates
+    graph = {0: [0, 1, 0], 1: [1, 0, 0], 2: [0, 0, 0]}
+    generate_topology_from_graph(graph, 'DAG', 1.5, 10).add_node((2, 1))
+
+    assert graph == {0: [0, 1, 0], 1: [1, 0, 0], 2: [0, 0, 0]}
+
+def test_topo_tree():
+    '''
+    Test the TREE topo and its update
+    '''
+
+    graph = [[0, 0, 1, 0, 0], [1, 0, 0, 0, 0], [0, 1, 0, 0, 0], [1, 0, 0, 0, 0]]
+
+    with pytest.raises(ValueError):
+        generate_topology_from_graph(graph, 'TREE', 2.3, 10, parent_policy='test')
+
+    topo = generate_topology_from_graph(graph, 'TREE', 2.3, 10, max_paths_per_dst=2, parent_policy='nearest')
+
+    assert [parent.name for parent in topo.nodes['2'].parents] == ['1']
+    assert list(topo.links) == [('d', '1'), ('1', '2'), ('2', '3')]
+    assert {name: [[node.name for node in path] for path in paths] for name, paths in topo.path_to_dst.items()} == \
+           {'d': [['d']], '1': [['d', '1']], '2': [['d', '1', '2']], '3': [['d', '1', '2', '3']]}
+    assert topo.routing.is_tree
+    assert topo.routing.next_hops(topo.nodes['d'], topo.nodes['3']) == [topo.nodes['1']]
+
+    # (2, 1) takes the donor as its parent when (1, 0) is removed and keeps it when (1, 0) is added back
+    assert [node.name for node in topo.remove_node('1')] == ['1']
+    assert [parent.name for parent in topo.nodes['2'].parents] == ['d']
+    assert [[node.name for node in path] for path in topo.path_to_dst['3']] == [['d', '2', '3']]
+    assert topo.nodes['d'].node_to_dst == {topo.nodes['2']: [topo.nodes['2']], topo.nodes['3']: [topo.nodes['2']]}
+
+    new_node = topo.add_node((1, 0))
+
+    assert new_node.parents == [topo.nodes['d']] and new_node.children == []
+    assert [parent.name for parent in topo.nodes['2'].parents] == ['d']
+    assert topo.routing.is_tree
+    assert topo.routing.next_hops(topo.nodes['d'], topo.nodes['3']) == [topo.nodes['2']]
+
+def test_topo_conflict_graph():
+    '''
+    Test the Topo.conflict_graph property with the interference radius
+    '''
+
+    graph = [[0, 1, 0, 0], [1, 0, 1, 0], [0, 1, 0, 0], [1, 1, 0, 1]]
+    topo = generate_topology_from_graph(graph, 'DAG', 1.5, 10)
+
+    assert topo.conflict_graph['3'] == {'1', '2', '4', '5'}
+    assert topo.conflict_graph['4'] == {'3'}
+
+    with pytest.raises(ValueError):
+        generate_topology_from_graph(graph, 'DAG', 1.5, 10, interference_radius=0)
+
+    topo = generate_topology_from_graph(graph, 'DAG', 1.5, 10, interference_radius=2)
+
+    assert topo.conflict_graph['4'] == {'1', '3', '5'}
+    assert topo.conflict_graph['d'] == {'1', '2', '3'}
+
+    # the conflicts follow the update, the same as the generation from the changed graph
+    topo.add_node((2, 3))
+    graph[2][3] = 1
+    new_topo = generate_topology_from_graph(graph, 'DAG', 1.5, 10, interference_radius=2)
+
+    assert {topo.nodes[name].coordinate: {topo.nodes[n].coordinate for n in names} for name, names in topo.conflict_graph.items()} == \
+           {new_topo.nodes[name].coordinate: {new_topo.nodes[n].coordinate for n in names}
+            for name, names in new_topo.conflict_graph.items()}
+
+    topo.remove_node(topo.get_node_by_coordinate((1, 2)).name)
+
+    assert all(topo.get_node_by_coordinate((1, 2)) is None and (1, 2) not in {n.coordinate for n in node.conflict_nodes}
+               for node in topo.nodes.values())
+
+    # an infinite radius makes all the nodes conflict, in the generation and in the update
+    topo = generate_topology_from_graph(graph, 'DAG', 1.5, 10, interference_radius=float('inf'), eager=True)
+    topo.add_node((2, 0))
+
+    assert all(names == set(topo.nodes) - {name} for name, names in topo.conflict_graph.items())
+
+def test_topo_lazy_stages():
+    '''
+    Test the lazy stages of the topo
+    '''
+
+    graph = [[0, 1, 0, 0], [1, 0, 1, 0], [0, 1, 0, 0], [1, 1, 0, 1]]
+    topo = generate_topology_from_graph(graph, 'DAG', 1.5, 10)
+    eager_topo = generate_topology_from_graph(graph, 'DAG', 1.5, 10, eager=True)
+
+    assert topo.pending == set(TOPO_STAGES)
+    assert eager_topo.pending == set()
+
+    assert list(topo.links) == list(eager_topo.links)
+    assert topo.pending == set(TOPO_STAGES) - {'links'}
+
+    assert topo.nodes['3'].conflict_nodes == {topo.nodes[name] for name in ['1', '2', '4', '5']}
+    assert topo.pending == {'topo_graph', 'node_to_dst', 'routing', 'path_to_dst'}
+
+    # the copy keeps the pending stages, and they are built from the copied nodes
+    topo_copy = topo.copy()
+
+    assert topo_copy.pending == topo.pending
+    assert topo_copy.nodes['d'].node_to_dst[topo_copy.nodes['5']] == [topo_copy.nodes['1'], topo_copy.nodes['2']]
+    assert topo_copy.pending == {'routing', 'path_to_dst'}
+    assert topo.pending == {'topo_graph', 'node_to_dst', 'routing', 'path_to_dst'}
+
+    # the pending stages are built from the updated nodes
+    topo.remove_node('1')
+    eager_topo.remove_node('1')
+    topo.build()
+
+    assert topo.topo_graph == eager_topo.topo_graph
+    assert list(topo.links) == list(eager_topo.links)
+    assert topo.conflict_graph == eager_topo.conflict_graph
+    assert {name: [[node.name for node in path] for path in paths] for name, paths in topo.path_to_dst.items()} == \
+           {name: [[node.name for node in path] for path in paths] for name, paths in eager_topo.path_to_dst.items()}
+    assert {dst.name: [node.name for node in hops] for dst, hops in topo.nodes['d'].node_to_dst.items()} == \
+           {dst.name: [node.name for node in hops] for dst, hops in eager_topo.nodes['d'].node_to_dst.items()}
+
+def test_topo_profiler():
+    '''
+    Test the profiler of the topo stages
+    '''
+
+    from topogen.utils.profiler import StageProfiler
+
+    graph = [[0, 1, 0, 0], [1, 0, 1, 0], [0, 1, 0, 0], [1, 1, 0, 1]]
+    records = []
+    profiler = StageProfiler(callback=records.append)
+    topo = generate_topology_from_graph(graph, 'DAG', 1.5, 10, profiler=profiler)
+
+    assert [record['stage'] for record in profiler.records] == ['nodes']
+    assert profiler.records[0]['counts'] == {'nodes': 6}
+
+    # the stages are recorded when they are built, node_to_dst builds topo_graph inside it
+    topo.nodes['d'].node_to_dst
+    topo.build()
+
+    assert [record['stage'] for record in records] == ['nodes', 'topo_graph', 'node_to_dst', 'links', 'conflict_nodes',
+                                                       'routing', 'path_to_dst']
+    assert all(record['seconds'] >= 0 and record['peak_bytes'] >= 0 for record in records)
+
+    summary = profiler.summary()
+
+    assert summary['links']['counts'] == {'links': len(topo.links)}
+    assert summary['path_to_dst']['counts'] == {'paths': sum(len(paths) for paths in topo.path_to_dst.values())}
+    assert summary['nodes']['calls'] == 1
+
+def test_topo_sparse_graph():
+    '''
+    Test the topo generated from a sparse graph
+    '''
+
+    import numpy as np
+    from topogen.utils.sparse import SparseGraph
+
+    graph = [[0, 1, 0, 0], [1, 0, 1, 0], [0, 1, 0, 0], [1, 1, 0, 1]]
+    cells = [(i, j) for i, row in enumerate(graph) for j, element in enumerate(row) if element]
+    topo = generate_topology_from_graph(graph, 'DAG', 1.5, 10, eager=True)
+
+    for sparse_graph in [cells, iter(cells), np.array(graph, dtype=bool), SparseGraph(cells)]:
+        sparse_topo = generate_topology_from_graph(sparse_graph, 'DAG', 1.5, 10)
+
+        assert isinstance(sparse_topo.graph, SparseGraph)
+        assert isinstance(sparse_topo.topo_graph, SparseGraph)
+        assert sparse_topo.topo_graph.to_dict() == topo.topo_graph
+        assert list(sparse_topo.links) == list(topo.links)
+        assert {dst.name: [node.name for node in hops] for dst, hops in sparse_topo.nodes['d'].node_to_dst.items()} == \
+               {dst.name: [node.name for node in hops] for dst, hops in topo.nodes['d'].node_to_dst.items()}
+
+    # the updates work on the sparse graph and do not change the copy or the given graph
+    sparse_graph = SparseGraph(cells)
+    sparse_topo = generate_topology_from_graph(sparse_graph, 'DAG', 1.5, 10, eager=True)
+    sparse_copy = sparse_topo.copy()
+
+    sparse_topo.remove_node('1')
+    topo.remove_node('1')
+    sparse_topo.add_node((2, 3))
+    topo.add_node((2, 3))
+
+    assert sparse_topo.topo_graph.to_dict() == topo.topo_graph
+    assert sparse_topo.graph.to_dict() == topo.graph
+    assert list(sparse_topo.links) == list(topo.links)
+    assert sparse_copy.graph == sparse_graph
+    assert sparse_copy.topo_graph[1][0] == '1'
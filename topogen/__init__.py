@@ -1,2 +1,4 @@
 from topogen.model.topo import generate_topology_from_graph
-from topogen.utils.function import info_exchange
\ No newline at end of file
+from topogen.utils.function import info_exchange
+from topogen.utils.info_scheduler import run_info_exchange
+from topogen.utils.sparse import SparseGraph
@@ -1,6 +1,8 @@
 from math import log2, log10
 from os import path
 
+import numpy as np
+
 from topogen.utils.function import get_yaml_data
 
 dir_path = path.dirname(path.realpath(__file__))
@@ -23,4 +25,28 @@ snr     = lambda dist: rx_power_watt(dist) - noise_watt # ratio
 
 shanon_capacity = lambda dist: bandwidth * log2(1 + sinr(dist)) # bps
 
-DATA_RATE_BPS_FORMULA = lambda dist: shanon_capacity(dist) # bps
\ No newline at end of file
+DATA_RATE_BPS_FORMULA = lambda dist: shanon_capacity(dist) # bps
+
+def vectorized_formula(formula):
+    '''
+    Mark a data rate formula as accepting a numpy array of distances and returning an array of data rates,
+    so the links can be evaluated in one pass
+
+    Args:
+        formula (function(distance)): The data rate formula
+
+    Returns:
+        formula (function(distance)): The same formula
+    '''
+
+    formula.vectorized = True
+    return formula
+
+# the array versions of the formulas above (distance is a numpy array)
+array_path_loss         = lambda dist, fc: 32.4 + (21 * np.log10(dist)) + (20 * np.log10(fc)) # db
+array_rx_power          = lambda dist: tx_power - array_path_loss(dist, carrier_frequency) + 40 - 7 # dbm
+array_rx_power_watt     = lambda dist: dbm_to_watt(array_rx_power(dist)) # watt
+array_sinr              = lambda dist: array_rx_power_watt(dist) / (noise_watt + interference) # ratio
+array_shanon_capacity   = lambda dist: bandwidth * np.log2(1 + array_sinr(dist)) # bps
+
+DATA_RATE_BPS_ARRAY_FORMULA = vectorized_formula(lambda dist: array_shanon_capacity(dist)) # bps
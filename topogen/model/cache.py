@@ -0,0 +1,229 @@
+import json
+import os
+from collections import OrderedDict
+from hashlib import sha256
+
+import numpy as np
+
+from ..config import config
+from ..utils.function import graph_matrix_to_dict
+from ..utils.sparse import SparseGraph
+from .topo import generate_topology_from_graph, get_topology_settings
+from .link import _formula_identity
+from .storage import save_topology, load_topology
+
+
+def topology_cache_key(graph, tree_type, max_dist_to_connect_nodes, size_of_grid_len, data_rate_formula=None, **kwargs):
+    '''
+    Get the content hash of the generation input: the graph, the parameters, the channel config and the formula
+
+    Args:
+        graph (list[list[int]], dict{int: list[int]}, SparseGraph): The graph of the topo
+        tree_type (str): The type of the tree (DAG or TREE)
+        max_dist_to_connect_nodes: (float): The maximum distance allowed to connect nodes
+        size_of_grid_len (int): The size per grid (meter)
+        data_rate_formula (function(distance)): The data rate formula (default is the Shannon Capacity formula)
+        kwargs: The other parameters of generate_topology_from_graph
+
+    Returns:
+        key (str): The sha256 hex digest, None if the identity of the formula cannot be proven stable
+                   (see _formula_identity), or if the formula is random (rate_cache is False
+                   or data_rate_formula.deterministic is False)
+    '''
+
+    if not kwargs.get('rate_cache', True) or not getattr(data_rate_formula, 'deterministic', True):
+        return None
+
+    formula_identity = _formula_identity(data_rate_formula)
+
+    if formula_identity is None:
+        return None
+
+    digest = sha256()
+
+    if isinstance(graph, SparseGraph):
+        # the occupied cells of a sparse graph, so the dense matrix is never built
+        digest.update(np.array(graph.shape, dtype=np.int64).tobytes())
+        digest.update(np.array([(i, j) for i, j, _ in graph.cells()], dtype=np.int64).tobytes())
+    else:
+        for row in graph.values() if isinstance(graph, dict) else graph:
+            row = np.asarray(row, dtype=np.int64)
+            digest.update(np.int64(len(row)).tobytes())
+            digest.update(row.tobytes())
+
+    parameters = {
+        'tree_type': tree_type,
+        'max_dist_to_connect_nodes': max_dist_to_connect_nodes,
+        'size_of_grid_len': size_of_grid_len,
+        'data_rate_formula': formula_identity,
+        'channel_config': config.channel_config,
+        'kwargs': kwargs,
+    }
+    digest.update(json.dumps(parameters, sort_keys=True, default=repr).encode('utf-8'))
+
+    return digest.hexdigest()
+
+
+class TopologyCache:
+    def __init__(self, max_entries=32, cache_dir=None, max_disk_bytes=1 << 30):
+        '''
+        Create a new instance of the TopologyCache class.
+        The topos are kept in an in-memory LRU tier and, if cache_dir is given, in an on-disk tier
+        (the save_topology format) evicted by the least recently used file when it grows over max_disk_bytes.
+        A hit always returns a copy, so changing the returned topo does not change the cache
+
+        Args:
+            max_entries (int): the maximum amount of topos in memory
+            cache_dir (str): the directory of the on-disk tier (default is no on-disk tier)
+            max_disk_bytes (int): the maximum size of the on-disk tier
+        '''
+
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.memory = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, key + '.topo')
+
+    def get(self, key, graph=None, settings=None):
+        '''
+        Get a copy of the cached topo
+
+        Args:
+            key (str): the key from topology_cache_key
+            graph (dict{int: list[int]}): the graph of the key, restored on a hit of the on-disk tier
+            settings (dict): the settings of the key (see get_topology_settings), restored on a hit of the on-disk tier
+                             (a file keeps only the arrays of the topo)
+
+        Returns:
+            Topo: the copy of the topo, None if it is not cached
+        '''
+
+        topo = self.memory.get(key)
+
+        if topo is not None:
+            self.memory.move_to_end(key)
+            self.hits += 1
+            return topo.copy()
+
+        if self.cache_dir is not None and os.path.exists(self._disk_path(key)):
+            os.utime(self._disk_path(key))
+            compact_topo = load_topology(self._disk_path(key), mmap=False)
+
+            if settings is None:
+                topo = compact_topo.to_topo()
+            else:
+                topo = compact_topo.to_topo(settings['build_node_to_dst'], settings['interference_radius'], graph)
+                topo.settings = dict(settings, next_node_id=len(topo.nodes))
+
+            self._put_memory(key, topo)
+            self.hits += 1
+            return topo.copy()
+
+        self.misses += 1
+        return None
+
+    def _put_memory(self, key, topo):
+        self.memory[key] = topo
+        self.memory.move_to_end(key)
+
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    def put(self, key, topo):
+        '''
+        Cache a copy of the topo, its pending stages are built first so every hit gets the whole topo
+
+        Args:
+            key (str): the key from topology_cache_key
+            topo (Topo): the topo
+        '''
+
+        topo.build()
+        self._put_memory(key, topo.copy())
+
+        if self.cache_dir is not None:
+            temp_path = self._disk_path(key) + f'.{os.getpid()}.tmp'
+            save_topology(topo, temp_path, include_paths=True)
+            os.replace(temp_path, self._disk_path(key))
+            self.evict()
+
+    def evict(self):
+        '''
+        Remove the least recently used files of the on-disk tier until it fits in max_disk_bytes
+        '''
+
+        files = []
+
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.topo'):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                files.append((stat.st_mtime, stat.st_size, name))
+
+        total = sum(size for _, size, _ in files)
+
+        for _, size, name in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+
+            os.remove(os.path.join(self.cache_dir, name))
+            total -= size
+
+    def clear(self):
+        '''
+        Remove all the cached topos
+        '''
+
+        self.memory.clear()
+
+        if self.cache_dir is not None:
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.topo'):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+    def get_or_generate(self, graph, tree_type, max_dist_to_connect_nodes, size_of_grid_len, data_rate_formula=None,
+                        **kwargs):
+        '''
+        Get a copy of the cached topo of the graph, or generate and cache it
+
+        Args:
+            graph (list[list[int]]): The graph of the topo
+            tree_type (str): The type of the tree (DAG or TREE)
+            max_dist_to_connect_nodes: (float): The maximum distance allowed to connect nodes
+            size_of_grid_len (int): The size per grid (meter)
+            data_rate_formula (function(distance)): The data rate formula (default is the Shannon Capacity formula)
+            kwargs: The other parameters of generate_topology_from_graph
+
+        Returns:
+            Topo: The topo
+        '''
+
+        # an iterator of cells is read once here, for both the key and the generation
+        graph = graph_matrix_to_dict(graph)
+
+        # the cached topos are always built, so eager does not change the key, and neither does the profiler
+        eager = kwargs.pop('eager', False)
+        profiler = kwargs.pop('profiler', None)
+        key = topology_cache_key(graph, tree_type, max_dist_to_connect_nodes, size_of_grid_len, data_rate_formula, **kwargs)
+
+        # a formula whose identity cannot be proven stable is never cached
+        if key is None:
+            return generate_topology_from_graph(graph, tree_type, max_dist_to_connect_nodes, size_of_grid_len,
+                                                data_rate_formula, eager=eager, profiler=profiler, **kwargs)
+
+        topo = self.get(key, graph, get_topology_settings(tree_type, max_dist_to_connect_nodes, size_of_grid_len,
+                                                           data_rate_formula, **kwargs))
+
+        if topo is None:
+            topo = generate_topology_from_graph(graph, tree_type, max_dist_to_connect_nodes, size_of_grid_len,
+                                                data_rate_formula, profiler=profiler, **kwargs)
+            self.put(key, topo)
+
+        return topo
@@ -0,0 +1,221 @@
+from ..utils.error_handler import err_raise
+from .compact import CompactTopo
+
+
+def _dinic(adjacency, heads, residual, source, sink):
+    '''
+    Find the max flow from the source to the sink by Dinic's algorithm.
+    The edge e and the edge e ^ 1 are the two directions of the same link
+
+    Args:
+        adjacency (list[list[int]]): the edge ids leaving each node
+        heads (list[int]): the node each edge goes to
+        residual (list[float]): the residual capacity of each edge, changed in place
+        source (int): the source node
+        sink (int): the sink node
+
+    Returns:
+        flow (float): the max flow
+    '''
+
+    total = 0
+    node_amount = len(adjacency)
+
+    while True:
+        # the level graph
+        level = [-1] * node_amount
+        level[source] = 0
+        queue = [source]
+
+        for node in queue:
+            for edge in adjacency[node]:
+                if residual[edge] > 0 and level[heads[edge]] < 0:
+                    level[heads[edge]] = level[node] + 1
+                    queue.append(heads[edge])
+
+        if level[sink] < 0:
+            return total
+
+        # the blocking flow, each node keeps the edge it has to try next
+        pointer = [0] * node_amount
+        path = []
+        node = source
+
+        while True:
+            if node == sink:
+                flow = min(residual[edge] for edge in path)
+
+                for edge in path:
+                    residual[edge] -= flow
+                    residual[edge ^ 1] += flow
+
+                total += flow
+                path = []
+                node = source
+                continue
+
+            edges = adjacency[node]
+
+            while pointer[node] < len(edges):
+                edge = edges[pointer[node]]
+
+                if residual[edge] > 0 and level[heads[edge]] == level[node] + 1:
+                    break
+
+                pointer[node] += 1
+
+            if pointer[node] < len(edges):
+                path.append(edges[pointer[node]])
+                node = heads[edges[pointer[node]]]
+            elif node == source:
+                break
+            else:
+                # a dead end, go back and try the next edge of the previous node
+                level[node] = -1
+                node = heads[path.pop() ^ 1]
+                pointer[node] += 1
+
+
+class CapacityAnalyzer:
+    def __init__(self, topo):
+        '''
+        Create a new instance of the CapacityAnalyzer class.
+        The residual graph is built once as arrays with the data rate of each link as its capacity.
+        The max flow to a node with a single parent is the smaller of the max flow to the parent
+        and the data rate of the link, so the flow algorithm only runs for the nodes with more parents
+        and every result is kept for the other destinations
+
+        Args:
+            topo (Topo, CompactTopo): the topo
+        '''
+
+        if isinstance(topo, CompactTopo):
+            self.node_names = [topo.get_name(node_id) for node_id in range(topo.node_amount())]
+            self.coordinates = [tuple(coordinate) for coordinate in topo.coordinates.tolist()]
+            links = zip(topo.link_src.tolist(), topo.child_indices.tolist(), topo.data_rate_bps.tolist())
+        else:
+            index = {node: i for i, node in enumerate(topo.nodes.values())}
+            self.node_names = list(topo.nodes)
+            self.coordinates = [node.coordinate for node in topo.nodes.values()]
+            links = ((index[link.src_node], index[link.dst_node], link.data_rate_bps) for link in topo.links.values())
+
+        self.index = {name: i for i, name in enumerate(self.node_names)}
+        self.adjacency = [[] for _ in self.node_names]
+        self.heads = []
+        self.capacity = []
+        self.parent_links = [[] for _ in self.node_names]     # the (parent, edge) of each node
+
+        for src, dst, data_rate in links:
+            edge = len(self.heads)
+            self.adjacency[src].append(edge)
+            self.adjacency[dst].append(edge + 1)
+            self.heads += [dst, src]
+            self.capacity += [data_rate, 0]
+            self.parent_links[dst].append((src, edge))
+
+        self.flows = {0: float('inf')}      # the max flow from the donor to each node id
+
+    def max_flow(self, dst):
+        '''
+        Get the max flow from the donor to the node
+
+        Args:
+            dst (str): the name of the destination node
+
+        Returns:
+            flow (float): the max flow (bps), inf for the donor
+        '''
+
+        # error handling
+        err_raise(ValueError, 'The node does not exist', dst not in self.index)
+
+        node_id = self.index[dst]
+        stack = [node_id]
+
+        # the parents of the single parent nodes are solved first
+        while stack:
+            node_id = stack[-1]
+
+            if node_id in self.flows:
+                stack.pop()
+                continue
+
+            parent_links = self.parent_links[node_id]
+
+            if len(parent_links) == 1:
+                parent, edge = parent_links[0]
+
+                if parent not in self.flows:
+                    stack.append(parent)
+                    continue
+
+                self.flows[node_id] = min(self.flows[parent], self.capacity[edge])
+            elif not parent_links:
+                self.flows[node_id] = 0
+            else:
+                self.flows[node_id] = _dinic(self.adjacency, self.heads, list(self.capacity), 0, node_id)
+
+            stack.pop()
+
+        return self.flows[self.index[dst]]
+
+    def max_flow_to_each_node(self):
+        '''
+        Get the max flow from the donor to each node on its own
+
+        Returns:
+            flows (dict{str: float}): the max flow to each node (bps)
+        '''
+
+        # the rows are visited from the top, so the parents are solved before their children
+        for node_id in sorted(range(len(self.node_names)), key=self.coordinates.__getitem__):
+            self.max_flow(self.node_names[node_id])
+
+        return {name: self.flows[node_id] for node_id, name in enumerate(self.node_names)}
+
+    def max_flow_to_all_nodes(self, demands=None):
+        '''
+        Get the max flow from the donor to all the nodes at the same time,
+        every node is connected to a super sink with its demand as the capacity
+
+        Args:
+            demands (dict{str: float}): the demand of each node (bps), the nodes not in it have no demand
+                                        (default is an unlimited demand for every node except the donor)
+
+        Returns:
+            result (dict): the result
+                total: the total flow (bps)
+                delivered: the flow that reaches each node with a demand ex. {'1': 100.0}
+                link_flow: the flow of each link ex. {('d', '1'): 100.0}
+        '''
+
+        if demands is None:
+            demands = {name: float('inf') for name in self.node_names[1:]}
+
+        # error handling
+        err_raise(ValueError, 'The node does not exist', any(name not in self.index for name in demands))
+        err_raise(ValueError, 'The demand cannot be negative', any(demand < 0 for demand in demands.values()))
+        err_raise(ValueError, 'The demand of the donor must be finite', demands.get(self.node_names[0], 0) == float('inf'))
+
+        sink = len(self.node_names)
+        link_amount = len(self.heads)
+        adjacency = [list(edges) for edges in self.adjacency] + [[]]
+        heads = self.heads + [sink, 0] * len(demands)
+        residual = self.capacity + [0, 0] * len(demands)
+
+        for k, (name, demand) in enumerate(demands.items()):
+            edge = link_amount + 2 * k
+            adjacency[self.index[name]].append(edge)
+            adjacency[sink].append(edge + 1)
+            heads[edge + 1] = self.index[name]
+            residual[edge] = demand
+
+        total = _dinic(adjacency, heads, residual, 0, sink)
+
+        link_flow = {}
+        for edge in range(0, link_amount, 2):
+            link_flow[(self.node_names[heads[edge + 1]], self.node_names[heads[edge]])] = residual[edge + 1]
+
+        delivered = {name: residual[link_amount + 2 * k + 1] for k, name in enumerate(demands)}
+
+        return {'total': total, 'delivered': delivered, 'link_flow': link_flow}
@@ -0,0 +1,699 @@
+from collections.abc import Mapping
+
+import numpy as np
+
+from ..utils.error_handler import err_raise
+from ..utils.profiler import profile_stage
+from ..utils.function import graph_matrix_to_dict, replace_graph_elements, find_paths_from_donor_to_all_nodes, \
+                             find_pairs_within_radius
+from .node import Node, get_node_name, discover_nodes_from_graph, select_tree_parents, setup_conflict_nodes, \
+                  find_node_to_dst_by_graph
+from .link import Link, get_offset_data_rates
+from .topo import Topo
+from .routing import RoutingTable
+from ..config.config import DATA_RATE_BPS_ARRAY_FORMULA
+
+
+NODE_QUEUES = ['forward_packets', 'received_packets', 'received_info', 'send_info', 'forward_info']
+
+
+class CompactTopo:
+    def __init__(self, coordinates, parent_indptr, parent_indices, child_indptr, child_indices, data_rate_bps,
+                 row_widths, node_names=None, link_src=None, parent_link_ids=None, link_state=None, extra_data_rate=None,
+                 path_table=None):
+        '''
+        Create a new instance of the CompactTopo class.
+        The nodes are integer ids (the donor is 0), the parents and children are stored as CSR index arrays
+        and the link id is the position of the destination in the children array
+
+        Args:
+            coordinates (numpy.ndarray): the coordinate of each node (N x 2)
+            parent_indptr (numpy.ndarray): the parents of node i are parent_indices[parent_indptr[i]:parent_indptr[i + 1]]
+            parent_indices (numpy.ndarray): the parent ids
+            child_indptr (numpy.ndarray): the children of node i are child_indices[child_indptr[i]:child_indptr[i + 1]]
+            child_indices (numpy.ndarray): the children ids
+            data_rate_bps (numpy.ndarray): the data rate of each link
+            row_widths (numpy.ndarray): the length of each row of the graph
+            node_names (list[str]): the name of each node (default is 'd' for the donor and the id for the others)
+            link_src (numpy.ndarray): the source id of each link (computed from the children if not given)
+            parent_link_ids (numpy.ndarray): the link id of each parent entry (computed if not given)
+            link_state (numpy.ndarray): the state of each link (default is off)
+            extra_data_rate (numpy.ndarray): the extra data rate of each link (default is 0)
+            path_table (tuple(numpy.ndarray)): the stored paths from the donor as (dst_indptr, path_indptr, path_nodes),
+                                               the paths of node i are path_nodes[path_indptr[k]:path_indptr[k + 1]]
+                                               for k in range(dst_indptr[i], dst_indptr[i + 1])
+        '''
+
+        # error handling
+        err_raise(ValueError, 'The parents and the children must describe the same links', len(parent_indices) != len(child_indices))
+        err_raise(ValueError, 'Each link must have a data rate', len(data_rate_bps) != len(child_indices))
+
+        self.coordinates = np.asarray(coordinates, dtype=np.int64).reshape(-1, 2)
+        self.parent_indptr = np.asarray(parent_indptr, dtype=np.int64)
+        self.parent_indices = np.asarray(parent_indices, dtype=np.int64)
+        self.child_indptr = np.asarray(child_indptr, dtype=np.int64)
+        self.child_indices = np.asarray(child_indices, dtype=np.int64)
+        self.row_widths = np.asarray(row_widths, dtype=np.int64)
+        self.node_names = node_names
+
+        if link_src is None:
+            link_src = np.repeat(np.arange(len(self.child_indptr) - 1), np.diff(self.child_indptr))
+
+        self.link_src = np.asarray(link_src, dtype=np.int64)
+        self.parent_link_ids = self._find_parent_link_ids() if parent_link_ids is None else np.asarray(parent_link_ids, dtype=np.int64)
+
+        if link_state is None:
+            link_state = np.zeros(len(self.child_indices), dtype=bool)
+
+        if extra_data_rate is None:
+            extra_data_rate = np.zeros(len(self.child_indices), dtype=float)
+
+        # the rates of a formula can be a read-only broadcast view, they are copied so the links can be updated
+        # (the memory mapped arrays are copy-on-write, they stay mapped)
+        data_rate_bps = np.asarray(data_rate_bps, dtype=float)
+        self.data_rate_bps = data_rate_bps if data_rate_bps.flags.writeable else data_rate_bps.copy()
+        self.link_state = np.asarray(link_state, dtype=bool)                    # True is On, False is Off
+        self.extra_data_rate = np.asarray(extra_data_rate, dtype=float)         # the data rate that havent been used yet
+        self.path_table = path_table
+
+        self.node_queues = {}       # the queues of the nodes that have been used ex. {1: {'send_info': []}}
+        self.conflict_graphs = {}   # the conflict graph of each interference radius ex. {None: (indptr, indices)}
+        self.profiler = None        # the StageProfiler of the generation
+        self._name_to_id = None
+
+    def _find_parent_link_ids(self):
+        '''
+        Find the link id of each entry of the parents array
+
+        Returns:
+            parent_link_ids (numpy.ndarray): the link ids
+        '''
+
+        # both the links and the parent entries sorted by (dst, src) line up one to one
+        parent_dst = np.repeat(np.arange(len(self.parent_indptr) - 1), np.diff(self.parent_indptr))
+        link_order = np.lexsort((self.link_src, self.child_indices))
+        parent_order = np.lexsort((self.parent_indices, parent_dst))
+
+        parent_link_ids = np.empty(len(self.parent_indices), dtype=np.int64)
+        parent_link_ids[parent_order] = link_order
+
+        return parent_link_ids
+
+    @property
+    def nodes(self):
+        '''
+        The nodes as a read-only dict{str: NodeView}
+        '''
+
+        return NodeMapping(self)
+
+    @property
+    def links(self):
+        '''
+        The links as a read-only dict{tuple: LinkView}
+        '''
+
+        return LinkMapping(self)
+
+    @property
+    def topo_graph(self):
+        '''
+        The graph with the node names ('0' for the cells without a node)
+        '''
+
+        topo_graph = {i: ['0'] * int(width) for i, width in enumerate(self.row_widths.tolist())}
+
+        for node_id, (row, col) in enumerate(self.coordinates.tolist()):
+            topo_graph[row][col] = self.get_name(node_id)
+
+        return topo_graph
+
+    @property
+    def path_to_dst(self):
+        '''
+        The paths from the donor node to all the nodes, read from the path table if there is one,
+        otherwise enumerated on each access
+        '''
+
+        if self.path_table is None:
+            return find_paths_from_donor_to_all_nodes(self.nodes)
+
+        return {self.get_name(node_id): self.get_paths(node_id) for node_id in range(self.node_amount())}
+
+    def get_paths(self, node_id, node_list=None):
+        '''
+        Get the stored paths from the donor node to the node
+
+        Args:
+            node_id (int): the node id
+            node_list (list): the objects of the nodes by id (default is the NodeView of the nodes)
+
+        Returns:
+            paths (list[list[NodeView]]): the paths
+        '''
+
+        dst_indptr, path_indptr, path_nodes = self.path_table
+        get_node = node_list.__getitem__ if node_list is not None else lambda i: NodeView(self, i)
+        paths = []
+
+        for k in range(dst_indptr[node_id], dst_indptr[node_id + 1]):
+            paths.append([get_node(i) for i in path_nodes[path_indptr[k]:path_indptr[k + 1]].tolist()])
+
+        return paths
+
+    def node_amount(self):
+        return len(self.coordinates)
+
+    def link_amount(self):
+        return len(self.child_indices)
+
+    def get_name(self, node_id):
+        '''
+        Get the name of the node
+
+        Args:
+            node_id (int): the node id
+
+        Returns:
+            name (str): the node name
+        '''
+
+        if self.node_names is None:
+            return get_node_name(node_id)
+
+        return self.node_names[node_id]
+
+    def get_id(self, name):
+        '''
+        Get the id of the node
+
+        Args:
+            name (str): the node name
+
+        Returns:
+            node_id (int): the node id, None if there is no such node
+        '''
+
+        if self.node_names is None:
+            if name == 'd':
+                return 0
+
+            node_id = int(name) if isinstance(name, str) and name.isdigit() and name[0] != '0' else None
+            return node_id if node_id is not None and node_id < self.node_amount() else None
+
+        if self._name_to_id is None:
+            self._name_to_id = {node_name: node_id for node_id, node_name in enumerate(self.node_names)}
+
+        return self._name_to_id.get(name)
+
+    def get_children(self, node_id):
+        return self.child_indices[self.child_indptr[node_id]:self.child_indptr[node_id + 1]]
+
+    def get_parents(self, node_id):
+        return self.parent_indices[self.parent_indptr[node_id]:self.parent_indptr[node_id + 1]]
+
+    def get_link_id(self, src_id, dst_id):
+        '''
+        Get the id of the link from src to dst
+
+        Args:
+            src_id (int): the source node id
+            dst_id (int): the destination node id
+
+        Returns:
+            link_id (int): the link id, None if the nodes are not connected
+        '''
+
+        start = self.child_indptr[src_id]
+        position = np.flatnonzero(self.get_children(src_id) == dst_id)
+
+        return int(start + position[0]) if len(position) else None
+
+    def get_conflict_graph(self, interference_radius=None):
+        '''
+        Get the conflict graph as CSR arrays: the parents, the children and the other parents of the children
+        of each node, and the nodes within the interference radius if it is given
+
+        Args:
+            interference_radius (float): The nodes within this distance (grid) conflict as well (default is no interference)
+
+        Returns:
+            indptr (numpy.ndarray): the conflict nodes of node i are indices[indptr[i]:indptr[i + 1]]
+            indices (numpy.ndarray): the sorted conflict node ids
+        '''
+
+        if interference_radius not in self.conflict_graphs:
+            node_amount = self.node_amount()
+
+            # every pair of parents of the same node
+            parent_entries, co_parents = _gather(self.parent_indptr, self.parent_indices,
+                                                 np.repeat(np.arange(node_amount), np.diff(self.parent_indptr)))
+
+            src = [self.link_src, self.child_indices, self.parent_indices[parent_entries]]
+            dst = [self.child_indices, self.link_src, co_parents]
+
+            if interference_radius is not None:
+                pairs = np.array(find_pairs_within_radius(self.coordinates.tolist(), interference_radius),
+                                 dtype=np.int64).reshape(-1, 2)
+                src += [pairs[:, 0], pairs[:, 1]]
+                dst += [pairs[:, 1], pairs[:, 0]]
+
+            src = np.concatenate(src)
+            dst = np.concatenate(dst)
+            keys = np.unique(src[src != dst] * node_amount + dst[src != dst])
+
+            indptr = np.zeros(node_amount + 1, dtype=np.int64)
+            indptr[1:] = np.cumsum(np.bincount(keys // node_amount, minlength=node_amount))
+            self.conflict_graphs[interference_radius] = (indptr, keys % node_amount)
+
+        return self.conflict_graphs[interference_radius]
+
+    def get_conflicts(self, node_id, interference_radius=None):
+        indptr, indices = self.get_conflict_graph(interference_radius)
+        return indices[indptr[node_id]:indptr[node_id + 1]]
+
+    def get_node_queues(self, node_id):
+        '''
+        Get the queues of the node, they are only created when a node is used
+
+        Args:
+            node_id (int): the node id
+
+        Returns:
+            queues (dict{str: list}): the queues
+        '''
+
+        queues = self.node_queues.get(node_id)
+
+        if queues is None:
+            queues = {'forward_packets': [], 'received_packets': [], 'received_info': {}, 'send_info': [],
+                      'forward_info': [], 'node_to_dst': None}
+            self.node_queues[node_id] = queues
+
+        return queues
+
+    @classmethod
+    def from_topo(cls, topo):
+        '''
+        Create the compact topo from the topo
+
+        Args:
+            topo (Topo): the topo
+
+        Returns:
+            CompactTopo: the compact topo
+        '''
+
+        node_list = list(topo.nodes.values())
+        node_ids = {node: node_id for node_id, node in enumerate(node_list)}
+        node_names = [node.name for node in node_list]
+
+        if all(name == get_node_name(node_id) for node_id, name in enumerate(node_names)):
+            node_names = None
+
+        parent_indptr, parent_indices = _to_csr([[node_ids[parent] for parent in node.parents] for node in node_list])
+        child_indptr, child_indices = _to_csr([[node_ids[child] for child in node.children] for node in node_list])
+
+        links = topo.links
+        data_rate_bps = [links[(node.name, child.name)].data_rate_bps for node in node_list for child in node.children]
+        row_widths = [len(row) for row in topo.topo_graph.values()]
+
+        compact_topo = cls([node.coordinate for node in node_list], parent_indptr, parent_indices, child_indptr,
+                           child_indices, data_rate_bps, row_widths, node_names)
+
+        for link_id, (node, child) in enumerate((node, child) for node in node_list for child in node.children):
+            compact_topo.link_state[link_id] = links[(node.name, child.name)].state
+            compact_topo.extra_data_rate[link_id] = links[(node.name, child.name)].extra_data_rate
+
+        return compact_topo
+
+    def to_topo(self, build_node_to_dst=True, interference_radius=None, graph=None):
+        '''
+        Create the topo with the Node and Link objects from the compact topo
+
+        Args:
+            build_node_to_dst (bool): fill Node.node_to_dst for all the nodes, otherwise use topo.routing on demand
+            interference_radius (float): the nodes within this distance (grid) conflict as well (default is no interference)
+            graph (dict{int: list[int]}, SparseGraph): the graph of the topo, its topo_graph is built from it
+                                                       (so a SparseGraph stays sparse), default is the dense topo_graph
+
+        Returns:
+            Topo: the topo
+        '''
+
+        topo = Topo()
+        node_list = []
+
+        for node_id, coordinate in enumerate(self.coordinates.tolist()):
+            node = Node(self.get_name(node_id), 'donor' if node_id == 0 else 'node')
+            node.coordinate = tuple(coordinate)
+            node_list.append(node)
+            topo.nodes[node.name] = node
+            topo.coordinate_to_node[node.coordinate] = node
+
+        for node_id, node in enumerate(node_list):
+            node.parents = [node_list[i] for i in self.get_parents(node_id).tolist()]
+            node.children = [node_list[i] for i in self.get_children(node_id).tolist()]
+
+        for link_id, (src_id, dst_id) in enumerate(zip(self.link_src.tolist(), self.child_indices.tolist())):
+            link = Link((node_list[src_id].name, node_list[dst_id].name), node_list[src_id], node_list[dst_id],
+                        float(self.data_rate_bps[link_id]))
+            link.state = bool(self.link_state[link_id])
+            link.extra_data_rate = float(self.extra_data_rate[link_id])
+            topo.links[link.name] = link
+            node_list[src_id].links.append(link)
+
+        if graph is None:
+            topo.topo_graph = self.topo_graph
+        else:
+            topo.graph = graph
+            topo.topo_graph = replace_graph_elements(graph, topo.nodes, topo.coordinate_to_node)
+
+        setup_conflict_nodes(topo.nodes, interference_radius)
+        topo.routing = RoutingTable(topo.nodes)
+
+        if build_node_to_dst:
+            find_node_to_dst_by_graph(topo.nodes, topo.topo_graph)
+
+        if self.path_table is None:
+            topo.path_to_dst = find_paths_from_donor_to_all_nodes(topo.nodes)
+        else:
+            topo.path_to_dst = {node.name: self.get_paths(node_id, node_list) for node_id, node in enumerate(node_list)}
+
+        return topo
+
+
+class NodeView:
+    __slots__ = ('topo', 'id')
+
+    def __init__(self, topo, node_id):
+        '''
+        Create a view of a node of the compact topo, it has the same attributes as the Node
+
+        Args:
+            topo (CompactTopo): the compact topo
+            node_id (int): the node id
+        '''
+
+        self.topo = topo
+        self.id = node_id
+
+    def __eq__(self, other):
+        return isinstance(other, NodeView) and other.topo is self.topo and other.id == self.id
+
+    def __hash__(self):
+        return hash((id(self.topo), self.id))
+
+    def __repr__(self):
+        return f'NodeView({self.name!r})'
+
+    @property
+    def name(self):
+        return self.topo.get_name(self.id)
+
+    @property
+    def type(self):
+        return 'donor' if self.id == 0 else 'node'
+
+    @property
+    def coordinate(self):
+        return tuple(self.topo.coordinates[self.id].tolist())
+
+    @property
+    def parents(self):
+        return [NodeView(self.topo, i) for i in self.topo.get_parents(self.id).tolist()]
+
+    @property
+    def children(self):
+        return [NodeView(self.topo, i) for i in self.topo.get_children(self.id).tolist()]
+
+    @property
+    def links(self):
+        return [LinkView(self.topo, i) for i in range(self.topo.child_indptr[self.id], self.topo.child_indptr[self.id + 1])]
+
+    @property
+    def conflict_nodes(self):
+        return {NodeView(self.topo, i) for i in self.topo.get_conflicts(self.id).tolist()}
+
+    @property
+    def node_to_dst(self):
+        queues = self.topo.get_node_queues(self.id)
+
+        if queues['node_to_dst'] is None:
+            node_to_dst = {}
+
+            for child in self.children:
+                node_to_dst[child] = [child]
+                queue = [child]
+                visited = {child}
+
+                for node in queue:
+                    for descendant in node.children:
+                        if descendant not in visited:
+                            visited.add(descendant)
+                            queue.append(descendant)
+                            node_to_dst.setdefault(descendant, []).append(child)
+
+            queues['node_to_dst'] = node_to_dst
+
+        return queues['node_to_dst']
+
+    @node_to_dst.setter
+    def node_to_dst(self, value):
+        self.topo.get_node_queues(self.id)['node_to_dst'] = value
+
+
+def _queue_property(queue_name):
+    '''
+    Create the property of a node queue stored in the compact topo
+
+    Args:
+        queue_name (str): the name of the queue
+
+    Returns:
+        property: the property
+    '''
+
+    def getter(self):
+        return self.topo.get_node_queues(self.id)[queue_name]
+
+    def setter(self, value):
+        self.topo.get_node_queues(self.id)[queue_name] = value
+
+    return property(getter, setter)
+
+for queue_name in NODE_QUEUES:
+    setattr(NodeView, queue_name, _queue_property(queue_name))
+
+
+class LinkView:
+    __slots__ = ('topo', 'id')
+
+    def __init__(self, topo, link_id):
+        '''
+        Create a view of a link of the compact topo, it has the same attributes as the Link
+
+        Args:
+            topo (CompactTopo): the compact topo
+            link_id (int): the link id
+        '''
+
+        self.topo = topo
+        self.id = link_id
+
+    def __eq__(self, other):
+        return isinstance(other, LinkView) and other.topo is self.topo and other.id == self.id
+
+    def __hash__(self):
+        return hash((id(self.topo), self.id))
+
+    def __repr__(self):
+        return f'LinkView({self.name!r})'
+
+    @property
+    def name(self):
+        return (self.src_node.name, self.dst_node.name)
+
+    @property
+    def src_node(self):
+        return NodeView(self.topo, int(self.topo.link_src[self.id]))
+
+    @property
+    def dst_node(self):
+        return NodeView(self.topo, int(self.topo.child_indices[self.id]))
+
+    @property
+    def data_rate_bps(self):
+        return float(self.topo.data_rate_bps[self.id])
+
+    @data_rate_bps.setter
+    def data_rate_bps(self, value):
+        self.topo.data_rate_bps[self.id] = value
+
+    @property
+    def state(self):
+        return bool(self.topo.link_state[self.id])
+
+    @state.setter
+    def state(self, value):
+        self.topo.link_state[self.id] = value
+
+    @property
+    def extra_data_rate(self):
+        return float(self.topo.extra_data_rate[self.id])
+
+    @extra_data_rate.setter
+    def extra_data_rate(self, value):
+        self.topo.extra_data_rate[self.id] = value
+
+
+class NodeMapping(Mapping):
+    def __init__(self, topo):
+        '''
+        Create a read-only mapping from the node names to the node views
+
+        Args:
+            topo (CompactTopo): the compact topo
+        '''
+
+        self.topo = topo
+
+    def __getitem__(self, name):
+        node_id = self.topo.get_id(name)
+
+        if node_id is None:
+            raise KeyError(name)
+
+        return NodeView(self.topo, node_id)
+
+    def __iter__(self):
+        return (self.topo.get_name(node_id) for node_id in range(self.topo.node_amount()))
+
+    def __len__(self):
+        return self.topo.node_amount()
+
+
+class LinkMapping(Mapping):
+    def __init__(self, topo):
+        '''
+        Create a read-only mapping from the link names to the link views
+
+        Args:
+            topo (CompactTopo): the compact topo
+        '''
+
+        self.topo = topo
+
+    def __getitem__(self, name):
+        src_id, dst_id = self.topo.get_id(name[0]), self.topo.get_id(name[1])
+        link_id = None if src_id is None or dst_id is None else self.topo.get_link_id(src_id, dst_id)
+
+        if link_id is None:
+            raise KeyError(name)
+
+        return LinkView(self.topo, link_id)
+
+    def __iter__(self):
+        names = [self.topo.get_name(node_id) for node_id in range(self.topo.node_amount())]
+        return ((names[src], names[dst]) for src, dst in zip(self.topo.link_src.tolist(), self.topo.child_indices.tolist()))
+
+    def __len__(self):
+        return self.topo.link_amount()
+
+
+def _to_csr(adjacency):
+    '''
+    Convert the adjacency lists to the CSR arrays
+
+    Args:
+        adjacency (list[list[int]]): the adjacency lists
+
+    Returns:
+        indptr (numpy.ndarray): the start of each list in the indices
+        indices (numpy.ndarray): the concatenated lists
+    '''
+
+    indptr = np.zeros(len(adjacency) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(neighbours) for neighbours in adjacency])
+    indices = np.fromiter((i for neighbours in adjacency for i in neighbours), dtype=np.int64, count=int(indptr[-1]))
+
+    return indptr, indices
+
+def _gather(indptr, indices, keys):
+    '''
+    Gather the CSR rows of the keys into flat arrays
+
+    Args:
+        indptr (numpy.ndarray): the start of each row in the indices
+        indices (numpy.ndarray): the concatenated rows
+        keys (numpy.ndarray): the rows to gather
+
+    Returns:
+        owners (numpy.ndarray): the position in the keys of each gathered element
+        values (numpy.ndarray): the gathered elements
+    '''
+
+    keys = np.asarray(keys, dtype=np.int64)
+    counts = indptr[keys + 1] - indptr[keys]
+    owners = np.repeat(np.arange(len(keys)), counts)
+    offsets = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+
+    return owners, indices[np.repeat(indptr[keys], counts) + offsets]
+
+def generate_compact_topology_from_graph(graph, tree_type, max_dist_to_connect_nodes, size_of_grid_len,
+                                         data_rate_formula=None, parent_policy='hop', profiler=None, rate_cache=True):
+    '''
+    Generate the compact topo from the graph without creating the Node and Link objects
+
+    Args:
+        graph (list[list[int]]): The graph of the topo, or a sparse graph (see generate_topology_from_graph)
+        tree_type (str): The type of the tree (DAG or TREE)
+        max_dist_to_connect_nodes: (float): The maximum distance allowed to connect nodes
+        size_of_grid_len (int): The size per grid (meter)
+        data_rate_formula (function(distance)): The data rate formula (default is the Shannon Capacity formula)
+        parent_policy (str): The policy to select the parent in a TREE (hop, nearest or rate)
+        profiler (StageProfiler): Record the nodes, links and arrays stages (kept as topo.profiler)
+        rate_cache (bool): Read the data rate of each link offset from the rate table (see get_offset_data_rates)
+
+    Returns:
+        CompactTopo: The compact topo
+
+    Example:
+        topo = generate_compact_topology_from_graph([[0, 1, 0, 0], [0, 0, 1, 0], [0, 0, 1, 0], [1, 0, 0, 0]], 'DAG', 1.5, 10)
+    '''
+
+    graph = graph_matrix_to_dict(graph)
+
+    # error handling
+    err_raise(ValueError, 'The graph is empty', not graph or any(len(row) == 0 for row in graph.values()))
+    err_raise(ValueError, 'The tree type should be DAG or TREE', tree_type not in ['DAG', 'TREE'])
+    err_raise(ValueError, 'Only Donor can be the root node', graph[0].count(1) != 1)
+
+    with profile_stage(profiler, 'nodes') as record:
+        coordinates, parents, children = discover_nodes_from_graph(graph, max_dist_to_connect_nodes)
+
+        if tree_type == 'TREE':
+            select_tree_parents(coordinates, parents, children, parent_policy, size_of_grid_len, data_rate_formula,
+                                rate_cache)
+
+        record['counts'] = {'nodes': len(coordinates)}
+
+    with profile_stage(profiler, 'arrays') as record:
+        parent_indptr, parent_indices = _to_csr(parents)
+        child_indptr, child_indices = _to_csr(children)
+        coordinates = np.array(coordinates, dtype=np.int64).reshape(-1, 2)
+        row_widths = [len(graph[i]) for i in range(len(graph))]
+        record['counts'] = {'nodes': len(coordinates), 'links': len(child_indices)}
+
+    with profile_stage(profiler, 'links') as record:
+        link_src = np.repeat(np.arange(len(coordinates)), np.diff(child_indptr))
+        diff = coordinates[link_src] - coordinates[child_indices]
+        data_rate_bps = get_offset_data_rates(diff[:, 0] ** 2 + diff[:, 1] ** 2, size_of_grid_len,
+                                              data_rate_formula or DATA_RATE_BPS_ARRAY_FORMULA, rate_cache)
+        record['counts'] = {'links': len(data_rate_bps)}
+
+    topo = CompactTopo(coordinates, parent_indptr, parent_indices, child_indptr, child_indices, data_rate_bps, row_widths,
+                       link_src=link_src)
+    topo.profiler = profiler
+
+    return topo
@@ -0,0 +1,100 @@
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from os import cpu_count
+
+from ..utils.error_handler import err_raise
+from ..utils.profiler import StageProfiler
+from .compact import generate_compact_topology_from_graph
+
+
+def _generate_compact_topology(args):
+    '''
+    Generate the compact topo in a worker process
+
+    Args:
+        args (tuple): the arguments of generate_compact_topology_from_graph and the profile option
+
+    Returns:
+        CompactTopo: the compact topo
+    '''
+
+    *args, profile = args
+    profiler = StageProfiler() if profile else None
+
+    return generate_compact_topology_from_graph(*args, profiler=profiler)
+
+def generate_topologies(graphs, tree_type, max_dist_to_connect_nodes, size_of_grid_len, data_rate_formula=None,
+                        processes=None, ordered=True, max_in_flight=None, parent_policy='hop',
+                        profile=False, on_stage=None):
+    '''
+    Generate the topos of many graphs across a process pool.
+    The topos are streamed back as CompactTopo (picklable arrays) and at most max_in_flight graphs
+    are submitted at a time, so the graphs iterable is consumed lazily and the memory stays bounded
+
+    Args:
+        graphs (iterable[list[list[int]]]): The graphs of the topos
+        tree_type (str): The type of the tree (DAG or TREE)
+        max_dist_to_connect_nodes: (float): The maximum distance allowed to connect nodes
+        size_of_grid_len (int): The size per grid (meter)
+        data_rate_formula (function(distance)): The data rate formula (default is the Shannon Capacity formula),
+                                                it must be picklable (a module level function, not a lambda)
+        processes (int): The amount of worker processes (default is the cpu count)
+        ordered (bool): Yield the topos in the order of the graphs, otherwise as soon as they finish
+        max_in_flight (int): The maximum amount of graphs submitted and not yielded yet (default is 2 * processes)
+        parent_policy (str): The policy to select the parent in a TREE (hop, nearest or rate)
+        profile (bool): Record the stages of each topo in its worker (see topo.profiler.records)
+        on_stage (function(index, record)): Called with the index of the graph and each stage record
+                                            when the topo is yielded (profile is set by it)
+
+    Yields:
+        index (int): The index of the graph
+        topo (CompactTopo): The compact topo of the graph
+
+    Example:
+        for index, topo in generate_topologies(graphs, 'DAG', 1.5, 10):
+            print(index, topo.node_amount())
+    '''
+
+    processes = processes or cpu_count() or 1
+    profile = profile or on_stage is not None
+    max_in_flight = max_in_flight or 2 * processes
+
+    # error handling
+    err_raise(ValueError, 'The amount of processes must be positive', processes < 1)
+    err_raise(ValueError, 'The maximum amount of graphs in flight must be positive', max_in_flight < 1)
+
+    graphs = enumerate(graphs)
+    in_flight = {}          # the submitted futures and the index of their graph, in the submitted order
+    executor = ProcessPoolExecutor(processes)
+
+    def submit():
+        for index, graph in graphs:
+            future = executor.submit(_generate_compact_topology, (graph, tree_type, max_dist_to_connect_nodes,
+                                                                 size_of_grid_len, data_rate_formula, parent_policy,
+                                                                 profile))
+            in_flight[future] = index
+
+            if len(in_flight) >= max_in_flight:
+                break
+
+    try:
+        submit()
+
+        while in_flight:
+            if ordered:
+                done = [next(iter(in_flight))]
+            else:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+
+            for future in sorted(done, key=in_flight.get):
+                index = in_flight.pop(future)
+                topo = future.result()
+
+                if on_stage is not None:
+                    for record in topo.profiler.records:
+                        on_stage(index, record)
+
+                yield index, topo
+
+            submit()
+    finally:
+        executor.shutdown(cancel_futures=True)
@@ -1,9 +1,30 @@
+import json
+from hashlib import sha256
+from types import BuiltinFunctionType, CodeType, FunctionType, ModuleType
+
+import numpy as np
+
 from ..utils.error_handler import err_raise
-from ..utils.function import dist_between_coord
-from ..config.config import DATA_RATE_BPS_FORMULA
+from ..config import config
+from ..config.config import DATA_RATE_BPS_FORMULA, DATA_RATE_BPS_ARRAY_FORMULA
+
+
+# the data rate of each squared offset length for each (size of grid len, channel config, formula identity),
+# the least recently used table is removed when there are more than MAX_RATE_TABLES tables
+# ex. {(10, '{...}', 'default'): {1: 1000.0, 2: 800.0}}
+rate_tables = {}
+
+
+MAX_RATE_TABLES = 64
+
+
+# the values known by their content, any other object may change without its repr changing
+PLAIN_VALUE_TYPES = (type(None), bool, int, float, complex, str, bytes)
 
 
 class Link:
+    __slots__ = ('name', 'data_rate_bps', 'src_node', 'dst_node', 'state', 'extra_data_rate')
+
     def __init__(self, name, src_node, dst_node, data_rate=0):
         '''
         Create a new instance of the Link class
@@ -28,7 +49,224 @@ class Link:
         self.state = False          # True is On, False is Off
         self.extra_data_rate = 0    # the data rate that havent been used yet
 
-def generate_links(nodes, size_of_grid_lens, data_rate_equation=None):
+def evaluate_data_rate_formula(data_rate_equation, distances):
+    '''
+    Evaluate the data rate formula on an array of distances.
+    The formula marked by vectorized_formula is called once with the whole array,
+    the others are called once per distance
+
+    Args:
+        data_rate_equation (function(distance)): the data rate equation
+        distances (numpy.ndarray): the distances (meter)
+
+    Returns:
+        data_rates (numpy.ndarray): the data rates
+    '''
+
+    if getattr(data_rate_equation, 'vectorized', False):
+        return np.broadcast_to(np.asarray(data_rate_equation(distances), dtype=float), distances.shape)
+
+    return np.fromiter(map(data_rate_equation, distances.tolist()), dtype=float, count=len(distances))
+
+def _get_code_names(code):
+    '''
+    Get the global and attribute names the code reads, the names of the nested code (ex. a lambda inside) included
+    '''
+
+    names = list(code.co_names)
+
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            names += [name for name in _get_code_names(const) if name not in names]
+
+    return names
+
+def _value_identity(value, seen):
+    '''
+    Get the identity of a value the formula reads from its content
+
+    Args:
+        value (any): the value
+        seen (set[function]): the functions already in the identity (a recursive formula refers to itself)
+
+    Returns:
+        identity (str): the identity, None if it cannot be proven stable (ex. an object with a mutable state)
+    '''
+
+    if isinstance(value, FunctionType):
+        return _function_identity(value, seen)
+
+    if isinstance(value, CodeType):
+        consts = [_value_identity(const, seen) for const in value.co_consts]
+        return None if None in consts else f'{value.co_code.hex()}({",".join(consts)})'
+
+    if isinstance(value, ModuleType):
+        return f'module {value.__name__}'
+
+    if isinstance(value, np.ndarray):
+        return f'array {value.dtype} {value.shape} {sha256(np.ascontiguousarray(value).tobytes()).hexdigest()}'
+
+    if isinstance(value, (tuple, list, set, frozenset)):
+        items = [_value_identity(item, seen) for item in value]
+
+        if None in items:
+            return None
+
+        return f'{type(value).__name__}({",".join(sorted(items) if isinstance(value, (set, frozenset)) else items)})'
+
+    if isinstance(value, dict):
+        items = [(_value_identity(key, seen), _value_identity(item, seen)) for key, item in value.items()]
+        return None if any(None in item for item in items) else f'dict({",".join(f"{k}:{v}" for k, v in items)})'
+
+    if isinstance(value, (BuiltinFunctionType, np.ufunc)):
+        return f'builtin {getattr(value, "__module__", None)}.{value.__name__}'
+
+    # the subclasses of the plain values may keep a state or change their repr
+    if type(value) in PLAIN_VALUE_TYPES or isinstance(value, np.generic):
+        return repr(value)
+
+    return None
+
+def _function_identity(formula, seen):
+    '''
+    Get the identity of a function from its code, constants, defaults, captured values
+    and the global values it reads (the attributes it reads from a global module as well)
+    '''
+
+    name = f'{formula.__module__}.{formula.__qualname__}'
+
+    if formula in seen:
+        return name
+
+    seen.add(formula)
+    code = formula.__code__
+    names = _get_code_names(code)
+    parts = [name, _value_identity(code, seen), repr(names), _value_identity(formula.__defaults__, seen),
+             _value_identity(formula.__kwdefaults__, seen)]
+
+    for cell in formula.__closure__ or []:
+        try:
+            parts.append(_value_identity(cell.cell_contents, seen))
+        except ValueError:
+            parts.append('empty')
+
+    for global_name in names:
+        if global_name not in formula.__globals__:
+            continue
+
+        value = formula.__globals__[global_name]
+        values = [(global_name, _value_identity(value, seen))]
+
+        if isinstance(value, ModuleType):
+            for attribute in names:
+                if hasattr(value, attribute):
+                    attribute_value = getattr(value, attribute)
+                    values.append((f'{global_name}.{attribute}', f'module {attribute_value.__name__}'
+                                   if isinstance(attribute_value, ModuleType) else _value_identity(attribute_value, seen)))
+
+        for value_name, identity in values:
+            parts.append(None if identity is None else f'{value_name}={identity}')
+
+    return None if None in parts else ':'.join(parts)
+
+def _formula_identity(formula):
+    '''
+    Get the identity of the data rate formula from its code, constants, captured values and the global values it reads,
+    so two formulas with the same code reading different globals (or a global changed between two calls) differ
+
+    Args:
+        formula (function(distance)): the data rate formula
+
+    Returns:
+        identity (str): the identity, None if it cannot be proven stable (the formula is then never cached)
+    '''
+
+    if formula is None:
+        return 'default'
+
+    return _value_identity(formula, set())
+
+def get_rate_table(size_of_grid_lens, data_rate_equation, rate_cache=True):
+    '''
+    Get the rate table of the size of the grid, the channel config and the formula.
+    The identity of the formula and the channel config are read on each call, so a generation gets the table once
+    and passes it to get_offset_data_rates for its many links
+
+    Args:
+        size_of_grid_lens (int): the size of the grid (meter)
+        data_rate_equation (function(distance)): the data rate equation
+        rate_cache (bool): use the table, a formula with data_rate_equation.deterministic = False never uses it
+                           (ex. a formula with a random carrier frequency), nor does a formula whose identity
+                           cannot be proven stable (see _formula_identity)
+
+    Returns:
+        table (dict{int: float}): the data rate of each squared offset length, None if the table is not used
+    '''
+
+    if not rate_cache or not getattr(data_rate_equation, 'deterministic', True):
+        return None
+
+    identity = _formula_identity(data_rate_equation)
+
+    if identity is None:
+        return None
+
+    key = (size_of_grid_lens, json.dumps(config.channel_config, sort_keys=True, default=repr), identity)
+
+    # the table becomes the most recently used one
+    table = rate_tables.pop(key, {})
+    rate_tables[key] = table
+
+    while len(rate_tables) > MAX_RATE_TABLES:
+        del rate_tables[next(iter(rate_tables))]
+
+    return table
+
+def clear_rate_tables():
+    '''
+    Remove all the rate tables (the tables already passed to a topo are kept by the topo)
+    '''
+
+    rate_tables.clear()
+
+def get_offset_data_rates(squared_offsets, size_of_grid_lens, data_rate_equation, rate_cache=True):
+    '''
+    Get the data rates of the links from the squared lengths of their (row, col) offsets.
+    A grid has only a few distinct offset lengths within the connection distance, so the data rate of each one
+    is evaluated once and kept in a table for the size of the grid, the channel config and the formula,
+    the later links and topos with the same settings read it from the table
+
+    Args:
+        squared_offsets (list[int], numpy.ndarray): the squared offset length of each link (row offset ** 2 + col offset ** 2)
+        size_of_grid_lens (int): the size of the grid (meter)
+        data_rate_equation (function(distance)): the data rate equation
+        rate_cache (bool, dict{int: float}): use the table (see get_rate_table), or the table from get_rate_table
+                                             (None if it is not used) for the many calls of a generation
+
+    Returns:
+        data_rates (numpy.ndarray): the data rates
+    '''
+
+    squared_offsets = np.asarray(squared_offsets, dtype=np.int64)
+    table = rate_cache if isinstance(rate_cache, dict) else get_rate_table(size_of_grid_lens, data_rate_equation, rate_cache)
+
+    if table is None:
+        return evaluate_data_rate_formula(data_rate_equation, np.sqrt(squared_offsets) * size_of_grid_lens)
+
+    lengths, inverse = np.unique(squared_offsets, return_inverse=True)
+    missing = [length for length in lengths.tolist() if length not in table]
+
+    if missing:
+        data_rates = evaluate_data_rate_formula(data_rate_equation, np.sqrt(np.array(missing, dtype=np.int64)) * size_of_grid_lens)
+        table.update(zip(missing, data_rates.tolist()))
+
+    return np.array([table[length] for length in lengths.tolist()], dtype=float)[inverse.reshape(-1)]
+
+def _get_squared_offsets(pairs):
+    return [(src_node.coordinate[0] - dst_node.coordinate[0]) ** 2 + (src_node.coordinate[1] - dst_node.coordinate[1]) ** 2
+            for src_node, dst_node in pairs]
+
+def generate_links(nodes, size_of_grid_lens, data_rate_equation=None, vectorized=False, rate_cache=True):
     '''
     Generate the link
 
@@ -36,24 +274,78 @@ def generate_links(nodes, size_of_grid_lens, data_rate_equation=None):
         nodes (dict{str: Node}): the nodes
         size_of_grid_lens (int): the size of the grid (meter)
         data_rate_equation (function(distance)): the data rate equation (default is the Shannon Capacity)
+        vectorized (bool): gather all the link distances into an array and evaluate the data rates in one pass
+        rate_cache (bool): read the data rate of each offset length from the rate table (see get_offset_data_rates)
+
+    Returns:
+        links (dict{str: Link}): the links
+    '''
+
+    if vectorized:
+        return generate_links_vectorized(nodes, size_of_grid_lens, data_rate_equation, rate_cache)
+
+    pairs = [(src_node, dst_node) for src_node in nodes.values() for dst_node in src_node.children]
+    data_rates = get_offset_data_rates(_get_squared_offsets(pairs), size_of_grid_lens,
+                                       data_rate_equation or DATA_RATE_BPS_FORMULA, rate_cache)
+    links = {}
+
+    for (src_node, dst_node), data_rate in zip(pairs, data_rates.tolist()):
+        link = Link((src_node.name, dst_node.name), src_node, dst_node, data_rate)
+        links[link.name] = link
+        src_node.links.append(link)
+
+    return links
+
+def get_link_data_rate(src_node, dst_node, size_of_grid_lens, data_rate_equation=None, rate_cache=True):
+    '''
+    Get the data rate of the link between two nodes
+
+    Args:
+        src_node (Node): the source node
+        dst_node (Node): the destination node
+        size_of_grid_lens (int): the size of the grid (meter)
+        data_rate_equation (function(distance)): the data rate equation (default is the Shannon Capacity)
+        rate_cache (bool, dict{int: float}): read the data rate from the rate table, or the table itself
+                                             (see get_offset_data_rates)
+
+    Returns:
+        data_rate (float): the data rate
+    '''
+
+    return float(get_offset_data_rates(_get_squared_offsets([(src_node, dst_node)]), size_of_grid_lens,
+                                       data_rate_equation or DATA_RATE_BPS_FORMULA, rate_cache)[0])
+
+def generate_links_vectorized(nodes, size_of_grid_lens, data_rate_equation=None, rate_cache=True):
+    '''
+    Generate the link with the distances and the data rates evaluated as numpy arrays
+
+    Args:
+        nodes (dict{str: Node}): the nodes
+        size_of_grid_lens (int): the size of the grid (meter)
+        data_rate_equation (function(distance)): the data rate equation (default is the Shannon Capacity),
+                                                 mark it with vectorized_formula to receive the array of distances
+        rate_cache (bool): read the data rate of each offset length from the rate table (see get_offset_data_rates)
 
     Returns:
         links (dict{str: Link}): the links
     '''
 
+    pairs = [(src_node, dst_node) for src_node in nodes.values() for dst_node in src_node.children]
     links = {}
 
-    for src_node in nodes.values():
-        for dst_node in src_node.children:
-            dist_src_dst = dist_between_coord(src_node.coordinate, dst_node.coordinate) * size_of_grid_lens
+    if not pairs:
+        return links
+
+    src_coords = np.array([src_node.coordinate for src_node, _ in pairs], dtype=np.int64)
+    dst_coords = np.array([dst_node.coordinate for _, dst_node in pairs], dtype=np.int64)
+    diff = src_coords - dst_coords
 
-            if data_rate_equation:
-                data_rate = data_rate_equation(dist_src_dst)
-            else:
-                data_rate = DATA_RATE_BPS_FORMULA(dist_src_dst)
+    data_rates = get_offset_data_rates(diff[:, 0] ** 2 + diff[:, 1] ** 2, size_of_grid_lens,
+                                       data_rate_equation or DATA_RATE_BPS_ARRAY_FORMULA, rate_cache)
 
-            link = Link((src_node.name, dst_node.name), src_node, dst_node, data_rate)
-            links[link.name] = link
-            src_node.links.append(link)
+    for (src_node, dst_node), data_rate in zip(pairs, data_rates.tolist()):
+        link = Link((src_node.name, dst_node.name), src_node, dst_node, data_rate)
+        links[link.name] = link
+        src_node.links.append(link)
 
-    return links
\ No newline at end of file
+    return links
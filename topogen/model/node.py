@@ -1,8 +1,26 @@
-from ..utils.function import dist_between_coord
+from math import floor, isfinite
+
+from ..utils.function import get_connection_offsets, dist_between_coord, find_pairs_within_radius
 from ..utils.error_handler import err_raise
+from ..utils.sparse import SparseRow
+from ..config.config import DATA_RATE_BPS_ARRAY_FORMULA
+from .link import get_offset_data_rates, get_rate_table
+
+
+PARENT_POLICIES = ['hop', 'nearest', 'rate']
+
+
+LAZY_NODE_STAGES = ['links', 'conflict_nodes', 'node_to_dst']
+
+
+INFO_QUEUES = ['received_info', 'send_info', 'forward_info']
 
 
 class Node:
+    __slots__ = ('name', 'type', 'coordinate', 'parents', 'children', '_links', '_conflict_nodes', 'forward_packets',
+                 'received_packets', '_node_to_dst', '_received_info', '_send_info', '_forward_info', '_topo',
+                 '_info_scheduler')
+
     def __init__(self, name, node_type):
         '''
         Create a new instance of the Node class
@@ -24,80 +42,343 @@ class Node:
         self.parents = []
         self.children = []
         self.links = []
-        self.conflict_nodes = []
+        self.conflict_nodes = set()
 
         self.forward_packets = []           # the packets to be forwarded
         self.received_packets = []          # the packets received
 
         # distributed implementation
         self.node_to_dst = {}               # the next node to the destination ex. {node3: [node1, node2]}
+        self._info_scheduler = None         # the InfoScheduler told about the accesses to the information queues
         self.received_info = {}             # the received information ex. {'t': {Node: {info}})
         self.send_info = []                 # the information to be sent to neighbour node
         self.forward_info = []              # the information to be forwarded to another node
 
-def setup_conflict_nodes(nodes):
+        self._topo = None                   # the topo that builds the lazy stages (links, conflict_nodes, node_to_dst)
+
+def _lazy_stage_property(stage):
+    '''
+    Create the property of a node attribute that the topo of the node builds on the first access
+
+    Args:
+        stage (str): the name of the attribute (and the stage of the topo)
+
+    Returns:
+        property: the property
+    '''
+
+    attribute = '_' + stage
+
+    def getter(self):
+        if getattr(self, attribute) is None:
+            self._topo.build(stage)
+
+        return getattr(self, attribute)
+
+    def setter(self, value):
+        setattr(self, attribute, value)
+
+    return property(getter, setter)
+
+for stage in LAZY_NODE_STAGES:
+    setattr(Node, stage, _lazy_stage_property(stage))
+
+def _info_queue_property(queue):
+    '''
+    Create the property of an information queue of a node that marks the node as touched in its InfoScheduler,
+    so the scheduler only checks the queues that may have changed since its last ingest
+
+    Args:
+        queue (str): the name of the queue
+
+    Returns:
+        property: the property
+    '''
+
+    attribute = '_' + queue
+
+    def getter(self):
+        if self._info_scheduler is not None:
+            self._info_scheduler.touched.add(self)
+
+        return getattr(self, attribute)
+
+    def setter(self, value):
+        if self._info_scheduler is not None:
+            self._info_scheduler.touched.add(self)
+
+        setattr(self, attribute, value)
+
+    return property(getter, setter)
+
+for queue in INFO_QUEUES:
+    setattr(Node, queue, _info_queue_property(queue))
+
+def setup_conflict_nodes(nodes, interference_radius=None):
     '''
     Setup the conflict links
 
     Args:
         nodes (dict{str: Node}): The nodes
+        interference_radius (float): The nodes within this distance (grid) conflict as well (default is no interference)
 
     Returns:
         None
     '''
 
     for node in nodes.values():
-        for parent in node.parents:
-            node.conflict_nodes.append(parent)
+        node.conflict_nodes |= find_conflict_nodes(node)
+
+    if interference_radius is not None:
+        node_list = list(nodes.values())
+
+        for i, j in find_pairs_within_radius([node.coordinate for node in node_list], interference_radius):
+            node_list[i].conflict_nodes.add(node_list[j])
+            node_list[j].conflict_nodes.add(node_list[i])
+
+def find_conflict_nodes(node):
+    '''
+    Find the conflict nodes of the node: its parents, its children and the other parents of its children
+
+    Args:
+        node (Node): The node
+
+    Returns:
+        conflict_nodes (set[Node]): The conflict nodes
+    '''
+
+    conflict_nodes = set(node.parents)
+    conflict_nodes.update(node.children)
+
+    for child in node.children:
+        conflict_nodes.update(child.parents)
+
+    conflict_nodes.discard(node)
+
+    return conflict_nodes
+
+def find_interfering_nodes(coordinate, coordinate_to_node, interference_radius):
+    '''
+    Find the nodes within the interference radius of the coordinate by looking up the cells around it,
+    or the nodes if the radius covers more cells than there are nodes (ex. an infinite radius)
+
+    Args:
+        coordinate (tuple): The coordinate
+        coordinate_to_node (dict{tuple: Node}): The node at each coordinate
+        interference_radius (float): The interference radius (grid)
+
+    Returns:
+        interfering_nodes (set[Node]): The nodes, the node at the coordinate excluded
+    '''
+
+    row, col = coordinate
+
+    if not isfinite(interference_radius) or (2 * floor(interference_radius) + 1) ** 2 > len(coordinate_to_node):
+        cells = coordinate_to_node.items()
+    else:
+        limit = int(floor(interference_radius))
+        cells = (((row + i, col + j), coordinate_to_node.get((row + i, col + j)))
+                 for i in range(-limit, limit + 1) for j in range(-limit, limit + 1))
+
+    interfering_nodes = set()
+
+    for (i, j), node in cells:
+        if node is not None and (i, j) != coordinate and (i - row) ** 2 + (j - col) ** 2 <= interference_radius ** 2:
+            interfering_nodes.add(node)
+
+    return interfering_nodes
+
+def get_node_name(node_id):
+    '''
+    Get the node name of a node id, the donor is the node 0
+
+    Args:
+        node_id (int): The node id
+
+    Returns:
+        name (str): The node name
+    '''
+
+    return 'd' if node_id == 0 else str(node_id)
+
+def discover_nodes_from_graph(graph, max_dist_to_connect_nodes):
+    '''
+    Discover the nodes reachable from the donor by a breadth-first search over the graph.
+    Only the cells within max_dist_to_connect_nodes below a dequeued node are visited,
+    so the cost scales with the nodes and their neighbours instead of the grid area
+
+    Args:
+        graph (dict{int:list[int]}): The graph
+        max_dist_to_connect_nodes (float): The maximum distance to connect nodes
+
+    Returns:
+        coordinates (list[tuple]): The coordinate of each node indexed by the node id (the donor is 0)
+        parents (list[list[int]]): The parent ids of each node
+        children (list[list[int]]): The children ids of each node
+    '''
+
+    row_amount = len(graph)
+    max_width = max(len(graph[i]) for i in range(row_amount))
+    offsets = get_connection_offsets(max_dist_to_connect_nodes, row_amount - 1, max_width - 1)
+
+    coordinates = [(0, graph[0].index(1))]
+    parents = [[]]
+    children = [[]]
+    existed_coordinate = {coordinates[0]: 0}
+
+    head = 0
+    while head < len(coordinates):
+        row, col = coordinates[head]
+
+        for i, j in offsets:
+            i += row
+            j += col
+
+            if i >= row_amount:
+                break
+
+            if j < 0 or j >= len(graph[i]) or graph[i][j] != 1:
+                continue
+
+            coord = (i, j)
+            child_id = existed_coordinate.get(coord)
+
+            if child_id is None:
+                child_id = len(coordinates)
+                existed_coordinate[coord] = child_id
+
+                coordinates.append(coord)
+                parents.append([])
+                children.append([])
+
+            children[head].append(child_id)
+            parents[child_id].append(head)
+
+        head += 1
+
+    return coordinates, parents, children
+
+def get_parent_keys(coordinate, candidates, depths, parent_policy='hop', size_of_grid_len=None, data_rate_formula=None,
+                    rate_cache=True):
+    '''
+    Get the sort key of each candidate parent of a node in a TREE, the candidate with the smallest key is the parent.
+    The ties are broken by the other measures and then by the coordinate
+
+    Args:
+        coordinate (tuple): The coordinate of the node
+        candidates (list[tuple]): The coordinate of each candidate parent
+        depths (list[int]): The hops from the donor to each candidate parent
+        parent_policy (str): Prefer the parent with the fewest hops (hop), the nearest one (nearest)
+                             or the one with the highest link data rate (rate)
+        size_of_grid_len (int): The size per grid (meter), needed by the rate policy
+        data_rate_formula (function(distance)): The data rate formula (default is the Shannon Capacity formula)
+        rate_cache (bool, dict{int: float}): Read the data rates from the rate table, or the table itself
+                                             (see get_offset_data_rates)
+
+    Returns:
+        keys (list[tuple]): The key of each candidate parent
+    '''
+
+    distances = [dist_between_coord(coordinate, candidate) for candidate in candidates]
+
+    if parent_policy == 'hop':
+        return list(zip(depths, distances, candidates))
+
+    if parent_policy == 'nearest':
+        return list(zip(distances, depths, candidates))
+
+    squared_offsets = [(coordinate[0] - candidate[0]) ** 2 + (coordinate[1] - candidate[1]) ** 2 for candidate in candidates]
+    data_rates = get_offset_data_rates(squared_offsets, size_of_grid_len, data_rate_formula or DATA_RATE_BPS_ARRAY_FORMULA,
+                                       rate_cache)
+
+    return list(zip((-data_rates).tolist(), depths, candidates))
+
+def select_tree_parents(coordinates, parents, children, parent_policy='hop', size_of_grid_len=None,
+                        data_rate_formula=None, rate_cache=True):
+    '''
+    Keep one parent per node in a single pass over the discovered nodes in the row-major order.
+    The parents are always in the rows above their children, so the hops of the candidate parents are already known
+    (the discovery order does not ensure it, a parent can be discovered after its child through a longer path)
+
+    Args:
+        coordinates (list[tuple]): The coordinate of each node indexed by the node id (the donor is 0)
+        parents (list[list[int]]): The parent ids of each node, changed in place
+        children (list[list[int]]): The children ids of each node, changed in place
+        parent_policy (str): The policy to select the parent (hop, nearest or rate, see get_parent_keys)
+        size_of_grid_len (int): The size per grid (meter), needed by the rate policy
+        data_rate_formula (function(distance)): The data rate formula (default is the Shannon Capacity formula)
+        rate_cache (bool): Read the data rates from the rate table (see get_offset_data_rates)
+
+    Returns:
+        None
+    '''
+
+    # error handling
+    err_raise(ValueError, 'The parent policy should be hop, nearest or rate', parent_policy not in PARENT_POLICIES)
+    err_raise(ValueError, 'The rate policy needs the size per grid', parent_policy == 'rate' and size_of_grid_len is None)
 
-        for child in node.children:
-            node.conflict_nodes.append(child)
+    depths = [0] * len(coordinates)
 
-            for sibling in child.parents:
-                if sibling != node:
-                    node.conflict_nodes.append(sibling)
+    if parent_policy == 'rate':
+        # the table is looked up once for all the nodes
+        rate_cache = get_rate_table(size_of_grid_len, data_rate_formula or DATA_RATE_BPS_ARRAY_FORMULA, rate_cache)
 
-def generate_nodes_from_graph(graph, max_dist_to_connect_nodes, tree_type):
+    for node_id in sorted(range(1, len(coordinates)), key=coordinates.__getitem__):
+        candidates = parents[node_id]
+
+        if len(candidates) > 1:
+            keys = get_parent_keys(coordinates[node_id], [coordinates[i] for i in candidates],
+                                   [depths[i] for i in candidates], parent_policy, size_of_grid_len, data_rate_formula,
+                                   rate_cache)
+            parents[node_id] = [candidates[keys.index(min(keys))]]
+
+        depths[node_id] = depths[parents[node_id][0]] + 1
+
+    for node_id, children_ids in enumerate(children):
+        children[node_id] = [child_id for child_id in children_ids if parents[child_id][0] == node_id]
+
+def generate_nodes_from_graph(graph, max_dist_to_connect_nodes, tree_type, coordinate_to_node=None, parent_policy='hop',
+                              size_of_grid_len=None, data_rate_formula=None, rate_cache=True):
     '''
     Generate the node from the graph and assign the coordinate, parents, children to the nodes
-    The node without parents will exclude from the nodes, except the donor
+    The node without parents will exclude from the nodes, except the donor.
+    In a TREE every node keeps only the parent selected by the parent policy
 
     Args:
         graph (dict{int:list[int]}): The graph
         max_dist_to_connect_nodes (float): The maximum distance to connect nodes
         tree_type (str): The type of the tree (DAG or TREE)
+        coordinate_to_node (dict{tuple: Node}): The dict to be filled with the node at each coordinate
+        parent_policy (str): The policy to select the parent in a TREE (hop, nearest or rate, see get_parent_keys)
+        size_of_grid_len (int): The size per grid (meter), needed by the rate policy
+        data_rate_formula (function(distance)): The data rate formula (default is the Shannon Capacity formula)
+        rate_cache (bool): Read the data rates of the rate policy from the rate table (see get_offset_data_rates)
 
     Returns:
         nodes (dict{str: Node}): the nodes
     '''
 
-    nodes = {}
-    donor = Node('d', 'donor')
-    donor.coordinate = (0, graph[0].index(1))
-    nodes['d'] = donor
-
-    queue = [donor]
-    existed_coordinate = {donor.coordinate: donor}
+    coordinates, parents, children = discover_nodes_from_graph(graph, max_dist_to_connect_nodes)
 
-    while queue:
-        node = queue.pop(0)
+    if tree_type == 'TREE':
+        select_tree_parents(coordinates, parents, children, parent_policy, size_of_grid_len, data_rate_formula,
+                            rate_cache)
 
-        for i in range(node.coordinate[0] + 1, len(graph)):
-            for j in range(len(graph[i])):
-                coord = (i, j)
+    node_list = []
+    nodes = {}
 
-                if graph[i][j] == 1 and dist_between_coord(node.coordinate, coord) <= max_dist_to_connect_nodes:
-                    if coord not in existed_coordinate.keys():
-                        child_node = Node(str(len(nodes)), 'node')
-                        child_node.coordinate = coord
-                        existed_coordinate[coord] = child_node
+    for node_id, coord in enumerate(coordinates):
+        node = Node(get_node_name(node_id), 'donor' if node_id == 0 else 'node')
+        node.coordinate = coord
+        node_list.append(node)
+        nodes[node.name] = node
 
-                        nodes[child_node.name] = child_node
-                        queue.append(child_node)
+        if coordinate_to_node is not None:
+            coordinate_to_node[coord] = node
 
-                    child_node = existed_coordinate[coord]
-                    node.children.append(child_node)
-                    child_node.parents.append(node)
+    for node, parent_ids, children_ids in zip(node_list, parents, children):
+        node.parents = [node_list[i] for i in parent_ids]
+        node.children = [node_list[i] for i in children_ids]
 
     return nodes
 
@@ -107,21 +388,35 @@ def find_node_to_dst_by_graph(nodes, graph):
 
     Args:
         nodes (dict[str:Node]): The nodes
-        graph (dict[str:list[Node]]): The graph
+        graph (dict[str:list[Node]], SparseGraph): The graph
 
     Returns:
         None
     '''
 
     for i in range(len(graph) - 2, -1, -1):
-        for j in range(len(graph[i])):
-            if graph[i][j] == '0':
+        row = graph[i]
+
+        # a sparse row gives only its occupied cells
+        for _, element in row.items() if isinstance(row, SparseRow) else enumerate(row):
+            if element == '0':
                 continue
 
-            node = nodes[graph[i][j]]
+            update_node_to_dst(nodes[element])
+
+def update_node_to_dst(node):
+    '''
+    Update the node to the destination of the node from the node_to_dst of its children
+
+    Args:
+        node (Node): The node
+
+    Returns:
+        None
+    '''
 
-            for child in node.children:
-                node.node_to_dst[child] = [child]
+    for child in node.children:
+        node.node_to_dst[child] = [child]
 
-                for descendant in child.node_to_dst.keys():
-                    node.node_to_dst.setdefault(descendant, []).append(child)
\ No newline at end of file
+        for descendant in child.node_to_dst.keys():
+            node.node_to_dst.setdefault(descendant, []).append(child)
\ No newline at end of file
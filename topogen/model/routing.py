@@ -0,0 +1,318 @@
+import numpy as np
+
+from ..utils.error_handler import err_raise
+from ..utils.function import get_topological_order
+
+
+ROUTE_METRICS = ['hop', 'latency', 'bottleneck']
+
+
+class RoutingTable:
+    def __init__(self, nodes):
+        '''
+        Create a new instance of the RoutingTable class.
+        The next hops are answered from the descendants of each node: a packed bitset per node for a DAG,
+        or an Euler-tour interval per node when every node has at most one parent (TREE).
+        The bitsets are computed lazily, only for the nodes that are queried and their descendants
+
+        Args:
+            nodes (dict{str: Node}): the nodes
+        '''
+
+        self.nodes = nodes
+        self.index = {node: i for i, node in enumerate(nodes.values())}
+        self.multi_parent_nodes = {node for node in nodes.values() if len(node.parents) > 1}
+        self.is_tree = not self.multi_parent_nodes
+
+        self.reach = {}             # the descendants bitset of each node (the node itself included)
+        self.intervals = None       # the Euler-tour interval of each node ex. {node1: (1, 5)}
+        self.euler_order = None     # the nodes sorted by their enter time
+        self.route_trees = {}       # the RouteTree of each (metric, packet_bits)
+
+    def _get_intervals(self):
+        '''
+        Get the Euler-tour intervals of the tree, a node is a descendant of another node
+        if its enter time is inside the interval of that node
+
+        Returns:
+            intervals (dict{Node: tuple(int, int)}): the (enter, exit) time of each node
+        '''
+
+        if self.intervals is None:
+            self.intervals = {}
+            self.euler_order = []
+            roots = [node for node in self.nodes.values() if not node.parents]
+            time = 0
+
+            for root in roots:
+                enter = {root: time}
+                stack = [(root, iter(root.children))]
+                self.euler_order.append(root)
+                time += 1
+
+                while stack:
+                    node, children = stack[-1]
+                    child = next(children, None)
+
+                    if child is None:
+                        stack.pop()
+                        self.intervals[node] = (enter[node], time)
+                    else:
+                        enter[child] = time
+                        self.euler_order.append(child)
+                        time += 1
+                        stack.append((child, iter(child.children)))
+
+        return self.intervals
+
+    def get_reach(self, node):
+        '''
+        Get the descendants bitset of the node, the bit of a node is at its index in the nodes
+
+        Args:
+            node (Node): the node
+
+        Returns:
+            reach (numpy.ndarray): the packed bitset (uint8)
+        '''
+
+        reach = self.reach.get(node)
+
+        if reach is not None:
+            return reach
+
+        size = (len(self.index) + 7) // 8
+        stack = [node]
+
+        while stack:
+            current = stack[-1]
+
+            if current in self.reach:
+                stack.pop()
+                continue
+
+            pending = [child for child in current.children if child not in self.reach]
+
+            if pending:
+                stack += pending
+                continue
+
+            reach = np.zeros(size, dtype=np.uint8)
+            i = self.index[current]
+            reach[i >> 3] = 1 << (i & 7)
+
+            for child in current.children:
+                child_reach = self.reach[child]
+                np.bitwise_or(reach[:len(child_reach)], child_reach, out=reach[:len(child_reach)])
+
+            self.reach[current] = reach
+            stack.pop()
+
+        return self.reach[node]
+
+    def reaches(self, node, dst):
+        '''
+        Check if the destination can be reached from the node
+
+        Args:
+            node (Node): the node
+            dst (Node): the destination node
+
+        Returns:
+            bool: True if the destination is the node or one of its descendants
+        '''
+
+        if self.is_tree:
+            intervals = self._get_intervals()
+            return intervals[node][0] <= intervals[dst][0] < intervals[node][1]
+
+        i = self.index[dst]
+        reach = self.get_reach(node)
+
+        return (i >> 3) < len(reach) and bool(reach[i >> 3] & (1 << (i & 7)))
+
+    def next_hops(self, node, dst):
+        '''
+        Get the children of the node to send to the destination,
+        a child that is the destination itself is the only next hop (the same as Node.node_to_dst)
+
+        Args:
+            node (Node): the node
+            dst (Node): the destination node
+
+        Returns:
+            next_hops (list[Node]): the children, empty if the destination cannot be reached
+        '''
+
+        if dst in node.children:
+            return [dst]
+
+        return [child for child in node.children if self.reaches(child, dst)]
+
+    def get_node_to_dst(self, node):
+        '''
+        Get the next hops of the node to all its descendants, in the format of Node.node_to_dst
+
+        Args:
+            node (Node): the node
+
+        Returns:
+            node_to_dst (dict{Node: list[Node]}): the next nodes to each destination
+        '''
+
+        node_to_dst = {}
+        nodes = None if self.is_tree else list(self.index)
+
+        for child in node.children:
+            if self.is_tree:
+                enter, exit = self._get_intervals()[child]
+                descendants = self.euler_order[enter:exit]
+            else:
+                bits = np.unpackbits(self.get_reach(child), bitorder='little')[:len(nodes)]
+                descendants = [nodes[i] for i in np.flatnonzero(bits).tolist()]
+
+            for dst in descendants:
+                if dst == child:
+                    node_to_dst[child] = [child]
+                elif dst not in node.children:
+                    node_to_dst.setdefault(dst, []).append(child)
+
+        return node_to_dst
+
+    def update(self, added, removed, parents_changed, children_changed):
+        '''
+        Update the routing table after the nodes are added or removed,
+        the bitsets of the changed nodes and their ancestors are computed again when they are queried
+
+        Args:
+            added (list[Node]): the added nodes
+            removed (list[Node]): the removed nodes
+            parents_changed (list[Node]): the remaining nodes whose parents changed
+            children_changed (list[Node]): the remaining nodes whose children changed
+
+        Returns:
+            None
+        '''
+
+        for node in added:
+            self.index[node] = len(self.index)
+
+        for node in removed:
+            self.reach.pop(node, None)
+            self.multi_parent_nodes.discard(node)
+
+        for node in list(added) + list(parents_changed):
+            if len(node.parents) > 1:
+                self.multi_parent_nodes.add(node)
+            else:
+                self.multi_parent_nodes.discard(node)
+
+        queue = list(children_changed) + list(added)
+        invalidated = set(queue)
+
+        for node in queue:
+            self.reach.pop(node, None)
+
+            for parent in node.parents:
+                if parent not in invalidated:
+                    invalidated.add(parent)
+                    queue.append(parent)
+
+        self.is_tree = not self.multi_parent_nodes
+        self.intervals = None
+        self.euler_order = None
+        self.route_trees = {}
+
+    def get_route_tree(self, metric='hop', packet_bits=1):
+        '''
+        Get the best route from the donor to every node by the metric, it is kept until the nodes change
+
+        Args:
+            metric (str): The metric of the routes (hop, latency or bottleneck, see RouteTree)
+            packet_bits (float): The bits of a packet for the latency metric
+
+        Returns:
+            RouteTree: The best routes
+        '''
+
+        key = (metric, packet_bits)
+
+        if key not in self.route_trees:
+            self.route_trees[key] = RouteTree(self.nodes, metric, packet_bits)
+
+        return self.route_trees[key]
+
+
+class RouteTree:
+    def __init__(self, nodes, metric='hop', packet_bits=1):
+        '''
+        Create a new instance of the RouteTree class.
+        The best route from the donor to every node is found in a single pass over the nodes
+        in a topological order, relaxing each link once, and is kept as a predecessor array
+
+        Args:
+            nodes (dict{str: Node}): the nodes
+            metric (str): the fewest hops (hop), the lowest sum of packet_bits / data_rate_bps of the links (latency)
+                          or the highest minimum data_rate_bps of the links (bottleneck)
+            packet_bits (float): the bits of a packet for the latency metric
+        '''
+
+        # error handling
+        err_raise(ValueError, 'The metric should be hop, latency or bottleneck', metric not in ROUTE_METRICS)
+
+        self.nodes = nodes
+        self.metric = metric
+        self.node_list = list(nodes.values())
+        self.index = {node: i for i, node in enumerate(self.node_list)}
+
+        maximize = metric == 'bottleneck'
+        unreachable = -np.inf if maximize else np.inf
+        costs = [unreachable] * len(self.node_list)
+        predecessors = [-1] * len(self.node_list)
+        costs[self.index[nodes['d']]] = np.inf if maximize else 0
+
+        for node in get_topological_order(nodes):
+            i = self.index[node]
+
+            if costs[i] == unreachable:
+                continue
+
+            for child, link in zip(node.children, node.links):
+                if metric == 'hop':
+                    cost = costs[i] + 1
+                elif metric == 'latency':
+                    cost = costs[i] + (packet_bits / link.data_rate_bps if link.data_rate_bps > 0 else np.inf)
+                else:
+                    cost = min(costs[i], link.data_rate_bps)
+
+                j = self.index[child]
+
+                if (cost > costs[j]) if maximize else (cost < costs[j]):
+                    costs[j] = cost
+                    predecessors[j] = i
+
+        self.costs = np.array(costs, dtype=float)                       # the cost of the best route to each node
+        self.predecessors = np.array(predecessors, dtype=np.int64)      # the previous node id, -1 for the donor
+
+    def get_cost(self, dst):
+        return float(self.costs[self.index[self.nodes[dst]]])
+
+    def get_path(self, dst):
+        '''
+        Get the best route from the donor to the destination
+
+        Args:
+            dst (str): the name of the destination node
+
+        Returns:
+            path (list[Node]): the nodes of the route, empty if the destination cannot be reached
+        '''
+
+        i = self.index[self.nodes[dst]]
+        path = [self.node_list[i]]
+
+        while self.predecessors[i] >= 0:
+            i = self.predecessors[i]
+            path.append(self.node_list[i])
+
+        return path[::-1] if path[-1].name == 'd' else []
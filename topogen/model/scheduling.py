@@ -0,0 +1,221 @@
+import numpy as np
+
+from ..utils.error_handler import err_raise
+from .compact import CompactTopo, _to_csr, _gather
+
+
+SCHEDULE_WEIGHTS = ['rate', 'backlog']
+
+
+def build_link_conflict_graph(link_src, link_dst, conflict_indptr, conflict_indices):
+    '''
+    Build the conflict graph of the links from the conflict graph of the nodes.
+    Two links conflict if they share a node, or if the receiver of one link is a conflict node
+    of the transmitter of the other link
+
+    Args:
+        link_src (numpy.ndarray): the source node id of each link
+        link_dst (numpy.ndarray): the destination node id of each link
+        conflict_indptr (numpy.ndarray): the conflict nodes of node i are conflict_indices[conflict_indptr[i]:conflict_indptr[i + 1]]
+        conflict_indices (numpy.ndarray): the conflict node ids
+
+    Returns:
+        indptr (numpy.ndarray): the conflict links of link i are indices[indptr[i]:indptr[i + 1]]
+        indices (numpy.ndarray): the sorted conflict link ids
+    '''
+
+    link_src = np.asarray(link_src, dtype=np.int64)
+    link_dst = np.asarray(link_dst, dtype=np.int64)
+    link_amount = len(link_src)
+    node_amount = len(conflict_indptr) - 1
+    link_ids = np.arange(link_amount)
+
+    # the links of each node (as the source or the destination) and the links received by each node
+    endpoints = np.concatenate([link_src, link_dst])
+    order = np.argsort(endpoints, kind='stable')
+    node_indptr = np.concatenate([[0], np.cumsum(np.bincount(endpoints, minlength=node_amount))])
+    node_links = np.concatenate([link_ids, link_ids])[order]
+
+    order = np.argsort(link_dst, kind='stable')
+    received_indptr = np.concatenate([[0], np.cumsum(np.bincount(link_dst, minlength=node_amount))])
+    received_links = link_ids[order]
+
+    # the links sharing a node
+    entries, shared = _gather(node_indptr, node_links, np.repeat(np.arange(node_amount), np.diff(node_indptr)))
+    src = [node_links[entries]]
+    dst = [shared]
+
+    # the links received by a conflict node of the transmitter, in both directions
+    owners, conflict_nodes = _gather(conflict_indptr, conflict_indices, link_src)
+    received_owners, interfered = _gather(received_indptr, received_links, conflict_nodes)
+    src += [owners[received_owners], interfered]
+    dst += [interfered, owners[received_owners]]
+
+    src = np.concatenate(src)
+    dst = np.concatenate(dst)
+    keys = np.unique(src[src != dst] * link_amount + dst[src != dst])
+
+    indptr = np.zeros(link_amount + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum(np.bincount(keys // max(link_amount, 1), minlength=link_amount))
+
+    return indptr, keys % max(link_amount, 1)
+
+
+class LinkScheduler:
+    def __init__(self, topo, slot_duration=1, interference_radius=None):
+        '''
+        Create a new instance of the LinkScheduler class.
+        The conflict graph of the links is built once as CSR arrays, then each slot activates
+        a conflict-free set of links by a greedy maximal independent set in the order of their weight
+
+        Args:
+            topo (Topo, CompactTopo): the topo
+            slot_duration (float): the duration of a slot (second)
+            interference_radius (float): the interference radius of the CompactTopo conflict graph
+                                         (a Topo uses the conflict nodes it is generated with)
+        '''
+
+        # error handling
+        err_raise(ValueError, 'The slot duration must be positive', slot_duration <= 0)
+
+        self.topo = topo
+        self.slot_duration = slot_duration
+
+        if isinstance(topo, CompactTopo):
+            self.link_src = topo.link_src
+            self.link_dst = topo.child_indices
+            self.data_rate_bps = topo.data_rate_bps
+            conflict_indptr, conflict_indices = topo.get_conflict_graph(interference_radius)
+        else:
+            index = {node: i for i, node in enumerate(topo.nodes.values())}
+            links = list(topo.links.values())
+
+            self.link_src = np.array([index[link.src_node] for link in links], dtype=np.int64)
+            self.link_dst = np.array([index[link.dst_node] for link in links], dtype=np.int64)
+            self.data_rate_bps = np.array([link.data_rate_bps for link in links], dtype=float)
+            conflict_indptr, conflict_indices = _to_csr([[index[conflict_node] for conflict_node in node.conflict_nodes]
+                                                         for node in topo.nodes.values()])
+
+        self.link_names = list(topo.links)
+        self.indptr, self.indices = build_link_conflict_graph(self.link_src, self.link_dst, conflict_indptr,
+                                                              conflict_indices)
+
+    def get_conflict_links(self, link_id):
+        return self.indices[self.indptr[link_id]:self.indptr[link_id + 1]]
+
+    def schedule_slot(self, weights):
+        '''
+        Select the links of a slot, the links are visited from the highest weight
+        and a link is selected if it does not conflict with the selected links
+
+        Args:
+            weights (numpy.ndarray): the weight of each link, the links with no positive weight are not selected
+
+        Returns:
+            active (numpy.ndarray): the sorted ids of the selected links
+        '''
+
+        weights = np.asarray(weights, dtype=float)
+        candidates = np.flatnonzero(weights > 0)
+        order = candidates[np.argsort(-weights[candidates], kind='stable')]
+
+        blocked = np.zeros(len(weights), dtype=bool)
+        active = []
+
+        for link_id in order.tolist():
+            if not blocked[link_id]:
+                active.append(link_id)
+                blocked[self.indices[self.indptr[link_id]:self.indptr[link_id + 1]]] = True
+
+        return np.sort(np.array(active, dtype=np.int64))
+
+    def run(self, slots, weight='rate', backlog=None, arrivals=None):
+        '''
+        Schedule the links slot by slot
+
+        Args:
+            slots (int): the amount of slots
+            weight (str): weight the links by their data rate (rate) or by their backlog (backlog)
+            backlog (numpy.ndarray): the bits waiting on each link (default is no backlog)
+            arrivals (numpy.ndarray, function(slot)): the bits arriving on each link at each slot,
+                                                      or a function returning them for the slot
+
+        Returns:
+            stats (dict{str: numpy.ndarray}): the statistics of each slot
+                slots: the slots
+                active_links: the amount of active links
+                throughput: the bits sent divided by the slot duration (bps)
+                backlog: the bits waiting after the slot
+                schedules: the ids of the active links of each slot (list[numpy.ndarray])
+
+        Info:
+            In the rate mode every active link sends at its full data rate,
+            in the backlog mode an active link sends at most its backlog
+        '''
+
+        # error handling
+        err_raise(ValueError, 'The weight should be rate or backlog', weight not in SCHEDULE_WEIGHTS)
+
+        link_amount = len(self.link_src)
+        backlog = np.zeros(link_amount, dtype=float) if backlog is None else np.array(backlog, dtype=float)
+        capacity = self.data_rate_bps * self.slot_duration
+
+        active_links = np.zeros(slots, dtype=np.int64)
+        throughput = np.zeros(slots, dtype=float)
+        total_backlog = np.zeros(slots, dtype=float)
+        schedules = []
+
+        for slot in range(slots):
+            if arrivals is not None:
+                backlog += arrivals(slot) if callable(arrivals) else arrivals
+
+            active = self.schedule_slot(self.data_rate_bps if weight == 'rate' else backlog)
+
+            if weight == 'rate':
+                sent = capacity[active]
+            else:
+                sent = np.minimum(backlog[active], capacity[active])
+                backlog[active] -= sent
+
+            active_links[slot] = len(active)
+            throughput[slot] = sent.sum() / self.slot_duration
+            total_backlog[slot] = backlog.sum()
+            schedules.append(active)
+
+        return {
+            'slots': np.arange(slots),
+            'active_links': active_links,
+            'throughput': throughput,
+            'backlog': total_backlog,
+            'schedules': schedules,
+        }
+
+    def apply(self, active, used_data_rate=None):
+        '''
+        Turn on the active links and turn off the others in the topo,
+        the extra data rate of an active link is its data rate minus the used data rate
+
+        Args:
+            active (numpy.ndarray): the ids of the active links
+            used_data_rate (numpy.ndarray): the used data rate of each active link (default is the whole data rate)
+
+        Returns:
+            None
+        '''
+
+        active = np.asarray(active, dtype=np.int64)
+        state = np.zeros(len(self.link_src), dtype=bool)
+        state[active] = True
+
+        extra_data_rate = np.zeros(len(self.link_src), dtype=float)
+
+        if used_data_rate is not None:
+            extra_data_rate[active] = self.data_rate_bps[active] - np.asarray(used_data_rate, dtype=float)
+
+        if isinstance(self.topo, CompactTopo):
+            self.topo.link_state[:] = state
+            self.topo.extra_data_rate[:] = extra_data_rate
+        else:
+            for name, link_state, link_extra_data_rate in zip(self.link_names, state.tolist(), extra_data_rate.tolist()):
+                self.topo.links[name].state = link_state
+                self.topo.links[name].extra_data_rate = link_extra_data_rate
@@ -0,0 +1,173 @@
+import json
+
+import numpy as np
+
+from ..utils.error_handler import err_raise
+from .compact import CompactTopo
+
+
+MAGIC = b'TOPOGEN\x01'
+ALIGNMENT = 64
+
+TOPO_ARRAYS = ['coordinates', 'parent_indptr', 'parent_indices', 'child_indptr', 'child_indices', 'row_widths',
+               'link_src', 'parent_link_ids', 'data_rate_bps', 'link_state', 'extra_data_rate']
+
+
+class NameTable:
+    def __init__(self, offsets, blob):
+        '''
+        Create a read-only sequence of the node names stored as one utf-8 blob,
+        a name is only decoded when it is accessed
+
+        Args:
+            offsets (numpy.ndarray): the name i is blob[offsets[i]:offsets[i + 1]]
+            blob (numpy.ndarray): the utf-8 bytes of the names (uint8)
+        '''
+
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes().decode('utf-8')
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+def _path_table_from_paths(compact_topo, path_to_dst):
+    '''
+    Flatten the paths into the arrays of a path table
+
+    Args:
+        compact_topo (CompactTopo): the compact topo
+        path_to_dst (dict{str: list[list[Node]]}): the paths from the donor node to all the nodes
+
+    Returns:
+        path_table (tuple(numpy.ndarray)): (dst_indptr, path_indptr, path_nodes)
+    '''
+
+    dst_indptr = [0]
+    path_indptr = [0]
+    path_nodes = []
+
+    for node_id in range(compact_topo.node_amount()):
+        for path in path_to_dst.get(compact_topo.get_name(node_id), []):
+            path_nodes += [compact_topo.get_id(node.name) for node in path]
+            path_indptr.append(len(path_nodes))
+
+        dst_indptr.append(len(path_indptr) - 1)
+
+    return (np.array(dst_indptr, dtype=np.int64), np.array(path_indptr, dtype=np.int64),
+            np.array(path_nodes, dtype=np.int64))
+
+def save_topology(topo, file_path, include_paths=False):
+    '''
+    Save the topo as flat arrays in a single binary file
+
+    Args:
+        topo (Topo, CompactTopo): the topo
+        file_path (str): the file path
+        include_paths (bool): store the paths from the donor node to all the nodes as well
+
+    Returns:
+        None
+
+    Info:
+        The file is the magic bytes, the header length (uint64), a json header with the dtype, shape and offset
+        of every array, then the raw arrays aligned to 64 bytes
+    '''
+
+    compact_topo = topo if isinstance(topo, CompactTopo) else CompactTopo.from_topo(topo)
+    arrays = {name: getattr(compact_topo, name) for name in TOPO_ARRAYS}
+
+    if compact_topo.node_names is not None:
+        names = [name.encode('utf-8') for name in compact_topo.node_names]
+        arrays['name_offsets'] = np.concatenate([[0], np.cumsum([len(name) for name in names])]).astype(np.int64)
+        arrays['name_blob'] = np.frombuffer(b''.join(names), dtype=np.uint8)
+
+    if include_paths:
+        if compact_topo.path_table is not None:
+            path_table = compact_topo.path_table
+        else:
+            path_table = _path_table_from_paths(compact_topo, topo.path_to_dst)
+
+        arrays['path_dst_indptr'], arrays['path_indptr'], arrays['path_nodes'] = path_table
+
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    header = {'version': 1, 'arrays': {}}
+
+    # the offsets depend on the header length, so grow the header until they are stable
+    header_size = 0
+    while True:
+        offset = len(MAGIC) + 8 + header_size
+        for name, array in arrays.items():
+            offset += -offset % ALIGNMENT
+            header['arrays'][name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+            offset += array.nbytes
+
+        header_bytes = json.dumps(header).encode('utf-8')
+
+        if len(header_bytes) <= header_size:
+            break
+
+        header_size = len(header_bytes) + ALIGNMENT
+
+    with open(file_path, 'wb') as file:
+        file.write(MAGIC)
+        file.write(np.uint64(header_size).tobytes())
+        file.write(header_bytes.ljust(header_size))
+
+        for name, array in arrays.items():
+            file.write(b'\0' * (header['arrays'][name]['offset'] - file.tell()))
+            file.write(array.tobytes())
+
+def load_topology(file_path, mmap=True):
+    '''
+    Load the topo saved by save_topology
+
+    Args:
+        file_path (str): the file path
+        mmap (bool): memory map the arrays (copy-on-write) so they are only read from the file when accessed,
+                     otherwise read the whole file into memory
+
+    Returns:
+        CompactTopo: the compact topo (use to_topo() for the Node and Link objects)
+    '''
+
+    with open(file_path, 'rb') as file:
+        magic = file.read(len(MAGIC))
+        err_raise(ValueError, 'The file is not a saved topo', magic != MAGIC)
+
+        header_size = int(np.frombuffer(file.read(8), dtype=np.uint64)[0])
+        header = json.loads(file.read(header_size).decode('utf-8'))
+
+        err_raise(ValueError, 'The version of the saved topo is not supported', header['version'] != 1)
+
+    arrays = {}
+
+    for name, info in header['arrays'].items():
+        dtype, shape, offset = np.dtype(info['dtype']), tuple(info['shape']), info['offset']
+
+        if 0 in shape:
+            arrays[name] = np.zeros(shape, dtype=dtype)
+        elif mmap:
+            arrays[name] = np.memmap(file_path, dtype=dtype, mode='c', offset=offset, shape=shape)
+        else:
+            arrays[name] = np.fromfile(file_path, dtype=dtype, count=int(np.prod(shape)), offset=offset).reshape(shape)
+
+    node_names = None
+    path_table = None
+
+    if 'name_offsets' in arrays:
+        node_names = NameTable(arrays['name_offsets'], arrays.get('name_blob', np.zeros(0, dtype=np.uint8)))
+
+    if 'path_dst_indptr' in arrays:
+        path_table = (arrays['path_dst_indptr'], arrays['path_indptr'], arrays['path_nodes'])
+
+    return CompactTopo(arrays['coordinates'], arrays['parent_indptr'], arrays['parent_indices'], arrays['child_indptr'],
+                       arrays['child_indices'], arrays['data_rate_bps'], arrays['row_widths'], node_names,
+                       arrays['link_src'], arrays['parent_link_ids'], arrays['link_state'], arrays['extra_data_rate'],
+                       path_table)
@@ -0,0 +1,172 @@
+from math import floor
+
+import numpy as np
+
+from ..utils.error_handler import err_raise
+from ..utils.function import get_connection_offsets
+from ..utils.sparse import SparseRow
+from ..config.config import DATA_RATE_BPS_ARRAY_FORMULA
+from .node import PARENT_POLICIES, get_node_name, get_parent_keys
+from .link import get_offset_data_rates
+
+
+def _get_row_cols(row):
+    '''
+    Get the cols of the cells set to 1 in the row
+
+    Args:
+        row (list[int], numpy.ndarray, SparseRow): the row
+
+    Returns:
+        cols (list[int]): the sorted cols
+    '''
+
+    if isinstance(row, SparseRow):
+        return [j for j, element in row.items() if element == 1]
+
+    if isinstance(row, np.ndarray):
+        return np.flatnonzero(row == 1).tolist()
+
+    return [j for j, element in enumerate(row) if element == 1]
+
+def iter_topology_rows(rows, tree_type, max_dist_to_connect_nodes, size_of_grid_len, data_rate_formula=None,
+                       parent_policy='hop', rate_cache=True):
+    '''
+    Build the topo row by row from an iterator of rows, keeping only a window of the rows in memory.
+    A node only connects to the rows below it within max_dist_to_connect_nodes, so a node is complete
+    once those rows have been read, then it is emitted with the links to its children and forgotten.
+    The nodes are named in the row-major order (the donor is 'd'), unlike generate_topology_from_graph
+    which names them in the order they are discovered from the donor
+
+    Args:
+        rows (iterable[list[int]]): The rows of the graph (lists, numpy arrays or SparseRow)
+        tree_type (str): The type of the tree (DAG or TREE)
+        max_dist_to_connect_nodes: (float): The maximum distance allowed to connect nodes
+        size_of_grid_len (int): The size per grid (meter)
+        data_rate_formula (function(distance)): The data rate formula (default is the Shannon Capacity formula)
+        parent_policy (str): The policy to select the parent in a TREE (hop, nearest or rate, see get_parent_keys)
+        rate_cache (bool): Read the data rate of each link offset from the rate table (see get_offset_data_rates)
+
+    Yields:
+        kind (str): 'node' or 'link', each node is followed by the links to its children
+        record (dict): the node or the link
+            node: {'name': '1', 'type': 'node', 'coordinate': (1, 0), 'parents': ['d'], 'children': ['3']}
+            link: {'name': ('1', '3'), 'data_rate_bps': 1000.0}
+
+    Example:
+        rows = ([int(cell) for cell in line.split()] for line in open('graph.txt'))
+
+        for kind, record in iter_topology_rows(rows, 'DAG', 1.5, 10):
+            print(kind, record)
+    '''
+
+    # error handling
+    err_raise(ValueError, 'The tree type should be DAG or TREE', tree_type not in ['DAG', 'TREE'])
+    err_raise(ValueError, 'The parent policy should be hop, nearest or rate', parent_policy not in PARENT_POLICIES)
+
+    window_rows = floor(max_dist_to_connect_nodes) if max_dist_to_connect_nodes >= 1 else 0
+    offsets = get_connection_offsets(max_dist_to_connect_nodes, window_rows, window_rows)
+    formula = data_rate_formula or DATA_RATE_BPS_ARRAY_FORMULA
+
+    window = {}         # the nodes of the open rows ex. {(1, 0): {'name': '1', 'depth': 1, 'parents': ['d'], 'children': []}}
+    open_rows = []      # the open rows and the coordinates of their nodes ex. [(1, [(1, 0), (1, 2)])]
+    node_amount = 0
+    row_amount = 0
+
+    def close_row():
+        _, coordinates = open_rows.pop(0)
+
+        # the data rates of all the links of the row are read at once
+        squared_offsets = [(child[0] - coordinate[0]) ** 2 + (child[1] - coordinate[1]) ** 2
+                           for coordinate in coordinates for child in window[coordinate]['children']]
+        data_rates = iter(get_offset_data_rates(squared_offsets, size_of_grid_len, formula, rate_cache).tolist())
+
+        for coordinate in coordinates:
+            node = window[coordinate]
+            children = node['children']
+            yield 'node', {'name': node['name'], 'type': 'donor' if node['name'] == 'd' else 'node',
+                           'coordinate': coordinate, 'parents': node['parents'],
+                           'children': [window[child]['name'] for child in children]}
+
+            for child, data_rate in zip(children, data_rates):
+                yield 'link', {'name': (node['name'], window[child]['name']), 'data_rate_bps': data_rate}
+
+        # the children of the closed nodes are still in the window, the closed nodes are not needed anymore
+        for coordinate in coordinates:
+            del window[coordinate]
+
+    for i, row in enumerate(rows):
+        cols = _get_row_cols(row)
+        coordinates = []
+        row_amount += 1
+
+        # error handling
+        err_raise(ValueError, 'The graph is empty', i == 0 and len(row) == 0)
+        err_raise(ValueError, 'Only Donor can be the root node', i == 0 and len(cols) != 1)
+
+        for j in cols:
+            candidates = sorted((i - di, j - dj) for di, dj in offsets if (i - di, j - dj) in window)
+
+            if i > 0 and not candidates:
+                continue
+
+            if tree_type == 'TREE' and len(candidates) > 1:
+                keys = get_parent_keys((i, j), candidates, [window[candidate]['depth'] for candidate in candidates],
+                                       parent_policy, size_of_grid_len, data_rate_formula, rate_cache)
+                candidates = [candidates[keys.index(min(keys))]]
+
+            window[(i, j)] = {
+                'name': get_node_name(node_amount),
+                'depth': min((window[candidate]['depth'] for candidate in candidates), default=-1) + 1,
+                'parents': [window[candidate]['name'] for candidate in candidates],
+                'children': [],
+            }
+            node_amount += 1
+            coordinates.append((i, j))
+
+            for candidate in candidates:
+                window[candidate]['children'].append((i, j))
+
+        open_rows.append((i, coordinates))
+
+        # the nodes of a row are complete when the rows within the connection distance below it are read
+        while open_rows and open_rows[0][0] <= i - window_rows:
+            yield from close_row()
+
+    # error handling
+    err_raise(ValueError, 'The graph is empty', row_amount == 0)
+
+    while open_rows:
+        yield from close_row()
+
+def stream_topology(rows, tree_type, max_dist_to_connect_nodes, size_of_grid_len, sink, data_rate_formula=None,
+                    parent_policy='hop', rate_cache=True):
+    '''
+    Build the topo row by row and pass each node and link to the sink (see iter_topology_rows)
+
+    Args:
+        rows (iterable[list[int]]): The rows of the graph (lists, numpy arrays or SparseRow)
+        tree_type (str): The type of the tree (DAG or TREE)
+        max_dist_to_connect_nodes: (float): The maximum distance allowed to connect nodes
+        size_of_grid_len (int): The size per grid (meter)
+        sink (function(kind, record)): Called with each node and link ex. a writer to a file
+        data_rate_formula (function(distance)): The data rate formula (default is the Shannon Capacity formula)
+        parent_policy (str): The policy to select the parent in a TREE (hop, nearest or rate)
+        rate_cache (bool): Read the data rate of each link offset from the rate table (see get_offset_data_rates)
+
+    Returns:
+        counts (dict{str: int}): the amount of the nodes and the links
+
+    Example:
+        with open('topo.jsonl', 'w') as file:
+            stream_topology(rows, 'DAG', 1.5, 10, lambda kind, record: file.write(json.dumps([kind, record]) + '\\n'))
+    '''
+
+    counts = {'nodes': 0, 'links': 0}
+
+    for kind, record in iter_topology_rows(rows, tree_type, max_dist_to_connect_nodes, size_of_grid_len,
+                                           data_rate_formula, parent_policy, rate_cache):
+        sink(kind, record)
+        counts[kind + 's'] += 1
+
+    return counts
@@ -1,26 +1,631 @@
+from bisect import bisect
+from itertools import islice
+
 from ..utils.error_handler import err_raise
-from ..utils.function import graph_matrix_to_dict, replace_graph_elements, find_paths_from_donor_to_all_nodes
-from .node import generate_nodes_from_graph, setup_conflict_nodes, find_node_to_dst_by_graph
-from .link import generate_links
+from ..utils.profiler import profile_stage
+from ..utils.sparse import SparseGraph
+from ..utils.function import graph_matrix_to_dict, replace_graph_elements, find_paths_from_donor_to_all_nodes, \
+                             iter_paths_from_donor, get_connection_offsets
+from .node import Node, LAZY_NODE_STAGES, generate_nodes_from_graph, setup_conflict_nodes, find_node_to_dst_by_graph, \
+                  find_conflict_nodes, find_interfering_nodes, update_node_to_dst, get_parent_keys, PARENT_POLICIES
+from .link import Link, generate_links, get_link_data_rate, get_rate_table
+from .routing import RoutingTable
+from ..config.config import DATA_RATE_BPS_FORMULA, DATA_RATE_BPS_ARRAY_FORMULA
+
+
+TOPO_STAGES = ['links', 'topo_graph', 'conflict_nodes', 'node_to_dst', 'routing', 'path_to_dst']
 
 
 class Topo:
+    __slots__ = ('nodes', '_links', '_topo_graph', '_path_to_dst', 'coordinate_to_node', '_routing', 'graph', 'settings',
+                 'pending', 'profiler', 'rate_tables')
+
     def __init__(self):
+        self.pending = set()                # the stages to be built on the first access (see TOPO_STAGES)
         self.nodes = {}
         self.links = {}
         self.topo_graph = {}
         self.path_to_dst = {}
+        self.coordinate_to_node = {}        # the node at each coordinate ex. {(1, 0): node1}
+        self.routing = None                 # the RoutingTable of the nodes
+        self.graph = {}                     # the graph of 0 and 1 the topo is generated from
+        self.settings = None                # the parameters the topo is generated with (needed to add or remove nodes)
+        self.profiler = None                # the StageProfiler recording each built stage
+        self.rate_tables = {}               # the rate table of each formula used by the updates (see _get_rate_table)
+
+    def build(self, *stages):
+        '''
+        Build the pending stages now instead of on their first access
+
+        Args:
+            stages (str): The stages (default is all the stages, see TOPO_STAGES)
+
+        Returns:
+            None
+        '''
+
+        for stage in stages or TOPO_STAGES:
+            if stage in self.pending:
+                self.pending.discard(stage)
+
+                with profile_stage(self.profiler, stage) as record:
+                    getattr(self, '_build_' + stage)()
+
+                    if self.profiler is not None:
+                        record['counts'] = self._get_stage_counts(stage)
+
+    def _get_stage_counts(self, stage):
+        '''
+        Get the amount of the elements built by the stage for the profiler
+        '''
+
+        if stage == 'links':
+            return {'links': len(self._links)}
+        if stage == 'topo_graph':
+            return {'cells': sum(len(row) for row in self._topo_graph.values())}
+        if stage == 'conflict_nodes':
+            return {'conflicts': sum(len(node._conflict_nodes) for node in self.nodes.values())}
+        if stage == 'node_to_dst':
+            return {'entries': sum(len(node._node_to_dst) for node in self.nodes.values())}
+        if stage == 'routing':
+            return {'nodes': len(self._routing.index)}
+
+        return {'paths': sum(len(paths) for paths in self._path_to_dst.values())}
+
+    def _build_links(self):
+        for node in self.nodes.values():
+            node.links = []
+
+        self._links = generate_links(self.nodes, self.settings['size_of_grid_len'], self.settings['data_rate_formula'],
+                                     self.settings['vectorized'], self.settings.get('rate_cache', True))
+
+    def _build_topo_graph(self):
+        self._topo_graph = replace_graph_elements(self.graph, self.nodes, self.coordinate_to_node)
+
+    def _build_conflict_nodes(self):
+        for node in self.nodes.values():
+            node.conflict_nodes = set()
+
+        setup_conflict_nodes(self.nodes, self.settings['interference_radius'])
+
+    def _build_node_to_dst(self):
+        for node in self.nodes.values():
+            node.node_to_dst = {}
+
+        if self.settings['build_node_to_dst']:
+            find_node_to_dst_by_graph(self.nodes, self.topo_graph)
+
+    def _build_routing(self):
+        self._routing = RoutingTable(self.nodes)
+
+    def _build_path_to_dst(self):
+        self._path_to_dst = find_paths_from_donor_to_all_nodes(self.nodes, self.settings['max_paths_per_dst'])
+
+    def _new_node(self, name, node_type, coordinate):
+        '''
+        Create a node of the topo, its attributes of the pending stages are built with the other nodes
+        '''
+
+        node = Node(name, node_type)
+        node.coordinate = coordinate
+
+        for stage in LAZY_NODE_STAGES:
+            if stage in self.pending:
+                setattr(node, stage, None)
+                node._topo = self
+
+        return node
+
+    def get_node_by_coordinate(self, coordinate):
+        '''
+        Get the node at the coordinate
+
+        Args:
+            coordinate (tuple): The coordinate
+
+        Returns:
+            node (Node): The node, None if there is no node at the coordinate
+        '''
+
+        return self.coordinate_to_node.get(tuple(coordinate))
+
+    @property
+    def conflict_graph(self):
+        '''
+        The conflict nodes of each node by name ex. {'1': {'d', '2', '3'}}
+        '''
+
+        return {name: {conflict_node.name for conflict_node in node.conflict_nodes} for name, node in self.nodes.items()}
+
+    def copy(self):
+        '''
+        Copy the topo with new Node and Link objects, so changing the copy does not change the topo.
+        The queues of the nodes are new lists with a copy of each information, the pending stages stay pending
+
+        Returns:
+            Topo: The copy of the topo
+        '''
+
+        topo = Topo()
+        topo.pending = set(self.pending)
+        new_nodes = {}
+
+        for name, node in self.nodes.items():
+            new_node = topo._new_node(node.name, node.type, node.coordinate)
+            new_node.forward_packets = _copy_queue(node.forward_packets)
+            new_node.received_packets = _copy_queue(node.received_packets)
+            new_node.received_info = {time: _copy_queue(infos) for time, infos in node.received_info.items()}
+            new_node.send_info = _copy_queue(node.send_info)
+            new_node.forward_info = _copy_queue(node.forward_info)
+
+            new_nodes[node] = new_node
+            topo.nodes[name] = new_node
+
+        for node, new_node in new_nodes.items():
+            new_node.parents = [new_nodes[parent] for parent in node.parents]
+            new_node.children = [new_nodes[child] for child in node.children]
+
+            if 'conflict_nodes' not in self.pending:
+                new_node.conflict_nodes = {new_nodes[conflict_node] for conflict_node in node.conflict_nodes}
+
+            if 'node_to_dst' not in self.pending:
+                new_node.node_to_dst = {new_nodes[dst]: [new_nodes[n] for n in hops] for dst, hops in node.node_to_dst.items()}
+
+        if 'links' not in self.pending:
+            topo._links = {}
+
+            for node, new_node in new_nodes.items():
+                for link in node.links:
+                    new_link = Link(link.name, new_nodes[link.src_node], new_nodes[link.dst_node], link.data_rate_bps)
+                    new_link.state = link.state
+                    new_link.extra_data_rate = link.extra_data_rate
+                    new_node.links.append(new_link)
+                    topo._links[new_link.name] = new_link
+
+        if 'topo_graph' not in self.pending:
+            if isinstance(self._topo_graph, SparseGraph):
+                topo._topo_graph = self._topo_graph.copy(deep=True)
+            else:
+                topo._topo_graph = {key: list(row) for key, row in self._topo_graph.items()}
+
+        if 'path_to_dst' not in self.pending:
+            topo._path_to_dst = {name: [[new_nodes[n] for n in path] for path in paths]
+                                 for name, paths in self._path_to_dst.items()}
+
+        if 'routing' not in self.pending:
+            topo._routing = RoutingTable(topo.nodes) if self._routing is not None else None
+
+        topo.coordinate_to_node = {coordinate: new_nodes[node] for coordinate, node in self.coordinate_to_node.items()}
+        topo.graph = self.graph.copy() if isinstance(self.graph, SparseGraph) else dict(self.graph)
+        topo.settings = dict(self.settings) if self.settings is not None else None
+        topo.rate_tables = dict(self.rate_tables)
+
+        return topo
+
+    def _get_offsets(self):
+        err_raise(ValueError, 'The topo has no generation settings to be updated', self.settings is None)
+
+        max_width = max(len(row) for row in self.graph.values())
+        return get_connection_offsets(self.settings['max_dist_to_connect_nodes'], len(self.graph) - 1, max_width - 1)
+
+    def _set_cell(self, coordinate, value):
+        row, col = coordinate
+        # the rows may be shared with the caller or a copy of the topo
+        self.graph[row] = self.graph[row].copy() if isinstance(self.graph, SparseGraph) else list(self.graph[row])
+        self.graph[row][col] = value
+
+    def _connect(self, src_node, dst_node):
+        '''
+        Connect the source node to the destination node, the children and links stay in the row-major order
+        '''
+
+        position = bisect([child.coordinate for child in src_node.children], dst_node.coordinate)
+        src_node.children.insert(position, dst_node)
+        dst_node.parents.append(src_node)
+
+        if 'links' in self.pending:
+            return
+
+        formula = self.settings['data_rate_formula'] or DATA_RATE_BPS_FORMULA
+        data_rate = get_link_data_rate(src_node, dst_node, self.settings['size_of_grid_len'], formula,
+                                       self._get_rate_table(formula))
+        link = Link((src_node.name, dst_node.name), src_node, dst_node, data_rate)
+        src_node.links.insert(position, link)
+        self._links[link.name] = link
+
+    def _get_rate_table(self, formula):
+        '''
+        Get the rate table of the formula for the updates of the topo, it is looked up once per topo
+        (see get_rate_table), so the channel config and the globals of the formula are read once as well
+        '''
+
+        if formula not in self.rate_tables:
+            self.rate_tables[formula] = get_rate_table(self.settings['size_of_grid_len'], formula,
+                                                       self.settings.get('rate_cache', True))
+
+        return self.rate_tables[formula]
+
+    def _get_depth(self, node, depths):
+        '''
+        Get the hops from the donor to the node in a TREE, depths holds the hops of the nodes being moved
+        '''
+
+        hops = 0
+
+        while node not in depths and node.parents:
+            node = node.parents[0]
+            hops += 1
+
+        return hops + depths.get(node, 0)
+
+    def _select_parent(self, coordinate, candidates, depths):
+        '''
+        Select the parent of the coordinate in a TREE by the parent policy of the topo
+        '''
+
+        formula = self.settings['data_rate_formula'] or DATA_RATE_BPS_ARRAY_FORMULA
+        rate_table = self._get_rate_table(formula) if self.settings['parent_policy'] == 'rate' else None
+        keys = get_parent_keys(coordinate, [candidate.coordinate for candidate in candidates],
+                               [self._get_depth(candidate, depths) for candidate in candidates],
+                               self.settings['parent_policy'], self.settings['size_of_grid_len'], formula, rate_table)
+
+        return candidates[keys.index(min(keys))]
+
+    def add_node(self, coordinate):
+        '''
+        Add a node at the coordinate and connect it to the nodes within the connection distance.
+        The cells of the graph that become reachable through the new node get a node as well.
+        Only the neighbourhood of the new nodes (links, conflict nodes, node_to_dst of the ancestors
+        and paths of the descendants) is updated.
+        In a TREE the new node takes one parent by the parent policy and the existing nodes keep their parent
+
+        Args:
+            coordinate (tuple): The coordinate
+
+        Returns:
+            node (Node): The new node, None if no node is within the connection distance (the cell is kept in the graph)
+        '''
+
+        coordinate = tuple(coordinate)
+        offsets = self._get_offsets()
+
+        # error handling
+        err_raise(ValueError, 'The coordinate is outside the graph', coordinate[0] not in self.graph
+                  or not 0 <= coordinate[1] < len(self.graph[coordinate[0]]))
+
+        if coordinate in self.coordinate_to_node:
+            return self.coordinate_to_node[coordinate]
+
+        self._set_cell(coordinate, 1)
+        is_tree = self.settings['tree_type'] == 'TREE'
+        added = []
+        children_changed = set()
+        parents_changed = set()
+        depths = {}
+
+        queue = [coordinate]
+        for row, col in queue:
+            parents = [self.coordinate_to_node.get((row - i, col - j)) for i, j in reversed(offsets)]
+            parents = [parent for parent in parents if parent is not None]
+
+            if not parents:
+                continue
+
+            if is_tree:
+                parents = [self._select_parent((row, col), parents, depths)]
+
+            node = self._new_node(str(self.settings['next_node_id']), 'node', (row, col))
+            self.settings['next_node_id'] += 1
+
+            self.nodes[node.name] = node
+            self.coordinate_to_node[node.coordinate] = node
+
+            if 'topo_graph' not in self.pending:
+                self._topo_graph[row][col] = node.name
+            added.append(node)
+            depths[node] = self._get_depth(parents[0], depths) + 1
+
+            for parent in parents:
+                self._connect(parent, node)
+                children_changed.add(parent)
+
+            for i, j in offsets:
+                child_coordinate = (row + i, col + j)
 
-def generate_topology_from_graph(graph, tree_type, max_dist_to_connect_nodes, size_of_grid_len, data_rate_formula=None):
+                if child_coordinate[0] not in self.graph or not 0 <= child_coordinate[1] < len(self.graph[child_coordinate[0]]):
+                    continue
+
+                child = self.coordinate_to_node.get(child_coordinate)
+
+                if child is not None:
+                    if is_tree:
+                        continue
+
+                    self._connect(node, child)
+                    parents_changed.add(child)
+                elif self.graph[child_coordinate[0]][child_coordinate[1]] == 1 and child_coordinate not in queue:
+                    queue.append(child_coordinate)
+
+        self._update_neighbourhood(added, [], parents_changed - set(added), children_changed - set(added))
+
+        return added[0] if added else None
+
+    def remove_node(self, name):
+        '''
+        Remove the node and clear its cell in the graph.
+        The nodes left without parents are removed as well (their cells are kept in the graph),
+        except in a TREE where they take another parent within the connection distance if there is one.
+        Only the neighbourhood of the removed nodes is updated
+
+        Args:
+            name (str): The name of the node
+
+        Returns:
+            removed (list[Node]): The removed nodes
+        '''
+
+        # error handling
+        err_raise(ValueError, 'The topo has no generation settings to be updated', self.settings is None)
+        err_raise(ValueError, 'The node does not exist', name not in self.nodes)
+        err_raise(ValueError, 'The donor cannot be removed', name == 'd')
+
+        self._set_cell(self.nodes[name].coordinate, 0)
+        removed = [self.nodes[name]]
+        removed_set = set(removed)
+        reattached = []         # the (parent, node) to be connected in a TREE
+
+        if self.settings['tree_type'] == 'TREE':
+            offsets = self._get_offsets()
+            subtree = list(removed)
+            depths = {}
+
+            for node in subtree:
+                subtree += node.children
+
+            # the rows are visited from the top, so the candidate parents are already kept or removed
+            for node in sorted(subtree[1:], key=lambda node: node.coordinate):
+                if node.parents[0] not in removed_set:
+                    continue
+
+                row, col = node.coordinate
+                candidates = [self.coordinate_to_node.get((row - i, col - j)) for i, j in reversed(offsets)]
+                candidates = [candidate for candidate in candidates if candidate is not None and candidate not in removed_set]
+
+                if candidates:
+                    parent = self._select_parent(node.coordinate, candidates, depths)
+                    depths[node] = self._get_depth(parent, depths) + 1
+                    reattached.append((parent, node))
+                else:
+                    removed.append(node)
+                    removed_set.add(node)
+        else:
+            for node in removed:
+                for child in node.children:
+                    if child not in removed_set and all(parent in removed_set for parent in child.parents):
+                        removed.append(child)
+                        removed_set.add(child)
+
+        children_changed = set()
+        parents_changed = set()
+
+        for node in removed:
+            for parent in node.parents:
+                if parent not in removed_set:
+                    position = parent.children.index(node)
+                    del parent.children[position]
+                    children_changed.add(parent)
+
+                    if 'links' not in self.pending:
+                        del parent.links[position]
+
+            for child in node.children:
+                if child not in removed_set:
+                    child.parents.remove(node)
+                    parents_changed.add(child)
+
+            if 'links' not in self.pending:
+                for link in node.links:
+                    del self._links[link.name]
+
+                for parent in node.parents:
+                    self._links.pop((parent.name, node.name), None)
+
+            if 'path_to_dst' not in self.pending:
+                self._path_to_dst.pop(node.name, None)
+
+            if 'topo_graph' not in self.pending:
+                self._topo_graph[node.coordinate[0]][node.coordinate[1]] = '0'
+
+            del self.nodes[node.name]
+            del self.coordinate_to_node[node.coordinate]
+
+        for parent, node in reattached:
+            self._connect(parent, node)
+            children_changed.add(parent)
+
+        self._update_neighbourhood([], removed, parents_changed, children_changed)
+
+        return removed
+
+    def toggle_cell(self, coordinate):
+        '''
+        Toggle the cell of the graph: add a node at an empty cell, remove the node (or the unconnected cell) otherwise
+
+        Args:
+            coordinate (tuple): The coordinate
+
+        Returns:
+            node (Node): The new node, None if a node is removed or the cell cannot be connected
+        '''
+
+        coordinate = tuple(coordinate)
+
+        if coordinate in self.coordinate_to_node:
+            self.remove_node(self.coordinate_to_node[coordinate].name)
+            return None
+
+        if self.graph[coordinate[0]][coordinate[1]] == 1:
+            self._set_cell(coordinate, 0)
+            return None
+
+        return self.add_node(coordinate)
+
+    def _update_neighbourhood(self, added, removed, parents_changed, children_changed):
+        '''
+        Update the conflict nodes, node_to_dst, paths and routing table around the changed nodes
+
+        Args:
+            added (list[Node]): The added nodes
+            removed (list[Node]): The removed nodes
+            parents_changed (set[Node]): The remaining nodes whose parents changed
+            children_changed (set[Node]): The remaining nodes whose children changed
+
+        Only the stages already built are updated, the pending stages are built from the changed nodes
+        '''
+
+        # the conflict nodes depend on the parents, the children and the other parents of the children
+        if 'conflict_nodes' not in self.pending:
+            conflict_changed = set(added) | parents_changed | children_changed
+            radius = self.settings['interference_radius']
+
+            for node in list(conflict_changed):
+                conflict_changed.update(node.parents)
+
+            for node in removed:
+                for conflict_node in node.conflict_nodes:
+                    conflict_node.conflict_nodes.discard(node)
+
+            for node in conflict_changed:
+                node.conflict_nodes = find_conflict_nodes(node)
+
+                if radius is not None:
+                    node.conflict_nodes |= find_interfering_nodes(node.coordinate, self.coordinate_to_node, radius)
+
+            if radius is not None:
+                for node in added:
+                    for conflict_node in node.conflict_nodes:
+                        conflict_node.conflict_nodes.add(node)
+
+        # node_to_dst changes for the ancestors, the children are updated before the parents
+        if 'node_to_dst' not in self.pending and self.settings['build_node_to_dst']:
+            ancestors = set(added) | children_changed
+            queue = list(ancestors)
+
+            for node in queue:
+                for parent in node.parents:
+                    if parent not in ancestors:
+                        ancestors.add(parent)
+                        queue.append(parent)
+
+            for node in sorted(ancestors, key=lambda node: node.coordinate, reverse=True):
+                node.node_to_dst = {}
+                update_node_to_dst(node)
+
+        # the paths change for the descendants
+        if 'path_to_dst' not in self.pending:
+            descendants = set(added) | parents_changed
+            queue = list(descendants)
+
+            for node in queue:
+                for child in node.children:
+                    if child not in descendants:
+                        descendants.add(child)
+                        queue.append(child)
+
+            for node in descendants:
+                paths = iter_paths_from_donor(self.nodes, node.name, self.settings['max_paths_per_dst'] is not None)
+                self._path_to_dst[node.name] = list(islice(paths, self.settings['max_paths_per_dst']))
+
+        if 'routing' not in self.pending and self._routing is not None:
+            self._routing.update(added, removed, parents_changed, children_changed)
+
+def _stage_property(stage):
     '''
-    Generate the topo from the graph
+    Create the property of a topo attribute that is built on the first access
 
     Args:
-        graph (list[list[int]]): The graph of the topo
+        stage (str): the name of the attribute (and the stage)
+
+    Returns:
+        property: the property
+    '''
+
+    attribute = '_' + stage
+
+    def getter(self):
+        if stage in self.pending:
+            self.build(stage)
+
+        return getattr(self, attribute)
+
+    def setter(self, value):
+        self.pending.discard(stage)
+        setattr(self, attribute, value)
+
+    return property(getter, setter)
+
+for stage in ['links', 'topo_graph', 'routing', 'path_to_dst']:
+    setattr(Topo, stage, _stage_property(stage))
+
+def _copy_queue(queue):
+    '''
+    Copy a queue of a node with a copy of each information (dict)
+    '''
+
+    return [dict(info) if isinstance(info, dict) else info for info in queue]
+
+def get_topology_settings(tree_type, max_dist_to_connect_nodes, size_of_grid_len, data_rate_formula=None,
+                          max_paths_per_dst=None, vectorized=False, build_node_to_dst=True, parent_policy='hop',
+                          interference_radius=None, rate_cache=True):
+    '''
+    Get the settings of a topo generated with the parameters (see generate_topology_from_graph)
+
+    Returns:
+        settings (dict): the settings without next_node_id, which depends on the nodes
+    '''
+
+    return {
+        'tree_type': tree_type,
+        'max_dist_to_connect_nodes': max_dist_to_connect_nodes,
+        'size_of_grid_len': size_of_grid_len,
+        'data_rate_formula': data_rate_formula,
+        'vectorized': vectorized,
+        # a TREE has one path to each node, so the depth-first pass finds it without the k shortest paths search
+        'max_paths_per_dst': None if tree_type == 'TREE' and max_paths_per_dst else max_paths_per_dst,
+        'parent_policy': parent_policy,
+        'interference_radius': interference_radius,
+        'build_node_to_dst': build_node_to_dst,
+        'rate_cache': rate_cache,
+    }
+
+def generate_topology_from_graph(graph, tree_type, max_dist_to_connect_nodes, size_of_grid_len, data_rate_formula=None,
+                                 max_paths_per_dst=None, vectorized=False, build_node_to_dst=True, cache=None,
+                                 parent_policy='hop', interference_radius=None, eager=False, profiler=None,
+                                 rate_cache=True):
+    '''
+    Generate the topo from the graph.
+    Only the nodes are generated here, the other stages (see TOPO_STAGES) are built on their first access
+    (ex. topo.links, node.conflict_nodes or topo.path_to_dst) unless eager is set
+
+    Args:
+        graph (list[list[int]]): The graph of the topo, or a sparse graph (numpy array, list or iterator of the
+                                 occupied (row, col) cells, SparseGraph) whose graph and topo_graph stay sparse
         tree_type (str): The type of the tree (DAG or TREE)
         max_dist_to_connect_nodes: (float): The maximum distance allowed to connect nodes
         size_of_grid_len (int): The size per grid (meter)
         data_rate_formula (function(distance)): The data rate formula (default is the Shannon Capacity formula)
+        max_paths_per_dst (int): Keep only the k shortest paths to each node in path_to_dst (default is all the paths)
+        vectorized (bool): Evaluate the link distances and data rates as numpy arrays in one pass
+        build_node_to_dst (bool): Fill Node.node_to_dst for all the nodes, otherwise use topo.routing on demand
+        cache (TopologyCache): Return a copy of the cached topo for the same graph and parameters if there is one
+        parent_policy (str): The parent of each node in a TREE is the one with the fewest hops (hop),
+                             the nearest one (nearest) or the one with the highest link data rate (rate)
+        interference_radius (float): The nodes within this distance (grid) conflict as well (default is no interference)
+        eager (bool): Build all the stages now
+        profiler (StageProfiler): Record the time, the peak allocations and the amount of the elements
+                                  of the nodes stage and of each stage built later (see topo.profiler)
+        rate_cache (bool): Read the data rate of each link offset from the rate table (see get_offset_data_rates),
+                           turn it off (or set data_rate_formula.deterministic = False) for a random formula
 
     Returns:
         Topo: The topo
@@ -29,25 +634,44 @@ def generate_topology_from_graph(graph, tree_type, max_dist_to_connect_nodes, si
         topo = generate_topology_from_graph([[0, 1, 0, 0], [0, 0, 1, 0], [0, 0, 1, 0], [1, 0, 0, 0]], 'DAG', 1.5, 10)
     '''
 
+    if cache is not None:
+        return cache.get_or_generate(graph, tree_type, max_dist_to_connect_nodes, size_of_grid_len, data_rate_formula,
+                                     max_paths_per_dst=max_paths_per_dst, vectorized=vectorized,
+                                     build_node_to_dst=build_node_to_dst, parent_policy=parent_policy,
+                                     interference_radius=interference_radius, eager=eager, profiler=profiler,
+                                     rate_cache=rate_cache)
+
+    graph = graph_matrix_to_dict(graph)
+
     # error handling
-    err_raise(ValueError, 'The graph is empty', graph == [] or [] in graph)
+    err_raise(ValueError, 'The graph is empty', not graph or any(len(row) == 0 for row in graph.values()))
     err_raise(ValueError, 'The tree type should be DAG or TREE', tree_type not in ['DAG', 'TREE'])
     err_raise(ValueError, 'Only Donor can be the root node', graph[0].count(1) != 1)
+    err_raise(ValueError, 'The parent policy should be hop, nearest or rate', parent_policy not in PARENT_POLICIES)
+    err_raise(ValueError, 'The interference radius must be positive', interference_radius is not None and interference_radius <= 0)
 
     topo = Topo()
-    topo.topo_graph = graph_matrix_to_dict(graph)
-    topo.nodes = generate_nodes_from_graph(topo.topo_graph, max_dist_to_connect_nodes, tree_type)
+    topo.profiler = profiler
+
+    with profile_stage(profiler, 'nodes') as record:
+        topo.graph = graph
+        topo.nodes = generate_nodes_from_graph(topo.graph, max_dist_to_connect_nodes, tree_type, topo.coordinate_to_node,
+                                               parent_policy, size_of_grid_len, data_rate_formula, rate_cache)
+        record['counts'] = {'nodes': len(topo.nodes)}
+
+    topo.pending = set(TOPO_STAGES)
 
-    if data_rate_formula:
-        topo.links = generate_links(topo.nodes, size_of_grid_len, data_rate_formula)
-    else:
-        topo.links = generate_links(topo.nodes, size_of_grid_len)
+    for node in topo.nodes.values():
+        node.links = node.conflict_nodes = node.node_to_dst = None
+        node._topo = topo
 
-    topo.topo_graph = replace_graph_elements(topo.topo_graph, topo.nodes)
+    topo.settings = get_topology_settings(tree_type, max_dist_to_connect_nodes, size_of_grid_len, data_rate_formula,
+                                          max_paths_per_dst, vectorized, build_node_to_dst, parent_policy,
+                                          interference_radius, rate_cache)
+    topo.settings['next_node_id'] = len(topo.nodes)
 
-    setup_conflict_nodes(topo.nodes)
-    find_node_to_dst_by_graph(topo.nodes, topo.topo_graph)
-    topo.path_to_dst = find_paths_from_donor_to_all_nodes(topo.nodes)
+    if eager:
+        topo.build()
 
     return topo
 
@@ -1,126 +1,178 @@
-from math import sqrt
-from copy import deepcopy
+from collections.abc import Sequence
+from math import sqrt, floor
+from heapq import heappush, heappop
+from itertools import islice
 from yaml import safe_load
 
+import numpy as np
 
-def find_paths_from_donor_to_all_nodes(nodes):
+from .info_scheduler import InfoScheduler
+from .sparse import SparseGraph
+
+
+def get_topological_order(nodes):
     '''
-    Find the path from the donor node to all the nodes
+    Get the nodes in a topological order (every parent comes before its children)
 
     Args:
         nodes (dict{str: Node}): The nodes
 
     Returns:
-        paths (dict{str: list[Node]}): The path from the donor node to all the nodes
+        order (list[Node]): The nodes in the topological order
+    '''
+
+    in_degree = {node: len(node.parents) for node in nodes.values()}
+    order = [node for node, degree in in_degree.items() if degree == 0]
+
+    for node in order:
+        for child in node.children:
+            in_degree[child] -= 1
+
+            if in_degree[child] == 0:
+                order.append(child)
+
+    return order
+
+def count_paths_from_donor(nodes):
+    '''
+    Count the paths from the donor node to all the nodes without enumerating them
+
+    Args:
+        nodes (dict{str: Node}): The nodes
+
+    Returns:
+        path_counts (dict{str: int}): The amount of paths from the donor node to each node
+    '''
+
+    path_counts = {name: 0 for name in nodes}
+    path_counts['d'] = 1
+
+    for node in get_topological_order(nodes):
+        for child in node.children:
+            path_counts[child.name] += path_counts[node.name]
+
+    return path_counts
+
+def _hops_to_dst(dst):
+    '''
+    Get the minimum hops from every ancestor of the destination to the destination
+
+    Args:
+        dst (Node): The destination node
+
+    Returns:
+        hops (dict{Node: int}): The hops, the nodes that cannot reach the destination are excluded
+    '''
+
+    hops = {dst: 0}
+    queue = [dst]
+
+    for node in queue:
+        for parent in node.parents:
+            if parent not in hops:
+                hops[parent] = hops[node] + 1
+                queue.append(parent)
+
+    return hops
+
+def iter_paths_from_donor(nodes, dst, shortest_first=False):
+    '''
+    Lazily yield the paths from the donor node to the destination node.
+    Only the ancestors of the destination are explored, so every branch yields a path
+
+    Args:
+        nodes (dict{str: Node}): The nodes
+        dst (str): The name of the destination node
+        shortest_first (bool): Yield the paths in the order of the hops instead of the depth-first order
+
+    Yields:
+        path (list[Node]): A path from the donor node to the destination node
     '''
 
     donor = nodes['d']
-    paths = {}
+    hops = _hops_to_dst(nodes[dst])
+
+    if donor not in hops:
+        return
+
+    if shortest_first:
+        # the ties are broken by the longer partial path, so the equally short paths are completed one by one
+        # instead of expanding all of them level by level
+        heap = [(hops[donor], -1, 0, (donor,))]
+        counter = 1
+
+        while heap:
+            _, _, _, path = heappop(heap)
+            node = path[-1]
 
-    for node in nodes.values():
-        path_to_node = []
-        path = [donor]
+            if node.name == dst:
+                yield list(path)
+                continue
 
-        def dfs(n):
-            if n == node:
-                path_to_node.append(path.copy())
-                return
+            for child in node.children:
+                if child in hops:
+                    heappush(heap, (len(path) + hops[child], -len(path) - 1, counter, path + (child,)))
+                    counter += 1
 
-            for child in n.children:
-                path.append(child)
-                dfs(child)
+        return
+
+    path = [donor]
+    stack = [iter(donor.children)]
+
+    if donor.name == dst:
+        yield path.copy()
+        return
+
+    while stack:
+        child = next(stack[-1], None)
+
+        if child is None:
+            stack.pop()
+            path.pop()
+        elif child in hops:
+            path.append(child)
+
+            if child.name == dst:
+                yield path.copy()
                 path.pop()
+            else:
+                stack.append(iter(child.children))
 
-        dfs(donor)
-        paths[node.name] = path_to_node
+def find_paths_from_donor_to_all_nodes(nodes, max_paths=None):
+    '''
+    Find the path from the donor node to all the nodes.
+    All the paths are collected in a single depth-first pass from the donor node
 
-    return paths
+    Args:
+        nodes (dict{str: Node}): The nodes
+        max_paths (int): Keep only the k shortest paths to each node (default is all the paths)
 
-# def calculate_affected_coordinate(coordinate, affect_radius, size, reverse=False):
-#     '''
-#     Calculate the affected coordinate
-
-#     Args:
-#         coordinate (tuple): The coordinate
-#         affect_radius (int): The affect radius
-#         size (int): The size of the topo graph
-
-#     Returns:
-#         affected_coordinate (set(tuple)): The affected coordinate
-#     '''
-
-#     if affect_radius < 1 or affect_radius > size // 2:
-#         raise ValueError('affect_radius must be greater than 1 and less than {}'.format(size // 2))
-
-#     affected_coordinate = {coordinate}
-#     x = coordinate[0]
-#     y = coordinate[1]
-
-#     if reverse:
-#         for i in range(1, affect_radius + 1):
-#             if x - i >= 0:
-#                 affected_coordinate.add((x - i, y))
-
-#                 for j in range(1, affect_radius + 1):
-#                     if y - j >= 0:
-#                         affected_coordinate.add((x - i, y - j))
-#                     if y + j < size:
-#                         affected_coordinate.add((x - i, y + j))
-#     else:
-#         for i in range(1, affect_radius + 1):
-#             if x + i < size:
-#                 affected_coordinate.add((x + i, y))
-
-#                 for j in range(1, affect_radius + 1):
-#                     if y - j >= 0:
-#                         affected_coordinate.add((x + i, y - j))
-#                     if y + j < size:
-#                         affected_coordinate.add((x + i, y + j))
-
-#     return affected_coordinate
-
-# def generate_graph(size, min_node_amount, max_node_amount, affect_radius):
-#     '''
-#     Generate the topo graph
-
-#     Args:
-#         size (int): The size of the topo graph per row
-#         min_node_amount (int): The min node amount in each row
-#         max_node_amount (int): The max node amount in each row
-#         affect_radius (int): The affect radius that a node can connect with other nodes
-
-#     Returns:
-#         topo_graph (list[list]): The topo graph
-#     '''
-
-#     if min_node_amount > max_node_amount:
-#         raise ValueError('min_node_amount must be less than max_node_amount')
-#     elif min_node_amount < 0 or max_node_amount < 1:
-#         raise ValueError('min_node_amount must be greater than 0 and max_node_amount must be greater than 1')
-#     elif min_node_amount > size or max_node_amount > size:
-#         raise ValueError('min_node_amount and max_node_amount must be less than size')
-#     elif affect_radius < 1 or affect_radius > size // 2:
-#         raise ValueError('affect_radius must be greater than 1 and less than {}'.format(size // 2))
-
-#     topo_graph = {i: ['0'] * size for i in range(size)}
-
-#     left_limit = size // 4 * 1
-#     right_limit = size // 4 * 2
-#     first_row_position = randint(left_limit, right_limit)
-#     topo_graph[0][first_row_position] = '-1'
-
-#     affected_coordinate = calculate_affected_coordinate((0, first_row_position), affect_radius, size)
-
-#     # generate the nodes
-#     for row in range(1, size):
-#         node_amount = randint(min_node_amount, max_node_amount)
-
-#         for position in sample(range(size), node_amount):
-#             if (row, position) in affected_coordinate:
-#                 topo_graph[row][position] = '-1'
-#                 affected_coordinate |= calculate_affected_coordinate((row, position), affect_radius, size)
-
-#     return topo_graph
+    Returns:
+        paths (dict{str: list[Node]}): The path from the donor node to all the nodes
+    '''
+
+    if max_paths is not None:
+        return {name: list(islice(iter_paths_from_donor(nodes, name, True), max_paths)) for name in nodes}
+
+    donor = nodes['d']
+    paths = {name: [] for name in nodes}
+    paths[donor.name].append([donor])
+
+    path = [donor]
+    stack = [iter(donor.children)]
+
+    while stack:
+        child = next(stack[-1], None)
+
+        if child is None:
+            stack.pop()
+            path.pop()
+        else:
+            path.append(child)
+            paths[child.name].append(path.copy())
+            stack.append(iter(child.children))
+
+    return paths
 
 def dist_between_coord(coord1, coord2):
     '''
@@ -136,44 +188,148 @@ def dist_between_coord(coord1, coord2):
 
     return sqrt((coord1[0] - coord2[0]) ** 2 + (coord1[1] - coord2[1]) ** 2)
 
-def replace_graph_elements(graph, nodes):
+def find_pairs_within_radius(coordinates, radius):
+    '''
+    Find the pairs of coordinates within the radius.
+    The coordinates are hashed into buckets of the radius size, so only the coordinates
+    in the same or the adjacent buckets are compared
+
+    Args:
+        coordinates (list[tuple]): The coordinates
+        radius (float): The radius
+
+    Returns:
+        pairs (list[tuple]): The (i, j) index pairs with i < j
+    '''
+
+    buckets = {}
+
+    for i, (row, col) in enumerate(coordinates):
+        buckets.setdefault((int(row // radius), int(col // radius)), []).append(i)
+
+    pairs = []
+
+    for (bucket_row, bucket_col), members in buckets.items():
+        # each pair of adjacent buckets is visited once
+        for row_offset, col_offset in [(0, 0), (0, 1), (1, -1), (1, 0), (1, 1)]:
+            others = buckets.get((bucket_row + row_offset, bucket_col + col_offset))
+
+            if others is None:
+                continue
+
+            for k, i in enumerate(members):
+                for j in (members[k + 1:] if others is members else others):
+                    if dist_between_coord(coordinates[i], coordinates[j]) <= radius:
+                        pairs.append((min(i, j), max(i, j)))
+
+    return pairs
+
+def get_connection_offsets(max_dist_to_connect_nodes, max_row_offset, max_col_offset):
+    '''
+    Get the (row, col) offsets of the cells below a node that are within the connection distance.
+    The offsets are sorted in the row-major order so scanning them visits the cells in the same
+    order as scanning the rows below the node
+
+    Args:
+        max_dist_to_connect_nodes (float): The maximum distance to connect nodes
+        max_row_offset (int): The largest row offset to consider (the row amount of the graph minus one)
+        max_col_offset (int): The largest col offset to consider (the widest row of the graph minus one)
+
+    Returns:
+        offsets (list[tuple]): The offsets
+    '''
+
+    if not max_dist_to_connect_nodes >= 1:
+        return []
+
+    radius = min(max_dist_to_connect_nodes, max(max_row_offset, max_col_offset, 0))
+    row_limit = min(floor(radius), max_row_offset)
+    col_limit = min(floor(radius), max_col_offset)
+    offsets = []
+
+    for i in range(1, row_limit + 1):
+        for j in range(-col_limit, col_limit + 1):
+            if dist_between_coord((0, 0), (i, j)) <= max_dist_to_connect_nodes:
+                offsets.append((i, j))
+
+    return offsets
+
+def replace_graph_elements(graph, nodes, coordinate_to_node=None):
     '''
     Replace the int elements with the nodes name in the topo graph
 
     Args:
-        graph (dict[list]): The topo graph
+        graph (dict[list], SparseGraph): The topo graph
         nodes (dict{str: Node}): The nodes
+        coordinate_to_node (dict{tuple: Node}): The node at each coordinate (built from the nodes if not given)
 
     Return:
-        new_graph (dict[list]): The graph
+        new_graph (dict[list], SparseGraph): The graph, a SparseGraph with '0' as the fill for a SparseGraph
     '''
 
-    new_graph = deepcopy(graph)
+    if coordinate_to_node is None:
+        coordinate_to_node = {node.coordinate: node for node in nodes.values()}
+
+    if isinstance(graph, SparseGraph):
+        # only the occupied cells are visited
+        new_graph = SparseGraph(shape=graph.shape, fill='0')
+
+        for i, j, element in graph.cells():
+            if element == 1:
+                node = coordinate_to_node.get((i, j))
+                element = node.name if node else '0'
+
+            new_graph[i][j] = element
 
-    for key, value in new_graph.items():
-        for j in range(len(value)):
-            if value[j] == 0:
-                value[j] = '0'
-            elif value[j] == 1:
-                node = [node for node in nodes.values() if node.coordinate == (key, j)]
+        return new_graph
 
-                if node:
-                    value[j] = node[0].name
-                else:
-                    value[j] = '0'
+    new_graph = {}
+
+    for key, value in graph.items():
+        new_row = []
+
+        for j, element in enumerate(value):
+            if element == 0:
+                element = '0'
+            elif element == 1:
+                node = coordinate_to_node.get((key, j))
+                element = node.name if node else '0'
+
+            new_row.append(element)
+
+        new_graph[key] = new_row
 
     return new_graph
 
 def graph_matrix_to_dict(graph_matrix):
     '''
-    Convert the matrix to the dictionary
+    Convert the matrix to the dictionary.
+    The sparse inputs become a SparseGraph, so the dense matrix is never built
 
     Args:
-        graph_matrix (list[list[int]]): The matrix
+        graph_matrix (list[list[int]], numpy.ndarray, list[tuple], iterable[tuple], SparseGraph): The matrix
+            (a sequence of rows ex. a tuple of tuples), a numpy array, the occupied (row, col) cells as a list of tuples
+            or an iterator, or a SparseGraph
 
     Returns:
-        graph_dict (dict{int:list[int]}): The dictionary
+        graph_dict (dict{int:list[int]}, SparseGraph): The dictionary, a SparseGraph for the sparse inputs
     '''
+
+    if isinstance(graph_matrix, dict):
+        # a new dict, so the rows replaced by the topo updates are not written to the given graph
+        return dict(graph_matrix)
+
+    if isinstance(graph_matrix, SparseGraph):
+        # the rows are shared with the given graph, like the rows of a matrix
+        return graph_matrix.copy()
+
+    if isinstance(graph_matrix, np.ndarray):
+        return SparseGraph.from_array(graph_matrix)
+
+    if not isinstance(graph_matrix, Sequence) or \
+       (isinstance(graph_matrix, list) and graph_matrix and isinstance(graph_matrix[0], tuple)):
+        return SparseGraph(graph_matrix)
+
     graph_dict = {}
 
     for i in range(len(graph_matrix)):
@@ -194,16 +350,19 @@ def get_yaml_data(file_path):
 
     return data
 
-def info_exchange(nodes, time):
+def info_exchange(nodes, time, retention=10):
     '''
     Exchange the information between nodes.
     The exchange mechanism propagates information one hop at a time. 
     Therefore, if the destination node is two hops away from the source node, 
     the information will reach the destination after two propagation steps.
+    The InfoScheduler of the nodes is kept between the calls, so a call only touches the due information
+    (the information appended to the queues of the nodes, or a replaced queue, is picked up on the next call).
     
     Args:
         nodes (dict{str: Node}): The nodes
         time (int): time to exchange the information
+        retention (int): the received information of the time (time - retention) is removed
 
     Returns:
         None
@@ -223,20 +382,10 @@ def info_exchange(nodes, time):
         The last element of the path should be the destination node
     '''
 
-    for node in nodes.values():
-        if node.received_info.get(time - 10):
-            del node.received_info[time - 10]
+    # the scheduler is kept on the nodes (the nodes that cannot keep it, ex. NodeView, get a new one at each call)
+    scheduler = getattr(next(iter(nodes.values()), None), '_info_scheduler', None)
 
-        satisfied_info = [i for i in node.send_info if i['time'] == time]
-        satisfied_info += [i for i in node.forward_info if i['time'] == time - i['hops'] + len(i['path'])]
+    if scheduler is None or scheduler.nodes is not nodes or scheduler.retention != retention:
+        scheduler = InfoScheduler(nodes, retention)
 
-        node.send_info = list(filter(lambda i: i['time'] != time, node.send_info))
-        node.forward_info = list(filter(lambda i: i['time'] != time - i['hops'] + len(i['path']), node.forward_info))
-
-        for info in satisfied_info:
-            dst_node = info['path'].pop(0)
-
-            if info['path'] == []:
-                dst_node.received_info.setdefault(info['time'], []).append(info)
-            else:
-                dst_node.forward_info.append(info)
\ No newline at end of file
+    scheduler.step(time)
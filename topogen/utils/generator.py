@@ -0,0 +1,82 @@
+import numpy as np
+
+from .error_handler import err_raise
+from .function import get_connection_offsets
+
+
+def _dilate_row(row, width):
+    '''
+    Mark every col within the width of a True col of the row
+
+    Args:
+        row (numpy.ndarray): the bool row
+        width (int): the col distance
+
+    Returns:
+        covered (numpy.ndarray): the bool row of the covered cols
+    '''
+
+    counts = np.concatenate([[0], np.cumsum(row, dtype=np.int64)])
+    cols = np.arange(len(row))
+    low = np.maximum(cols - width, 0)
+    high = np.minimum(cols + width + 1, len(row))
+
+    return counts[high] > counts[low]
+
+def generate_graph(size, density, max_dist_to_connect_nodes, seed=None, donor_col=None, keep_rows=True):
+    '''
+    Generate a random graph where every node can be reached from the donor.
+    The cells of all the rows are drawn at once, then each row keeps only the cells within
+    max_dist_to_connect_nodes below a kept cell of the rows above, so no cell is an orphan
+
+    Args:
+        size (int, tuple(int, int)): The amount of rows and cols (an int is a square grid)
+        density (float): The probability of a cell to be a node
+        max_dist_to_connect_nodes (float): The maximum distance to connect nodes
+        seed (int, numpy.random.Generator): The seed of the random generator
+        donor_col (int): The col of the donor in the first row (default is a random col in the middle of the row)
+        keep_rows (bool): Keep at least one node in each row, so the graph spans all the rows even with a low density
+
+    Returns:
+        graph (list[list[int]]): The graph, 1 is a node
+
+    Example:
+        graph = generate_graph(100, 0.3, 1.5, seed=0)
+        topo = generate_topology_from_graph(graph, 'DAG', 1.5, 10)
+    '''
+
+    row_amount, col_amount = (size, size) if isinstance(size, int) else size
+
+    # error handling
+    err_raise(ValueError, 'The size must be positive', row_amount < 1 or col_amount < 1)
+    err_raise(ValueError, 'The density must be between 0 and 1', not 0 <= density <= 1)
+    err_raise(ValueError, 'The maximum distance to connect nodes must be at least 1', max_dist_to_connect_nodes < 1)
+    err_raise(ValueError, 'The donor col is out of the graph', donor_col is not None and not 0 <= donor_col < col_amount)
+
+    rand = np.random.default_rng(seed)
+
+    if donor_col is None:
+        donor_col = int(rand.integers(col_amount // 4, col_amount // 2 + 1))
+
+    # the col distance each row offset can reach, the same cells generate_nodes_from_graph connects
+    widths = {}
+    for i, j in get_connection_offsets(max_dist_to_connect_nodes, row_amount - 1, col_amount - 1):
+        widths[i] = max(widths.get(i, 0), j)
+
+    graph = rand.random((row_amount, col_amount)) < density
+    graph[0] = False
+    graph[0, donor_col] = True
+
+    for row in range(1, row_amount):
+        covered = np.zeros(col_amount, dtype=bool)
+
+        for i, width in widths.items():
+            if row - i >= 0:
+                covered |= _dilate_row(graph[row - i], width)
+
+        graph[row] &= covered
+
+        if keep_rows and not graph[row].any() and covered.any():
+            graph[row, rand.choice(np.flatnonzero(covered))] = True
+
+    return graph.astype(np.int64).tolist()
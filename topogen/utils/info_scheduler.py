@@ -0,0 +1,421 @@
+from heapq import heappush, heappop
+
+import numpy as np
+
+
+class InfoScheduler:
+    def __init__(self, nodes, retention=10):
+        '''
+        Create a new instance of the InfoScheduler class.
+        The information to be sent or forwarded is bucketed by the tick it is due,
+        so a step only touches the due information and the nodes that send or receive it.
+        The queues of the nodes stay the source of truth: the information appended to them (or a replaced queue)
+        is picked up by the next ingest, so the scheduler can be kept between the ticks.
+        The scheduler is kept on the nodes, which mark themselves as touched when their queues are accessed,
+        so an ingest only checks the touched nodes (every node if they cannot keep it, ex. NodeView)
+
+        Args:
+            nodes (dict{str: Node}): the nodes
+            retention (int): the received information of the time (time - retention) is removed at the time,
+                             the same as info_exchange (the information received later than that is kept)
+        '''
+
+        self.nodes = nodes
+        self.retention = retention
+
+        self.order = {node: i for i, node in enumerate(nodes.values())}
+        self.queue = {}             # the entries of each tick ex. {11: [(0, 1, 3, node, info, 2, watch)]}
+        self.ticks = []             # the heap of the ticks in the queue
+        self.watches = ({}, {})     # the watch of the send_info and forward_info of the nodes ex. {node: [list, 3, 2, 3]}
+        self.received = {}          # the nodes with each key of the received_info ex. {11: [node]}
+        self.watched_received = {}  # the received_info seen by the last ingest and its amount of keys
+        self.touched = set()        # the nodes whose queues were accessed since the last ingest
+        self.attached = False       # True if every node keeps this scheduler (and marks itself as touched)
+        self.pending = 0            # the amount of scheduled information
+        self.seq = 0
+        self.generation = 0
+
+    def _attach(self):
+        '''
+        Keep the scheduler on the nodes, a scheduler kept before on them has to check every node on its next ingest
+        '''
+
+        self.attached = True
+
+        for node in self.nodes.values():
+            try:
+                if node._info_scheduler is not None and node._info_scheduler is not self:
+                    node._info_scheduler.attached = False
+
+                node._info_scheduler = self
+            except AttributeError:
+                self.attached = False
+
+        self.node_amount = len(self.nodes)
+
+    def _schedule(self, node, info, forward, watch):
+        '''
+        Schedule the information that is in the send_info or forward_info of the node,
+        the generation of the watch in its entry is its token (the entry is cancelled if the queue is replaced)
+
+        Args:
+            node (Node): the node that holds the information
+            info (dict): the information
+            forward (int): 1 if the information is in the forward_info else 0
+            watch (list): the watch of the queue
+        '''
+
+        tick = info['time'] + info['hops'] - len(info['path']) if forward else info['time']
+        entries = self.queue.get(tick)
+
+        if entries is None:
+            entries = self.queue[tick] = []
+            heappush(self.ticks, tick)
+
+        order = self.order.get(node)
+
+        if order is None:
+            order = self.order[node] = len(self.order)
+
+        entries.append((order, forward, self.seq, node, info, watch[2], watch))
+        watch[3] += 1
+        self.pending += 1
+        self.seq += 1
+
+    def _watch(self, node, forward):
+        '''
+        Schedule the information added to a queue of the node since the last ingest
+
+        Returns:
+            watch (list): the watch of the queue [queue, length, generation, amount of scheduled information]
+        '''
+
+        infos = node.forward_info if forward else node.send_info
+        watch = self.watches[forward].get(node)
+
+        if watch is not None and watch[0] is infos and watch[1] == len(infos):
+            return watch
+
+        if watch is None or watch[0] is not infos or len(infos) < watch[1]:
+            # a new or replaced queue, the entries of the previous one are cancelled by the new generation
+            if watch is None:
+                watch = self.watches[forward][node] = [infos, 0, self.generation, 0]
+            else:
+                self.pending -= watch[3]
+                watch[:] = [infos, 0, self.generation, 0]
+
+            self.generation += 1
+
+        for info in infos[watch[1]:]:
+            self._schedule(node, info, forward, watch)
+
+        watch[1] = len(infos)
+
+        return watch
+
+    def _track_received(self, node, time):
+        '''
+        Track a key of the received_info of the node, it is removed at the time + retention
+        '''
+
+        self.received.setdefault(time, []).append(node)
+
+    def send(self, node, info):
+        '''
+        Add the information to the send_info of the node and schedule it
+
+        Args:
+            node (Node): the source node
+            info (dict): the information (see info_exchange for the format)
+        '''
+
+        watch = self._watch(node, 0)
+        watch[0].append(info)
+        watch[1] += 1
+        self._schedule(node, info, 0, watch)
+
+    def ingest(self):
+        '''
+        Schedule the information added to the send_info and forward_info of the nodes since the last ingest
+        and track the keys of their received_info
+        '''
+
+        if not self.attached or len(self.nodes) != self.node_amount:
+            self._attach()
+            nodes = list(self.nodes.values())
+        else:
+            nodes = self.touched
+
+        self.touched = set()
+
+        for node in nodes:
+            self._watch(node, 0)
+            self._watch(node, 1)
+
+            received_info = node.received_info
+            watched = self.watched_received.get(node)
+
+            if watched is None or watched[0] is not received_info or watched[1] != len(received_info):
+                for time in received_info:
+                    self._track_received(node, time)
+
+                self.watched_received[node] = [received_info, len(received_info)]
+
+        # the accesses of the ingest itself are seen
+        self.touched = set()
+
+    def next_tick(self, since=None):
+        '''
+        Get the next tick with scheduled information
+
+        Args:
+            since (int): only consider the ticks from this tick on (default is all the ticks)
+
+        Returns:
+            tick (int): the tick, None if nothing is scheduled
+        '''
+
+        skipped = []
+
+        while self.ticks and (self.ticks[0] not in self.queue or (since is not None and self.ticks[0] < since)):
+            tick = heappop(self.ticks)
+
+            if tick in self.queue:
+                skipped.append(tick)
+
+        tick = self.ticks[0] if self.ticks else None
+
+        for skipped_tick in skipped:
+            heappush(self.ticks, skipped_tick)
+
+        return tick
+
+    def due(self, time):
+        '''
+        Get the amount of scheduled information due at the time
+
+        Args:
+            time (int): the time
+
+        Returns:
+            amount (int): the amount of information
+        '''
+
+        return sum(entry[5] == entry[6][2] for entry in self.queue.get(time, []))
+
+    def purge(self, time):
+        '''
+        Remove the received information of the time (time - retention), the same as info_exchange
+
+        Args:
+            time (int): the current time
+        '''
+
+        key = time - self.retention
+
+        for node in self.received.pop(key, []):
+            received_info = node.received_info
+
+            if received_info.get(key):
+                del received_info[key]
+
+                watched = self.watched_received.get(node)
+
+                if watched is not None and watched[0] is received_info:
+                    watched[1] = len(received_info)
+
+    def purge_between(self, start, end):
+        '''
+        Remove the received information as purge does at each time from the start to the end (excluded)
+
+        Args:
+            start (int): the first time
+            end (int): the time to stop at (excluded)
+        '''
+
+        if end - start > len(self.received):
+            times = sorted(key + self.retention for key in self.received if start <= key + self.retention < end)
+        else:
+            times = range(start, end)
+
+        for time in times:
+            self.purge(time)
+
+    def step(self, time):
+        '''
+        Exchange the information due at the time, each information moves one hop.
+        The information added to the queues of the nodes since the last ingest is ingested first
+
+        Args:
+            time (int): the current time
+
+        Returns:
+            received (list[dict]): the information that reached its destination
+        '''
+
+        self.ingest()
+        self.purge(time)
+
+        due = [entry for entry in self.queue.pop(time, []) if entry[5] == entry[6][2]]
+        due.sort()
+        senders = {}
+
+        for entry in due:
+            sender = senders.get(entry[5])
+
+            if sender is None:
+                senders[entry[5]] = [entry[3], entry[1], entry[6], 1]
+            else:
+                sender[3] += 1
+
+        # the nodes keep this scheduler, so their queues are read without marking them as touched
+        attached = self.attached
+
+        for node, forward, watch, amount in senders.values():
+            # the queue keeps the information due at other ticks, in the same order
+            if forward:
+                infos = [info for info in watch[0] if info['time'] + info['hops'] - len(info['path']) != time]
+
+                if attached:
+                    node._forward_info = infos
+                else:
+                    node.forward_info = infos
+            else:
+                infos = [info for info in watch[0] if info['time'] != time]
+
+                if attached:
+                    node._send_info = infos
+                else:
+                    node.send_info = infos
+
+            watch[0] = infos
+            watch[1] = len(infos)
+            watch[3] -= amount
+
+        queue = self.queue
+        order = self.order
+        watches = self.watches[1]
+        seq = self.seq
+        received = []
+        forwarded = 0
+
+        for sender_order, _, _, _, info, _, _ in due:
+            path = info['path']
+            dst_node = path.pop(0)
+
+            if not path:
+                received.append(info)
+
+                # info_exchange removes the key of the time - retention node by node, so the information received
+                # at that key from a node before the destination is removed with it
+                if info['time'] == time - self.retention and sender_order < order.get(dst_node, len(order)):
+                    continue
+
+                received_info = dst_node._received_info if attached else dst_node.received_info
+
+                if info['time'] not in received_info and info['time'] + self.retention > time:
+                    self._track_received(dst_node, info['time'])
+
+                received_info.setdefault(info['time'], []).append(info)
+                watched = self.watched_received.get(dst_node)
+
+                if watched is not None and watched[0] is received_info:
+                    watched[1] = len(received_info)
+            else:
+                watch = watches.get(dst_node)
+                infos = dst_node._forward_info if attached else dst_node.forward_info
+
+                if watch is None or watch[0] is not infos or watch[1] != len(infos):
+                    self.seq = seq
+                    watch = self._watch(dst_node, 1)
+                    seq = self.seq
+
+                infos.append(info)
+                watch[1] += 1
+                watch[3] += 1
+                forwarded += 1
+
+                # the same as _schedule, inlined as it is done for every hop
+                tick = info['time'] + info['hops'] - len(path)
+                entries = queue.get(tick)
+
+                if entries is None:
+                    entries = queue[tick] = []
+                    heappush(self.ticks, tick)
+
+                dst_order = order.get(dst_node)
+
+                if dst_order is None:
+                    dst_order = order[dst_node] = len(order)
+
+                entries.append((dst_order, 1, seq, dst_node, info, watch[2], watch))
+                seq += 1
+
+        self.seq = seq
+        self.pending += forwarded - len(due)
+
+        return received
+
+def run_info_exchange(topo, start, end, retention=10, scheduler=None):
+    '''
+    Exchange the information between nodes from the start tick to the end tick (excluded).
+    The ticks without due information are skipped by jumping to the next scheduled tick
+
+    Args:
+        topo (Topo): the topo (or the nodes dict{str: Node})
+        start (int): the first tick
+        end (int): the tick to stop at (excluded)
+        retention (int): the ticks to keep the received information before it is removed
+        scheduler (InfoScheduler): the scheduler to continue with, the information added to the nodes since
+                                   its last ingest is picked up (default is a new one with the nodes information)
+
+    Returns:
+        stats (dict{str: numpy.ndarray}): the statistics of each tick
+            ticks: the ticks
+            delivered: the information that reached its destination at the tick
+            forwarded: the information that moved one hop and has to be forwarded
+            queue_depth: the scheduled information after the tick
+            latency_histogram: the amount of delivered information per latency (delivery tick - info time)
+    '''
+
+    if scheduler is None:
+        scheduler = InfoScheduler(topo.nodes if hasattr(topo, 'nodes') else topo, retention)
+
+    scheduler.ingest()
+
+    tick_amount = max(end - start, 0)
+    delivered = np.zeros(tick_amount, dtype=np.int64)
+    forwarded = np.zeros(tick_amount, dtype=np.int64)
+    queue_depth = np.zeros(tick_amount, dtype=np.int64)
+    latencies = []
+
+    last = start
+    time = scheduler.next_tick(start)
+
+    while time is not None and time < end:
+        queue_depth[last - start:time - start] = scheduler.pending
+
+        scheduler.purge_between(last, time)
+
+        due_amount = scheduler.due(time)
+        received = scheduler.step(time)
+
+        delivered[time - start] = len(received)
+        forwarded[time - start] = due_amount - len(received)
+        queue_depth[time - start] = scheduler.pending
+        latencies += [time - info['time'] for info in received]
+
+        last = time + 1
+        time = scheduler.next_tick(last)
+
+    queue_depth[last - start:] = scheduler.pending
+
+    scheduler.purge_between(last, end)
+
+    return {
+        'ticks': np.arange(start, start + tick_amount),
+        'delivered': delivered,
+        'forwarded': forwarded,
+        'queue_depth': queue_depth,
+        'latency_histogram': np.bincount(np.array(latencies, dtype=np.int64), minlength=1),
+    }
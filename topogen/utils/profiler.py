@@ -0,0 +1,124 @@
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from time import perf_counter
+
+
+class StageProfiler:
+    def __init__(self, trace_memory=True, callback=None):
+        '''
+        Create a new instance of the StageProfiler class.
+        Each stage records its wall time, its peak allocations (tracemalloc) and the amount of the elements it built.
+        The stages can be nested, the outer stage includes the time and the allocations of the inner stages
+
+        Args:
+            trace_memory (bool): record the peak allocations (tracing the memory makes the stages slower)
+            callback (function(record)): called with the record of each stage when it ends
+
+        Example:
+            profiler = StageProfiler()
+            topo = generate_topology_from_graph(graph, 'DAG', 1.5, 10, profiler=profiler, eager=True)
+            print(profiler.summary())
+        '''
+
+        self.trace_memory = trace_memory
+        self.callback = callback
+        self.records = []           # the record of each stage in the order they end
+        self.stack = []             # the [start memory, peak memory] of the running stages
+        self.started_tracing = False
+
+    def __getstate__(self):
+        # the callback may not be picklable (ex. a lambda), it stays in the process that created the profiler
+        state = self.__dict__.copy()
+        state['callback'] = None
+        return state
+
+    @contextmanager
+    def stage(self, name):
+        '''
+        Record a stage
+
+        Args:
+            name (str): the name of the stage
+
+        Yields:
+            record (dict): the record of the stage, fill record['counts'] with the amount of the built elements
+                stage: the name of the stage
+                seconds: the wall time
+                peak_bytes: the peak of the allocations during the stage (None if the memory is not traced)
+                counts: the amount of the built elements ex. {'links': 10}
+        '''
+
+        record = {'stage': name, 'seconds': 0.0, 'peak_bytes': None, 'counts': {}}
+
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self.started_tracing = True
+            elif self.stack:
+                self.stack[-1][1] = max(self.stack[-1][1], tracemalloc.get_traced_memory()[1])
+
+            tracemalloc.reset_peak()
+            self.stack.append([tracemalloc.get_traced_memory()[0], 0])
+
+        start = perf_counter()
+
+        try:
+            yield record
+        finally:
+            record['seconds'] = perf_counter() - start
+
+            if self.trace_memory:
+                start_memory, peak = self.stack.pop()
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+                record['peak_bytes'] = peak - start_memory
+
+                if self.stack:
+                    self.stack[-1][1] = max(self.stack[-1][1], peak)
+                    tracemalloc.reset_peak()
+                elif self.started_tracing:
+                    tracemalloc.stop()
+                    self.started_tracing = False
+
+            self.records.append(record)
+
+            if self.callback is not None:
+                self.callback(record)
+
+    def summary(self):
+        '''
+        Get the records grouped by the stage
+
+        Returns:
+            summary (dict{str: dict}): the total seconds, the highest peak_bytes and the last counts of each stage
+        '''
+
+        summary = {}
+
+        for record in self.records:
+            stage = summary.setdefault(record['stage'], {'seconds': 0.0, 'peak_bytes': None, 'counts': {}, 'calls': 0})
+            stage['seconds'] += record['seconds']
+            stage['calls'] += 1
+            stage['counts'] = record['counts']
+
+            if record['peak_bytes'] is not None:
+                stage['peak_bytes'] = max(stage['peak_bytes'] or 0, record['peak_bytes'])
+
+        return summary
+
+
+def profile_stage(profiler, name):
+    '''
+    Record a stage if there is a profiler
+
+    Args:
+        profiler (StageProfiler): the profiler, None to not record the stage
+        name (str): the name of the stage
+
+    Returns:
+        context manager: the stage of the profiler, or a context giving a record that is not kept
+    '''
+
+    if profiler is None:
+        return nullcontext({'stage': name, 'seconds': 0.0, 'peak_bytes': None, 'counts': {}})
+
+    return profiler.stage(name)
@@ -0,0 +1,252 @@
+import numpy as np
+
+from .error_handler import err_raise
+
+
+class SparseRow:
+    __slots__ = ('width', 'cells', 'fill')
+
+    def __init__(self, width, cells=None, fill=0):
+        '''
+        Create a new instance of the SparseRow class.
+        A row of the graph that keeps only the cells different from the fill value,
+        it is read and written like a list of the width
+
+        Args:
+            width (int): the amount of cols
+            cells (dict{int: any}): the value of each occupied col ex. {3: 1}
+            fill (any): the value of the other cols (0 for a graph, '0' for a topo graph)
+        '''
+
+        self.width = width
+        self.cells = {} if cells is None else cells
+        self.fill = fill
+
+    def _col(self, j):
+        if j < 0:
+            j += self.width
+
+        if not 0 <= j < self.width:
+            raise IndexError('The col is out of the row')
+
+        return j
+
+    def __len__(self):
+        return self.width
+
+    def __getitem__(self, j):
+        return self.cells.get(self._col(j), self.fill)
+
+    def __setitem__(self, j, value):
+        j = self._col(j)
+
+        if value == self.fill:
+            self.cells.pop(j, None)
+        else:
+            self.cells[j] = value
+
+    def __iter__(self):
+        for j in range(self.width):
+            yield self.cells.get(j, self.fill)
+
+    def __eq__(self, other):
+        if isinstance(other, SparseRow):
+            return self.width == other.width and self.fill == other.fill and self.cells == other.cells
+
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return f'SparseRow({self.width}, {self.cells!r}, fill={self.fill!r})'
+
+    def items(self):
+        '''
+        Get the occupied cells in the col order
+
+        Returns:
+            cells (list[tuple(int, any)]): the (col, value) of each occupied cell
+        '''
+
+        return sorted(self.cells.items())
+
+    def index(self, value):
+        if value != self.fill:
+            cols = [j for j, cell in self.cells.items() if cell == value]
+
+            if cols:
+                return min(cols)
+        else:
+            for j in range(self.width):
+                if j not in self.cells:
+                    return j
+
+        raise ValueError(f'{value!r} is not in the row')
+
+    def count(self, value):
+        if value == self.fill:
+            return self.width - len(self.cells)
+
+        return sum(cell == value for cell in self.cells.values())
+
+    def copy(self):
+        return SparseRow(self.width, dict(self.cells), self.fill)
+
+
+class SparseGraph:
+    __slots__ = ('shape', 'rows', 'fill')
+
+    def __init__(self, cells=(), shape=None, fill=0):
+        '''
+        Create a new instance of the SparseGraph class.
+        The graph keeps only the occupied cells, so a huge grid with few nodes never builds the dense matrix.
+        It is read and written like the dict{int: list[int]} of graph_matrix_to_dict, the rows are SparseRow
+
+        Args:
+            cells (iterable[tuple(int, int)]): the occupied (row, col) cells, they are set to 1
+                                               (a list, or an iterator ex. read row by row from a file)
+            shape (tuple(int, int)): the amount of rows and cols (default is the smallest shape with all the cells)
+            fill (any): the value of the cells that are not occupied
+
+        Example:
+            graph = SparseGraph([(0, 2), (1, 1), (1, 3), (2, 2)], shape=(3, 4))
+            topo = generate_topology_from_graph(graph, 'DAG', 1.5, 10)
+        '''
+
+        self.rows = {}      # the rows with an occupied cell or that have been accessed ex. {0: SparseRow}
+        self.fill = fill
+        row_amount = col_amount = 0
+
+        for i, j in cells:
+            i = int(i)
+            j = int(j)
+
+            # error handling
+            err_raise(ValueError, 'The cell coordinate cannot be negative', i < 0 or j < 0)
+
+            row = self.rows.get(i)
+
+            if row is None:
+                row = self.rows[i] = SparseRow(0, fill=fill)
+
+            row.cells[j] = 1
+            row_amount = max(row_amount, i + 1)
+            col_amount = max(col_amount, j + 1)
+
+        if shape is not None:
+            # error handling
+            err_raise(ValueError, 'The cells are out of the shape', row_amount > shape[0] or col_amount > shape[1])
+
+            row_amount, col_amount = shape
+
+        self.shape = (int(row_amount), int(col_amount))
+
+        for row in self.rows.values():
+            row.width = self.shape[1]
+
+    @classmethod
+    def from_array(cls, array):
+        '''
+        Create the sparse graph from the cells of the array that are 1, the other nonzero values (ex. 2) are kept
+        as they are, the same as the rows of a matrix
+
+        Args:
+            array (numpy.ndarray): the 2D array (bool or int)
+
+        Returns:
+            SparseGraph: the sparse graph
+        '''
+
+        array = np.asarray(array)
+
+        # error handling
+        err_raise(ValueError, 'The array must be 2D', array.ndim != 2)
+
+        graph = cls(zip(*np.nonzero(array == 1)), array.shape)
+
+        for i, j in zip(*np.nonzero((array != 0) & (array != 1))):
+            graph[int(i)][int(j)] = array[i, j].item()
+
+        return graph
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __contains__(self, i):
+        return isinstance(i, (int, np.integer)) and 0 <= i < self.shape[0]
+
+    def __getitem__(self, i):
+        row = self.rows.get(i)
+
+        if row is None:
+            if i not in self:
+                raise KeyError(i)
+
+            row = self.rows[i] = SparseRow(self.shape[1], fill=self.fill)
+
+        return row
+
+    def __setitem__(self, i, row):
+        # error handling
+        err_raise(KeyError, 'The row is out of the graph', i not in self)
+
+        self.rows[i] = row
+
+    def __iter__(self):
+        return iter(range(self.shape[0]))
+
+    def __eq__(self, other):
+        if not isinstance(other, SparseGraph):
+            return NotImplemented
+
+        return self.shape == other.shape and self.fill == other.fill and list(self.cells()) == list(other.cells())
+
+    def __repr__(self):
+        return f'SparseGraph(shape={self.shape}, cells={sum(len(row.cells) for row in self.rows.values())})'
+
+    def keys(self):
+        return range(self.shape[0])
+
+    def values(self):
+        for i in range(self.shape[0]):
+            yield self[i]
+
+    def items(self):
+        for i in range(self.shape[0]):
+            yield i, self[i]
+
+    def cells(self):
+        '''
+        Get the occupied cells in the row-major order
+
+        Yields:
+            cell (tuple(int, int, any)): the (row, col, value) of each occupied cell
+        '''
+
+        for i in sorted(self.rows):
+            for j, value in self.rows[i].items():
+                yield i, j, value
+
+    def copy(self, deep=False):
+        '''
+        Copy the graph
+
+        Args:
+            deep (bool): copy the rows as well, otherwise the rows are shared with the copy
+
+        Returns:
+            SparseGraph: the copy
+        '''
+
+        graph = SparseGraph(shape=self.shape, fill=self.fill)
+        graph.rows = {i: row.copy() for i, row in self.rows.items()} if deep else dict(self.rows)
+
+        return graph
+
+    def to_dict(self):
+        '''
+        Build the dense dict{int: list} of the graph
+
+        Returns:
+            graph (dict{int: list}): the dense graph
+        '''
+
+        return {i: list(row) for i, row in self.items()}